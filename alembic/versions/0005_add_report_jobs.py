@@ -0,0 +1,45 @@
+"""Track report generation as background jobs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.alter_column('filename', existing_type=sa.String(length=255), nullable=True)
+        batch_op.alter_column('path', existing_type=sa.String(length=500), nullable=True)
+        batch_op.add_column(sa.Column('format', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='completed'))
+        batch_op.add_column(sa.Column('stage', sa.String(length=30), nullable=True))
+        batch_op.add_column(sa.Column('stages', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True))
+        batch_op.create_index(batch_op.f('ix_reports_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reports', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reports_status'))
+        batch_op.drop_column('finished_at')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('cancel_requested')
+        batch_op.drop_column('error')
+        batch_op.drop_column('stages')
+        batch_op.drop_column('stage')
+        batch_op.drop_column('status')
+        batch_op.drop_column('format')
+        batch_op.alter_column('path', existing_type=sa.String(length=500), nullable=False)
+        batch_op.alter_column('filename', existing_type=sa.String(length=255), nullable=False)
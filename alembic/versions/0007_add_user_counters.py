@@ -0,0 +1,47 @@
+"""Add materialized per-user progress counters
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('doc_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('verified_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('avg_ocr_confidence', sa.Float(), nullable=True),
+        sa.Column('latest_score_id', sa.Integer(), nullable=True),
+        sa.Column('completed_soft_skill_courses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    
+    # Backfill from the existing rows; afterwards writes keep them current
+    op.execute("""
+        INSERT INTO user_counters (user_id, doc_count, verified_count, avg_ocr_confidence,
+                                   latest_score_id, completed_soft_skill_courses)
+        SELECT u.id,
+               (SELECT COUNT(*) FROM documents d WHERE d.user_id = u.id),
+               (SELECT COUNT(*) FROM documents d WHERE d.user_id = u.id AND d.verification_status = 'verified'),
+               (SELECT AVG(d.ocr_confidence) FROM documents d WHERE d.user_id = u.id),
+               (SELECT MAX(s.id) FROM career_scores s WHERE s.user_id = u.id),
+               (SELECT COUNT(*) FROM user_courses uc JOIN courses c ON uc.course_id = c.id
+                 WHERE uc.user_id = u.id AND uc.status = 'completed' AND c.category = 'soft_skill')
+        FROM users u
+    """)
+
+
+def downgrade():
+    op.drop_table('user_counters')
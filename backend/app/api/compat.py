@@ -4,10 +4,11 @@ from typing import List, Optional
 from app.dependencies import get_db, get_current_user
 from app.services.student_service import get_by_user_id, create_profile, update_profile
 from app.schemas.student import StudentCreate, StudentUpdate, StudentRead
-from app.services.scoring_service import compute_score
+from app.services.score_cache import get_or_compute_score
 from app.services.document_service import get_document, set_ocr_text
-from app.services.ocr_service import extract_text
+from app.services.ocr_executor import submit as submit_ocr
 from app.services.report_service import get_report
+from app.services.report_job_service import job_status
 
 router = APIRouter()
 
@@ -46,12 +47,16 @@ class AnalyzeRequest:
 def compat_documents_analyze(body: dict, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     ids = body.get('document_ids') or []
     processed = []
+    # Queue every document first so they are OCR'd in parallel
+    pending = []
     for doc_id in ids:
         doc = get_document(db, int(doc_id), current_user.id)
         if not doc:
             continue
-        text = extract_text(doc.path) or ''
-        set_ocr_text(db, doc, text)
+        pending.append((doc_id, doc, submit_ocr(doc.path)))
+    for doc_id, doc, future in pending:
+        result = future.result()
+        set_ocr_text(db, doc, result.text or '', result.confidence, result.pages)
         processed.append(doc_id)
     return {'analysis_id': 'local', 'status': 'completed', 'processed': processed}
 
@@ -65,7 +70,7 @@ def compat_calculate_score(db: Session = Depends(get_db), current_user = Depends
     profile = get_by_user_id(db, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail='Profile not found')
-    s, strengths, improvements, breakdown, confidence = compute_score(db, profile)
+    (s, strengths, improvements, breakdown, confidence), _ = get_or_compute_score(db, profile, persist=False)
     return {'score': s, 'breakdown': breakdown, 'confidence': confidence}
 
 @router.post('/api/career/skill-gaps')
@@ -84,4 +89,4 @@ def compat_report_status(id: int, db: Session = Depends(get_db), current_user =
     r = get_report(db, current_user.id, id)
     if not r:
         raise HTTPException(status_code=404, detail='Report not found')
-    return {'id': r.id, 'path': r.path, 'filename': r.filename}
+    return job_status(r)
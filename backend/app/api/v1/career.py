@@ -1,23 +1,31 @@
+import json
+import logging
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.dependencies import get_db, get_current_user
 from app.models.user import User
 from app.schemas import CareerScoreRead, RecommendationRead, CareerScoreDetail
-from app.services.scoring_service import compute_score, recommend, persist_score
+from app.services.scoring_service import recommend
+from app.services.score_cache import get_or_compute_score
 from app.services.rag_service import retrieve_roles
-from app.services.gpt_service import summarize
+from app.services.gpt_service import summarize, stream_guidance
 from app.services.student_service import get_by_user_id
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.get('/score', response_model=CareerScoreDetail)
 def score(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     profile = get_by_user_id(db, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found. Please create your profile first.")
     
-    score, strengths, improvements, breakdown, confidence = compute_score(db, profile)
-    persist_score(db, current_user.id, score, breakdown, confidence)
+    # Reuses the last score (no new row) while profile, evidence and KB are unchanged
+    (score, strengths, improvements, breakdown, confidence), _ = get_or_compute_score(db, profile)
     
     return {
         'score': score, 
@@ -53,3 +61,33 @@ def ai_recommendations(db: Session = Depends(get_db)):
         ],
         'career_path': 'Frontend Developer → Full Stack Developer → Senior Developer → Tech Lead'
     }
+
+@router.get('/guidance/stream')
+def guidance_stream(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """AI career guidance as server-sent events: start, token/section as generated, then done (or error)"""
+    profile = get_by_user_id(db, current_user.id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found. Please create your profile first.")
+    
+    profile_dict = {
+        'skills': profile.skills or '',
+        'interests': profile.interests or '',
+        'education_level': profile.education_level or '',
+        'experience_years': profile.experience_years,
+        'bio': profile.bio or ''
+    }
+    query = f"{profile.skills or ''} {profile.interests or ''}".strip() or 'software developer'
+    roles = retrieve_roles(query, k=5)
+    
+    def events():
+        # First byte goes out before the model produces anything
+        yield ": stream open\n\n"
+        try:
+            for event, data in stream_guidance(profile_dict, roles):
+                yield _sse(event, data)
+        except Exception as e:
+            logger.error(f"Guidance stream failed: {e}")
+            yield _sse('error', {'detail': str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
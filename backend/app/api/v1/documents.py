@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from sqlalchemy.orm import Session
 from app.dependencies import get_db, get_current_user
 from app.schemas import DocumentRead
-from app.services.document_service import save_document, list_documents, get_document, set_ocr_text
-from app.services.kb_service import load_kb
-from app.services.ocr_service import extract_text
+from app.services.document_service import save_upload, list_documents, get_document, set_ocr_text
+from app.services.skill_matcher import get_kb_skill_matcher
+from app.services.ocr_executor import extract_document, queue_document_ocr
+from app.core.config import settings
 
 router = APIRouter()
 
@@ -14,8 +15,9 @@ def list_my_documents(db: Session = Depends(get_db), current_user = Depends(get_
 
 @router.post("/upload", response_model=DocumentRead)
 async def upload(file: UploadFile = File(...), db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    content = await file.read()
-    doc = save_document(db, current_user.id, file.filename, content, file.content_type)
+    doc, content_sha256 = await save_upload(db, current_user.id, file)
+    if settings.OCR_ON_UPLOAD:
+        queue_document_ocr(doc.id, current_user.id, doc.path, content_sha256)
     return doc
 
 @router.post("/{doc_id}/ocr", response_model=DocumentRead)
@@ -23,33 +25,20 @@ def ocr(doc_id: int, db: Session = Depends(get_db), current_user = Depends(get_c
     doc = get_document(db, doc_id, current_user.id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    text, conf = extract_text(doc.path)
-    doc = set_ocr_text(db, doc, (text or ""), conf)
+    result = extract_document(doc.path)
+    doc = set_ocr_text(db, doc, (result.text or ""), result.confidence, result.pages)
     return doc
 
 @router.post("/extract-skills")
 def extract_skills(body: dict, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     ids = body.get('document_ids') or []
     skills = []
-    kb = load_kb()
-    skill_col = None
-    for c in kb.columns:
-        if 'technical' in c.lower() and 'skills' in c.lower():
-            skill_col = c
-            break
-    skill_vocab = set()
-    if skill_col:
-        for s in kb[skill_col].dropna().astype(str).tolist():
-            for token in s.replace(';', ',').split(','):
-                t = token.strip().lower()
-                if t:
-                    skill_vocab.add(t)
+    matcher = get_kb_skill_matcher()
     for doc_id in ids:
         doc = get_document(db, int(doc_id), current_user.id)
         if not doc or not doc.ocr_text:
             continue
-        text = doc.ocr_text.lower()
-        found = [sv for sv in skill_vocab if sv and sv in text][:20]
+        found = sorted(matcher.find(doc.ocr_text))[:20]
         for f in found:
             skills.append(f)
     return {'skills': sorted(set(skills)), 'confidence': 0.6}
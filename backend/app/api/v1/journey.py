@@ -37,23 +37,20 @@ def get_journey_status(
         db.commit()
         db.refresh(student)
     
+    # Document/score evidence, loaded once and shared by every rule below
+    snapshot = journey_service.load_journey_snapshot(db, student.user_id)
+    
     # Update journey progress
-    stage, completion = journey_service.update_journey_progress(db, student)
+    stage, completion = journey_service.update_journey_progress(db, student, snapshot)
     
     # Get next actions
-    next_actions = journey_service.get_next_actions(db, student)
+    next_actions = journey_service.get_next_actions(db, student, snapshot)
     
     # Get encouraging message
     message = journey_service.get_encouraging_message(stage, completion)
     
     # Check which stages can be accessed
-    can_access = {
-        1: True,  # Always accessible
-        2: journey_service.can_unlock_stage(db, student, 2),
-        3: journey_service.can_unlock_stage(db, student, 3),
-        4: journey_service.can_unlock_stage(db, student, 4),
-        5: journey_service.can_unlock_stage(db, student, 5),
-    }
+    can_access = journey_service.can_access_stages(db, student, snapshot)
     
     return {
         'stage': stage,
@@ -16,7 +16,7 @@ def kb_search(data: KBQuery):
 
 @router.post('/refresh')
 def kb_refresh():
-    build_index()
+    build_index(force=True)
     return {'refreshed': True}
 
 @router.delete('/clear')
@@ -69,7 +69,7 @@ async def kb_upload(file: UploadFile = File(...)):
     from app.core.config import settings
     from pathlib import Path
     import pandas as pd
-    from app.services.kb_service import reset_kb_cache, load_kb
+    from app.services.kb_service import reset_kb_cache, load_kb, import_kb_file
     from app.services.embeddings_service import build_index
     
     # Validate file type
@@ -100,16 +100,9 @@ async def kb_upload(file: UploadFile = File(...)):
     print(f"📋 File saved to: {dest}")
     print(f"📋 File exists: {dest.exists()}")
     
-    # Verify the file can be read
+    # Validate Excel content (parsed once; also writes the columnar cache load_kb reads)
     try:
-        test_read = pd.read_excel(dest)
-        print(f"✅ File verification: {len(test_read)} rows readable")
-    except Exception as e:
-        print(f"❌ File verification failed: {e}")
-    
-    # Validate Excel content
-    try:
-        df = pd.read_excel(dest)
+        df = import_kb_file(dest)
         row_count = len(df)
         col_count = len(df.columns)
         print(f"✅ Excel validation: {row_count} rows, {col_count} columns")
@@ -154,10 +147,8 @@ async def kb_upload(file: UploadFile = File(...)):
     print(f"🔄 Cache reset, loading new data...")
     
     # Force reload by clearing embeddings cache too
-    import app.services.embeddings_service as emb_service
-    emb_service._kb_texts = None
-    emb_service._embeddings = None
-    emb_service._faiss_index = None
+    from app.services.embeddings_service import reset_index
+    reset_index()
     
     # Verify data is loaded
     test_df = load_kb()
@@ -2,12 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from starlette.responses import FileResponse
 from app.dependencies import get_db, get_current_user
-from app.schemas import ReportRead
-from app.services.report_service import render_report, save_report, list_reports, get_report, create_professional_pdf_report
-from app.services.student_service import get_by_user_id
-from app.services.scoring_service import compute_score, recommend
-from app.services.gpt_service import summarize
-from app.services.rag_service import retrieve_roles
+from app.schemas import ReportRead, ReportStatus
+from app.services.report_service import list_reports, get_report
+from app.services.report_job_service import submit_report_job, cancel_report_job, job_status
 
 router = APIRouter()
 
@@ -15,61 +12,34 @@ router = APIRouter()
 def list_my_reports(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     return list_reports(db, current_user.id)
 
-@router.post("/generate", response_model=ReportRead, status_code=201)
+@router.post("/generate", response_model=ReportStatus, status_code=202)
 def generate(format: str = 'html', db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    profile = get_by_user_id(db, current_user.id)
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profile not found")
-    
-    # Generate comprehensive analysis
-    s, strengths, improvements, breakdown, confidence = compute_score(db, profile)
-    jobs, skills_to_learn = recommend(db, profile)
-    
-    # Get AI recommendations
-    profile_dict = {
-        'skills': profile.skills or '',
-        'interests': profile.interests or '',
-        'education_level': profile.education_level or '',
-        'bio': profile.bio or ''
-    }
-    
-    # Retrieve relevant roles for AI analysis
-    query = f"{profile.skills or ''} {profile.interests or ''}".strip() or 'software developer'
-    roles = retrieve_roles(query, k=5)
-    ai_summary = summarize(profile_dict, roles)
-    
-    # Build comprehensive context
-    context = {
-        "name": getattr(current_user, 'name', 'Student'),
-        "email": getattr(current_user, 'email', 'Not provided'),
-        "education_level": profile.education_level or "Not specified",
-        "skills": profile.skills or "",
-        "interests": profile.interests or "",
-        "bio": profile.bio or "",
-        "score": s,
-        "breakdown": breakdown,
-        "confidence": confidence,
-        "strengths": strengths,
-        "improvements": improvements,
-        "job_roles": jobs,
-        "skills_to_learn": skills_to_learn,
-        "career_path": ai_summary.get('career_path', ''),
-        "next_steps": ai_summary.get('next_steps', []),
-        "market_insights": ai_summary.get('market_insights', ''),
-        "detailed_recommendations": ai_summary.get('detailed_recommendations', []),
-        "detailed_skills": ai_summary.get('detailed_skills', [])
-    }
-    
-    if format == 'pdf':
-        return create_professional_pdf_report(db, current_user.id, context)
-    
-    html = render_report(context)
-    return save_report(db, current_user.id, html)
+    """Queue report generation; poll GET /{report_id} for per-stage progress"""
+    if format not in ('html', 'pdf'):
+        raise HTTPException(status_code=400, detail="format must be 'html' or 'pdf'")
+    job = submit_report_job(db, current_user.id, format)
+    return job_status(job)
+
+@router.get("/{report_id}", response_model=ReportStatus)
+def report_status(report_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    r = get_report(db, current_user.id, report_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return job_status(r)
+
+@router.post("/{report_id}/cancel", response_model=ReportStatus)
+def cancel(report_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    r = get_report(db, current_user.id, report_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return job_status(cancel_report_job(db, r))
 
 @router.get("/{report_id}/download")
 def download(report_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     r = get_report(db, current_user.id, report_id)
     if not r:
         raise HTTPException(status_code=404, detail="Report not found")
+    if r.status != 'completed' or not r.path:
+        raise HTTPException(status_code=409, detail=f"Report is {r.status}")
     media = "application/pdf" if r.filename.lower().endswith('.pdf') else "text/html"
     return FileResponse(r.path, media_type=media, filename=r.filename)
@@ -1,6 +1,16 @@
 from fastapi import APIRouter
 from app.services.ocr_service import get_ocr_info
-from app.services.gpt_service import _ollama_available, _openai_available, _ollama_models, check_ollama_connection
+from app.services.ocr_executor import executor_stats
+from app.services.ocr_cache import cache_stats as ocr_cache_stats
+from app.services.model_registry import model_stats
+from app.services.embeddings_service import index_stats
+from app.services.score_cache import cache_stats as score_cache_stats
+from app.services.llm_client import client_stats
+from app.services.llm_cache import cache_stats as llm_cache_stats
+from app.services.gpt_service import ollama_available, openai_available
+from app.services.llm_health import health_stats
+from app.utils.lazy_import import import_stats
+from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,8 +20,9 @@ router = APIRouter()
 def get_system_status():
     """Get system status including AI and OCR services"""
     
-    # Check Ollama status (refresh connection)
-    ollama_available, ollama_models = check_ollama_connection()
+    # Cached by the background health prober; breakers and latencies are under "clients"
+    health = health_stats()
+    ollama_up, openai_up = ollama_available(), openai_available()
     
     # Get OCR information
     ocr_info = get_ocr_info()
@@ -21,30 +32,38 @@ def get_system_status():
         "services": {
             "ai": {
                 "ollama": {
-                    "available": ollama_available,
-                    "models": [model.get('name', 'unknown') for model in ollama_models] if ollama_models else [],
-                    "url": "http://localhost:11434",
+                    "available": ollama_up,
+                    "models": health.get('ollama', {}).get('models', []),
+                    "url": settings.OLLAMA_URL,
                     "primary": True
                 },
                 "openai": {
-                    "available": _openai_available,
+                    "available": openai_up,
                     "primary": False
                 },
-                "fallback_mode": not ollama_available and not _openai_available
+                "fallback_mode": not ollama_up and not openai_up,
+                "health": health,
+                "clients": client_stats(),
+                "response_cache": llm_cache_stats()
             },
             "ocr": {
                 "primary_engine": ocr_info['primary_engine'],
                 "easyocr_available": ocr_info['easyocr_available'],
                 "tesseract_available": ocr_info['tesseract_available'],
-                "supported_formats": ocr_info['supported_formats']
+                "supported_formats": ocr_info['supported_formats'],
+                "executor": executor_stats(),
+                "cache": ocr_cache_stats()
             },
             "database": {
                 "type": "SQLite",
                 "status": "connected"
-            }
+            },
+            "embeddings": {**model_stats(), "index": index_stats()},
+            "score_cache": score_cache_stats(),
+            "lazy_imports": import_stats()
         },
         "recommendations": {
-            "ai": "Install Ollama and pull a model (e.g., 'ollama pull llama2') for local AI processing" if not ollama_available else "Ollama is ready!",
+            "ai": "Install Ollama and pull a model (e.g., 'ollama pull llama2') for local AI processing" if not ollama_up else "Ollama is ready!",
             "ocr": "Install EasyOCR (pip install easyocr) for better OCR accuracy" if not ocr_info['easyocr_available'] else "EasyOCR is ready!"
         }
     }
@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:5173"]
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 20 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 256 * 1024  # Bytes read per step when streaming uploads to disk
     ALLOWED_FILE_TYPES: List[str] = [".pdf", ".jpg", ".jpeg", ".png"]
     
     # AI Configuration
@@ -21,17 +22,61 @@ class Settings(BaseSettings):
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama2")
     GPT5_API_KEY: str = os.getenv("GPT5_API_KEY", "")
     GPT5_MODEL: str = os.getenv("GPT5_MODEL", "gpt-4")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    OLLAMA_MAX_CONCURRENCY: int = 2  # Parallel generations a local Ollama can serve
+    OPENAI_MAX_CONCURRENCY: int = 8
+    LLM_QUEUE_TIMEOUT: float = 30.0  # Max seconds a request waits for a free slot
+    LLM_REQUEST_TIMEOUT: float = 120.0  # Deadline per LLM call, queueing included
+    LLM_HEALTH_INTERVAL: float = 15.0  # Seconds between background health probes of each backend
+    LLM_HEALTH_TIMEOUT: float = 3.0
+    LLM_BREAKER_FAILURES: int = 3  # Consecutive failed calls that open a backend's circuit breaker
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Open time before a half-open trial call is let through
+    LLM_LATENCY_WINDOW: int = 200  # Recent call latencies kept for percentiles
+    LLM_UNAVAILABLE_WAIT: float = 0.0  # Seconds a request waits for a backend to recover (0 = fail fast)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "cache/llm_responses.sqlite"  # Relative to the project root
+    LLM_CACHE_TTL: int = 7 * 24 * 3600  # Seconds before a cached answer is regenerated
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    LLM_CACHE_NEAR_DUPLICATE: bool = False  # Reuse answers across profiles with the same canonical skill set
     
     # OCR Configuration
     OCR_ENGINE: str = os.getenv("OCR_ENGINE", "easyocr")
     GOOGLE_VISION_API_KEY: Optional[str] = os.getenv("GOOGLE_VISION_API_KEY")
+    OCR_WORKERS: int = 2  # OCR processes, each holding its own reader (~0.5 GB with EasyOCR); 0 runs OCR inline
+    OCR_MAX_PDF_PAGES: int = 3
+    OCR_PDF_DPI: int = 200  # Render resolution for PDF pages; 150 is usually enough for certificates
+    PDF_TEXT_MIN_CHARS: int = 20  # Alphanumeric characters a PDF page's text layer needs to skip OCR
+    PDF_TEXT_LAYER_CONFIDENCE: float = 0.98  # Confidence recorded for natively extracted text
+    OCR_MAX_IMAGE_SIDE: int = 2400  # Rendered pages are downscaled to this longest side in pixels; 0 disables
+    OCR_ON_UPLOAD: bool = True  # Queue OCR as soon as a document is uploaded
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_PATH: str = "cache/ocr_results.sqlite"  # Relative to the project root
+    OCR_CACHE_MAX_BYTES: int = 200 * 1024 * 1024  # Extracted text kept before least recently used entries are evicted
     
     # Other settings
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_WARMUP: bool = False  # Load the embedding model during startup instead of on first query
     KB_FILE_PATH: str = "knowledge_base/career_intelligence_kb.xlsx"
     EMBEDDINGS_DIR: str = "knowledge_base/embeddings"
+    EMBEDDING_STORE_DTYPE: str = "int8"  # Memory-mapped KB vectors: 'int8' (+ a scale per vector), 'float16' or 'float32'
+    EMBEDDING_INDEX: str = "auto"  # 'auto' (by KB size), 'flat' (exact scan), 'ivf' or 'hnsw'
+    EMBEDDING_ANN_MIN_VECTORS: int = 50000  # auto: exact scan below this many KB entries
+    EMBEDDING_IVF_NLIST: int = 0  # IVF cells; 0 = 4 * sqrt(KB size)
+    EMBEDDING_IVF_NPROBE: int = 16  # IVF cells scanned per query: higher = better recall, slower
+    EMBEDDING_IVF_PQ_M: int = 48  # FAISS IVF-PQ sub-quantizers; IVF-Flat if it does not divide the dimension
+    EMBEDDING_HNSW_M: int = 32  # HNSW graph degree
+    EMBEDDING_HNSW_EF_CONSTRUCTION: int = 200
+    EMBEDDING_HNSW_EF_SEARCH: int = 64  # HNSW candidates per query: higher = better recall, slower
+    RAG_MIN_SIMILARITY: float = 0.2  # Retrieved roles below this cosine similarity are left out of prompts (best match always kept); 0 = off
+    KB_CACHE_DIR: str = "knowledge_base/cache"
+    SCORE_CACHE_SIZE: int = 10000  # Users whose last score is kept in memory per worker
+    SCORE_CACHE_REVALIDATE_SECONDS: float = 30.0  # Re-check a cached score against the database after this long (catches other workers' writes); 0 = every time
     REPORT_TEMPLATE_DIR: str = "reports/templates"
     REPORT_OUTPUT_DIR: str = "reports/generated"
+    REPORT_JOB_WORKERS: int = 2  # Reports generated in parallel by the local job pool
+    REPORT_JOB_MAX_ATTEMPTS: int = 3  # Tries per stage before the job fails
+    REPORT_JOB_RETRY_DELAY: float = 5.0  # Seconds, multiplied by the attempt number
+    REPORT_JOB_LEASE_SECONDS: float = 60.0  # A job whose worker has not heartbeated for this long is taken over
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     SMTP_SERVER: Optional[str] = os.getenv("SMTP_SERVER")
     SMTP_PORT: int = 587
@@ -48,6 +48,11 @@ class ValidationError(CareerIntelligenceException):
     def __init__(self, message: str):
         super().__init__(f"Validation error: {message}", "VALIDATION_ERROR")
 
+class FileTooLargeError(CareerIntelligenceException):
+    """Raised when an upload exceeds MAX_FILE_SIZE"""
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit", "FILE_TOO_LARGE")
+
 class ExternalServiceError(CareerIntelligenceException):
     """Raised when external service calls fail"""
     def __init__(self, service: str, message: str):
@@ -65,6 +70,7 @@ async def career_intelligence_exception_handler(request: Request, exc: CareerInt
         "KB_ERROR": 500,
         "REPORT_ERROR": 500,
         "VALIDATION_ERROR": 400,
+        "FILE_TOO_LARGE": 413,
         "EXTERNAL_SERVICE_ERROR": 503
     }
     
@@ -13,7 +13,7 @@ Base = declarative_base()
 def init_db_sync():
     """Synchronous database initialization"""
     # Import all models to ensure they are registered with Base
-    from app.models import user, student, document, report, career_score, course, user_course, user_progress  # noqa: F401
+    from app.models import user, student, document, report, career_score, course, user_course, user_progress, user_counters  # noqa: F401
     Base.metadata.create_all(bind=engine)
 
 async def init_db():
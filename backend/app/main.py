@@ -8,6 +8,7 @@ from app.api import compat
 from app.core.config import settings
 from app.core.exceptions import setup_exception_handlers
 from app.database import init_db
+from app.utils.body_limit import UploadSizeLimitMiddleware
 
 # Configure logging
 logging.basicConfig(
@@ -25,8 +26,36 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
+    try:
+        from app.services.embeddings_service import load_or_rebuild_index
+        logger.info(f"Embedding index: {load_or_rebuild_index()}")
+    except Exception as e:
+        logger.warning(f"Embedding index load failed: {e}")
+    if settings.EMBEDDING_WARMUP:
+        try:
+            from app.services.embeddings_service import warmup
+            warmup()
+            logger.info("Embedding model warmed up")
+        except Exception as e:
+            logger.warning(f"Embedding warmup failed: {e}")
+    # Backend health is probed in the background; requests only read the cached result
+    from app.services.llm_health import start_prober
+    start_prober()
+    try:
+        from app.services.report_job_service import resume_report_jobs
+        resumed = resume_report_jobs()
+        if resumed:
+            logger.info(f"Resumed {resumed} pending report jobs")
+    except Exception as e:
+        logger.warning(f"Report job resume failed: {e}")
     yield
     logger.info("Shutting down Career Intelligence System")
+    from app.services.llm_health import stop_prober
+    stop_prober()
+    from app.services.report_job_service import shutdown as shutdown_report_jobs
+    shutdown_report_jobs()
+    from app.services.ocr_executor import shutdown as shutdown_ocr
+    shutdown_ocr()
 
 app = FastAPI(
     title="Career Intelligence System API",
@@ -46,6 +75,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWED_HOSTS)
+# Outermost, so oversized uploads are refused before anything reads the body
+app.add_middleware(UploadSizeLimitMiddleware, paths=["/api/v1/documents/upload"])
 
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(students.router, prefix="/api/v1/students", tags=["Students"])
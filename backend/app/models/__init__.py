@@ -7,3 +7,4 @@ from .course import Course
 from .user_course import UserCourse
 from .user_progress import UserProgress
 
+from .user_counters import UserCounters
@@ -13,6 +13,7 @@ class Document(Base):
     # OCR fields (existing)
     ocr_text = Column(Text, nullable=True)
     ocr_confidence = Column(Float, nullable=True)
+    ocr_pages = Column(JSON, nullable=True)  # [{page, method: 'text_layer' | 'ocr', chars, confidence}]
     
     # Verification fields (new)
     verification_status = Column(String(20), default='needs_action')  # 'verified', 'low_trust', 'needs_action'
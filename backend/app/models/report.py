@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Text, Boolean, JSON, ForeignKey, DateTime, func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -6,8 +6,19 @@ class Report(Base):
     __tablename__ = "reports"
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
-    filename = Column(String(255), nullable=False)
-    path = Column(String(500), nullable=False)
+    filename = Column(String(255), nullable=True)  # Set once the report file is written
+    path = Column(String(500), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Generation job state
+    format = Column(String(10), nullable=True, default='html')
+    status = Column(String(20), nullable=False, default='completed', server_default='completed', index=True)  # 'queued', 'running', 'completed', 'failed', 'cancelled'
+    stage = Column(String(30), nullable=True)
+    stages = Column(JSON, nullable=True)  # [{name, status, attempts, seconds, error}]
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False, server_default='0')
+    owner = Column(String(100), nullable=True)  # Worker running the job; see lease_expires_at
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)  # Renewed by the owner's heartbeat
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
     user = relationship("User")
-
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, func
+from app.database import Base
+
+class UserCounters(Base):
+    """Per-user progress aggregates, kept current on write by services/progress_counters"""
+    __tablename__ = "user_counters"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    doc_count = Column(Integer, nullable=False, default=0)
+    verified_count = Column(Integer, nullable=False, default=0)
+    avg_ocr_confidence = Column(Float, nullable=True)  # None until a document has a confidence
+    latest_score_id = Column(Integer, nullable=True)  # newest career_scores.id
+    completed_soft_skill_courses = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
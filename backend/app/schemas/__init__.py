@@ -3,4 +3,4 @@ from .student import StudentCreate, StudentUpdate, StudentRead
 from .document import DocumentRead
 from .career import CareerScoreRead, RecommendationRead
 from .score import CareerScoreDetail
-from .report import ReportRead
+from .report import ReportRead, ReportStatus
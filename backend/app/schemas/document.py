@@ -7,5 +7,6 @@ class DocumentRead(BaseModel):
     mime_type: str | None = None
     ocr_text: str | None = None
     ocr_confidence: float | None = None
+    ocr_pages: list[dict] | None = None
     class Config:
         from_attributes = True
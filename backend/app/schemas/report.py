@@ -1,9 +1,31 @@
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
 
 class ReportRead(BaseModel):
     id: int
-    filename: str
-    path: str
+    filename: Optional[str] = None
+    path: Optional[str] = None
+    status: str = 'completed'
     class Config:
         from_attributes = True
 
+class ReportStage(BaseModel):
+    name: str
+    status: str
+    attempts: int = 0
+    seconds: Optional[float] = None
+    error: Optional[str] = None
+
+class ReportStatus(BaseModel):
+    id: int
+    status: str
+    format: Optional[str] = None
+    stage: Optional[str] = None
+    progress: float
+    stages: list[ReportStage]
+    error: Optional[str] = None
+    filename: Optional[str] = None
+    path: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,264 @@
+"""
+ANN Index - Approximate nearest-neighbour search over the embedding store
+
+The exact scan over the embedding store grows linearly with KB size. For
+large KBs an approximate index is built on top of the same vectors:
+
+- hnsw: FAISS HNSW graph over 8-bit scalar-quantized vectors
+- ivf:  FAISS IVF-PQ (IVF-Flat when the dimension does not split into
+        EMBEDDING_IVF_PQ_M sub-vectors), or a pure NumPy IVF over the
+        memory-mapped store when FAISS is not installed
+
+EMBEDDING_INDEX='auto' keeps the exact scan below EMBEDDING_ANN_MIN_VECTORS
+entries and picks hnsw (FAISS) or ivf (NumPy) above it. nprobe and
+efSearch are applied at query time, so recall/latency can be tuned without
+a rebuild; recall_at_k measures an index against the exact scan.
+
+Index files are shared by every worker process: builds are serialized with
+a lock file, and each file is written to a temp name and renamed into
+place, with the metadata removed first and written last, so a worker never
+loads a half-written index.
+"""
+import json
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+import numpy as np
+from app.core.config import settings
+from app.services.embedding_store import EmbeddingStore
+from app.utils.atomic_files import file_lock, save_array, save_json, write_atomic
+from app.utils.lazy_import import is_installed, optional_import
+
+logger = logging.getLogger(__name__)
+
+MODES = ('auto', 'flat', 'ivf', 'hnsw')
+META_FILE = "ann_meta.json"
+LOCK_FILE = "ann_build.lock"
+
+_ADD_CHUNK = 8192
+_KMEANS_ITERATIONS = 10
+
+
+def choose_mode(count: int, mode: Optional[str] = None) -> str:
+    """Index mode for a KB of `count` vectors: 'flat', 'ivf' or 'hnsw'"""
+    mode = mode or settings.EMBEDDING_INDEX
+    if mode not in MODES:
+        raise ValueError(f"Unknown embedding index mode '{mode}'; use one of {MODES}")
+    if mode == 'auto':
+        if count < settings.EMBEDDING_ANN_MIN_VECTORS:
+            return 'flat'
+        return 'hnsw' if is_installed('faiss') else 'ivf'
+    if mode == 'hnsw' and not is_installed('faiss'):
+        logger.warning("HNSW needs FAISS; using the NumPy IVF index instead")
+        return 'ivf'
+    return mode
+
+
+def build_params(mode: str, store: EmbeddingStore) -> Dict[str, Any]:
+    """Build-time parameters; an index is rebuilt when these change"""
+    backend = 'faiss' if is_installed('faiss') else 'numpy'
+    count, dim = len(store), store.dim
+    base = {'mode': mode, 'backend': backend, 'count': count, 'dim': dim, 'store_dtype': store.dtype}
+    if mode == 'hnsw':
+        return {**base, 'M': settings.EMBEDDING_HNSW_M, 'ef_construction': settings.EMBEDDING_HNSW_EF_CONSTRUCTION}
+    nlist = settings.EMBEDDING_IVF_NLIST or int(4 * math.sqrt(count))
+    params = {**base, 'nlist': max(1, min(nlist, count))}
+    if backend == 'faiss':
+        pq_m = settings.EMBEDDING_IVF_PQ_M
+        params['pq_m'] = pq_m if pq_m and dim % pq_m == 0 and count >= 256 else 0
+    return params
+
+
+def build_lock(directory: Union[str, Path]):
+    """Exclusive lock across worker processes; blocks until any other build finished"""
+    return file_lock(Path(directory) / LOCK_FILE)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _training_sample(store: EmbeddingStore, size: int, seed: int = 0) -> np.ndarray:
+    if len(store) <= size:
+        return store.vectors()
+    rows = np.sort(np.random.default_rng(seed).choice(len(store), size, replace=False))
+    return np.asarray(store.codes[rows], dtype=np.float32) * np.asarray(store.scales[rows])[:, None]
+
+
+class NumpyIVF:
+    """Inverted file over the memory-mapped store: k-means cells, scanned exactly"""
+
+    mode = 'ivf'
+
+    def __init__(self, store: EmbeddingStore, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray):
+        self.store = store
+        self.centroids = centroids
+        self.order = order  # row ids grouped by cell
+        self.offsets = offsets  # cell c holds order[offsets[c]:offsets[c + 1]]
+
+    @classmethod
+    def build(cls, store: EmbeddingStore, nlist: int, seed: int = 0) -> "NumpyIVF":
+        sample = _training_sample(store, min(len(store), max(nlist * 64, 10000)), seed)
+        rng = np.random.default_rng(seed)
+        # Spherical k-means: cells are assigned by inner product, so centroids
+        # are kept at unit length; otherwise large-norm centroids win argmax
+        centroids = _normalize_rows(sample[rng.choice(len(sample), nlist, replace=False)])
+        for _ in range(_KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            # Empty cells keep their previous centroid
+            filled = counts > 0
+            centroids[filled] = _normalize_rows(sums[filled])
+
+        cells = np.concatenate([
+            np.argmax(store.vectors(start, start + _ADD_CHUNK) @ centroids.T, axis=1)
+            for start in range(0, len(store), _ADD_CHUNK)
+        ])
+        order = np.argsort(cells, kind='stable').astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=nlist))]).astype(np.int64)
+        return cls(store, centroids.astype(np.float32), order, offsets)
+
+    def save(self, directory: Path):
+        save_array(directory / "ann_ivf_centroids.npy", self.centroids)
+        save_array(directory / "ann_ivf_order.npy", self.order)
+        save_array(directory / "ann_ivf_offsets.npy", self.offsets)
+
+    @classmethod
+    def load(cls, directory: Path, store: EmbeddingStore) -> "NumpyIVF":
+        return cls(store, np.load(directory / "ann_ivf_centroids.npy"),
+                   np.load(directory / "ann_ivf_order.npy", mmap_mode='r'),
+                   np.load(directory / "ann_ivf_offsets.npy"))
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        nprobe = max(1, min(settings.EMBEDDING_IVF_NPROBE, len(self.centroids)))
+        cells = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_idxs = np.full((len(queries), k), -1, dtype=np.int64)
+        for qi, query in enumerate(queries):
+            candidates = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells[qi]])
+            if not len(candidates):
+                continue
+            candidates = np.sort(candidates)
+            scores = (np.asarray(self.store.codes[candidates], dtype=np.float32) @ query) \
+                * np.asarray(self.store.scales[candidates])
+            top = np.argsort(-scores, kind='stable')[:k]
+            all_scores[qi, :len(top)] = scores[top]
+            all_idxs[qi, :len(top)] = candidates[top]
+        return all_scores, all_idxs
+
+
+class FaissIndex:
+    """FAISS IVF / HNSW index; query-time parameters are applied on every search"""
+
+    def __init__(self, index: Any, mode: str):
+        self.index = index
+        self.mode = mode
+
+    @classmethod
+    def build(cls, store: EmbeddingStore, params: Dict[str, Any]) -> "FaissIndex":
+        faiss = optional_import('faiss')
+        if params['mode'] == 'hnsw':
+            description = f"HNSW{params['M']},SQ8"
+        else:
+            description = f"IVF{params['nlist']},{'PQ%d' % params['pq_m'] if params['pq_m'] else 'Flat'}"
+        index = faiss.index_factory(store.dim, description, faiss.METRIC_INNER_PRODUCT)
+        if params['mode'] == 'hnsw':
+            index.hnsw.efConstruction = params['ef_construction']
+
+        index.train(_training_sample(store, min(len(store), max(params.get('nlist', 0) * 64, 50000))))
+        for start in range(0, len(store), _ADD_CHUNK):
+            index.add(store.vectors(start, start + _ADD_CHUNK))
+        return cls(index, params['mode'])
+
+    def save(self, directory: Path):
+        faiss = optional_import('faiss')
+        write_atomic(directory / f"ann_{self.mode}.faiss", lambda temp_path: faiss.write_index(self.index, str(temp_path)))
+
+    @classmethod
+    def load(cls, directory: Path, mode: str) -> "FaissIndex":
+        faiss = optional_import('faiss')
+        path = str(directory / f"ann_{mode}.faiss")
+        # Inverted lists can stay on disk (shared page cache); graphs are read into memory
+        flags = faiss.IO_FLAG_MMAP if mode == 'ivf' else 0
+        return cls(faiss.read_index(path, flags), mode)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        space = optional_import('faiss').ParameterSpace()
+        if self.mode == 'hnsw':
+            space.set_index_parameter(self.index, 'efSearch', max(settings.EMBEDDING_HNSW_EF_SEARCH, k))
+        else:
+            space.set_index_parameter(self.index, 'nprobe', settings.EMBEDDING_IVF_NPROBE)
+        # Missing neighbours come back as -1
+        return self.index.search(queries, k)
+
+
+AnnIndex = Union[NumpyIVF, FaissIndex]
+
+
+def build(store: EmbeddingStore, params: Dict[str, Any]) -> AnnIndex:
+    started = time.perf_counter()
+    if params['backend'] == 'faiss':
+        index = FaissIndex.build(store, params)
+    else:
+        index = NumpyIVF.build(store, params['nlist'])
+    logger.info(f"Built {params['backend']} {params['mode']} index over {len(store)} vectors "
+                f"in {time.perf_counter() - started:.1f}s")
+    return index
+
+
+def save(index: AnnIndex, directory: Union[str, Path], params: Dict[str, Any], fingerprint: Optional[str]):
+    """Call under build_lock. Readers see no index until the metadata is written last."""
+    directory = Path(directory)
+    (directory / META_FILE).unlink(missing_ok=True)
+    index.save(directory)
+    save_json(directory / META_FILE, {**params, 'fingerprint': fingerprint})
+
+
+def load(directory: Union[str, Path], store: EmbeddingStore, params: Dict[str, Any],
+         fingerprint: Optional[str]) -> Optional[AnnIndex]:
+    """The persisted index if it was built from the same vectors with the same parameters"""
+    directory = Path(directory)
+    try:
+        with open(directory / META_FILE) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta != {**params, 'fingerprint': fingerprint}:
+        return None
+    try:
+        if params['backend'] == 'faiss':
+            return FaissIndex.load(directory, params['mode'])
+        return NumpyIVF.load(directory, store)
+    except Exception as e:
+        logger.warning(f"Failed to load {params['mode']} index: {e}")
+        return None
+
+
+def recall_at_k(index: Any, exact: EmbeddingStore, queries: np.ndarray, k: int = 10) -> Dict[str, float]:
+    """
+    Recall@k of `index` against the exact scan of `exact` for the given
+    queries, with per-query search latency
+    """
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    _, truth = exact.search(queries, k)
+    # The exact scan returns fewer than k neighbours when the store is smaller than k
+    hits, total, latencies = 0, truth.size, []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(set(found[0].tolist()) & set(expected.tolist()))
+    latencies = np.asarray(latencies)
+    return {
+        'recall': round(hits / total, 4) if total else 0.0,
+        'mean_ms': round(float(latencies.mean()), 3) if latencies.size else 0.0,
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3) if latencies.size else 0.0,
+    }
@@ -0,0 +1,191 @@
+"""
+Batch Scoring Service - Scores a whole cohort of students at once
+
+Per chunk of students: one query for profiles, one grouped query for
+document evidence, one grouped query for completed soft-skill courses,
+profile text features (optionally across worker processes), the
+SS/DS/P/MarketFactor/MetaFactor formulas as NumPy arrays, and one bulk
+insert of CareerScore rows (plus a refresh of those users' progress counters).
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy import case, func, insert
+from sqlalchemy.orm import Session
+from app.models.career_score import CareerScore
+from app.models.course import Course
+from app.models.document import Document
+from app.models.student import Student
+from app.models.user_course import UserCourse
+from app.services.progress_counters import rebuild_counters
+from app.services.scoring_service import (
+    calculate_degree_score, calculate_domain_score, calculate_experience_score,
+    calculate_market_factors, calculate_practical_score, get_target_role_for_profile,
+    profile_completeness, soft_skills_base, target_role_skills,
+)
+
+logger = logging.getLogger(__name__)
+
+# Student columns read by the scoring formulas
+PROFILE_COLUMNS = (
+    'user_id', 'education_level', 'skills', 'interests', 'bio', 'experience_years',
+    'name', 'contact_email', 'career_direction', 'linkedin_url', 'github_url',
+)
+
+# Per-profile text features, in the order _profile_features returns them
+_FEATURES = ('ss_base', 'DS', 'P', 'MarketFactor', 'RD', 'RDf', 'dc_profile', 'D', 'E')
+
+
+def _profile_features(profile_row: Dict) -> tuple:
+    """Text-derived inputs for one profile; top-level so worker processes can run it"""
+    profile = SimpleNamespace(**profile_row)
+    target_role = get_target_role_for_profile(profile)
+    market_factor, role_demand, role_difficulty, _ = calculate_market_factors(profile, target_role)
+    return (
+        soft_skills_base(profile),
+        calculate_domain_score(profile, target_role_skills(target_role)),
+        calculate_practical_score(profile),
+        market_factor,
+        role_demand,
+        role_difficulty,
+        profile_completeness(profile),
+        calculate_degree_score(profile.education_level),
+        calculate_experience_score(profile.experience_years),
+    )
+
+
+def load_profiles(db: Session, user_ids: Optional[Sequence[int]] = None) -> List[Dict]:
+    query = db.query(*[getattr(Student, c) for c in PROFILE_COLUMNS])
+    if user_ids is not None:
+        query = query.filter(Student.user_id.in_(list(user_ids)))
+    return [dict(row._mapping) for row in query.order_by(Student.user_id).all()]
+
+
+def load_document_evidence(db: Session, user_ids: Sequence[int]) -> Dict[int, tuple]:
+    """user_id -> (doc_count, avg_ocr_confidence or None, verified_count)"""
+    rows = db.query(
+        Document.user_id,
+        func.count(Document.id),
+        func.avg(Document.ocr_confidence),
+        func.sum(case((Document.verification_status == 'verified', 1), else_=0)),
+    ).filter(Document.user_id.in_(list(user_ids))).group_by(Document.user_id).all()
+    return {uid: (count, avg, int(verified or 0)) for uid, count, avg, verified in rows}
+
+
+def load_completed_soft_skill_courses(db: Session, user_ids: Sequence[int]) -> Dict[int, int]:
+    rows = db.query(UserCourse.user_id, func.count(UserCourse.id)).join(Course).filter(
+        UserCourse.user_id.in_(list(user_ids)),
+        UserCourse.status == 'completed',
+        Course.category == 'soft_skill'
+    ).group_by(UserCourse.user_id).all()
+    return {uid: count for uid, count in rows}
+
+
+def score_arrays(features: np.ndarray, course_counts: np.ndarray, doc_counts: np.ndarray,
+                 avg_confidence: np.ndarray, verified_counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    The Updated Framework formulas over a whole cohort. avg_confidence is NaN
+    where a student has no OCR confidence yet. Operation order mirrors
+    scoring_service so results match compute_score bit for bit.
+    """
+    f = {name: features[:, i] for i, name in enumerate(_FEATURES)}
+
+    ss = np.clip(np.minimum(0.99, f['ss_base'] + (course_counts / 10) * 0.29), 0.0, 1.0)
+
+    has_conf = (doc_counts > 0) & ~np.isnan(avg_confidence)
+    ec = np.where(has_conf, np.nan_to_num(avg_confidence) + np.where(verified_counts > 0, 0.2, 0.0), 0.5)
+    ec = np.clip(ec, 0.0, 1.0)
+    dc = np.clip(f['dc_profile'] + np.where(doc_counts > 0, 0.2, 0.0), 0.0, 1.0)
+    meta = np.clip((0.8 * ec) + (0.2 * dc), 0.0, 1.0)
+
+    core = (0.60 * ss) + (0.25 * f['DS']) + (0.15 * f['P'])
+    adjusted = core * f['MarketFactor'] * meta
+    final = np.clip(np.round(100 * adjusted), 0, 100).astype(np.int64)
+
+    return {
+        'final': final, 'SS': ss, 'DS': f['DS'], 'P': f['P'], 'MarketFactor': f['MarketFactor'],
+        'MetaFactor': meta, 'RD': f['RD'], 'RDf': f['RDf'], 'EC': ec, 'DC': dc, 'D': f['D'], 'E': f['E'],
+    }
+
+
+def _score_rows(user_ids: List[int], scores: Dict[str, np.ndarray]) -> List[Dict]:
+    """CareerScore rows with the same fields and rounding as persist_score"""
+    rows = []
+    for i, user_id in enumerate(user_ids):
+        v = {k: float(a[i]) for k, a in scores.items() if k != 'final'}
+        rows.append({
+            'user_id': user_id,
+            'total_score': int(scores['final'][i]),
+            'degree_score': round(v['D'], 3),
+            'experience_score': round(v['E'], 3),
+            'skill_coverage_score': round(v['DS'], 3),
+            'certificate_quality_score': 0.0,
+            'practical_evidence_score': round(v['P'], 3),
+            'soft_skills_score': round(v['SS'], 3),
+            'confidence': v['MetaFactor'],
+            'market_factor': round(v['MarketFactor'], 3),
+            'meta_factor': round(v['MetaFactor'], 3),
+            'role_demand': round(v['RD'], 3),
+            'role_difficulty': round(v['RDf'], 3),
+            'evidence_confidence': round(v['EC'], 3),
+            'data_completeness': round(v['DC'], 3),
+        })
+    return rows
+
+
+def score_cohort(db: Session, user_ids: Optional[Sequence[int]] = None, workers: int = 1,
+                 chunk_size: int = 500, persist: bool = True,
+                 progress: Optional[Callable[[int, int], None]] = None) -> Dict[int, int]:
+    """
+    Score every student (or the given user ids) and bulk-insert CareerScore rows.
+    Returns user_id -> final score.
+    """
+    profiles = load_profiles(db, user_ids)
+    total = len(profiles)
+    results: Dict[int, int] = {}
+    if progress:
+        progress(0, total)
+    if not total:
+        return results
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for start in range(0, total, chunk_size):
+            chunk = profiles[start:start + chunk_size]
+            ids = [p['user_id'] for p in chunk]
+
+            evidence = load_document_evidence(db, ids)
+            courses = load_completed_soft_skill_courses(db, ids)
+
+            if executor is not None:
+                per_worker = max(1, len(chunk) // (workers * 4))
+                features = list(executor.map(_profile_features, chunk, chunksize=per_worker))
+            else:
+                features = [_profile_features(p) for p in chunk]
+
+            doc_stats = [evidence.get(uid, (0, None, 0)) for uid in ids]
+            scores = score_arrays(
+                np.asarray(features, dtype=np.float64).reshape(len(chunk), len(_FEATURES)),
+                np.asarray([courses.get(uid, 0) for uid in ids], dtype=np.float64),
+                np.asarray([d[0] for d in doc_stats], dtype=np.int64),
+                np.asarray([np.nan if d[1] is None else d[1] for d in doc_stats], dtype=np.float64),
+                np.asarray([d[2] for d in doc_stats], dtype=np.int64),
+            )
+
+            if persist:
+                db.execute(insert(CareerScore), _score_rows(ids, scores))
+                # Bulk inserts skip the flush hooks, so refresh the chunk's counters here
+                rebuild_counters(db.connection(), ids)
+                db.commit()
+
+            results.update(zip(ids, (int(s) for s in scores['final'])))
+            if progress:
+                progress(len(results), total)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    logger.info(f"Batch scored {len(results)} students")
+    return results
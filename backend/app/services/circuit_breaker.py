@@ -0,0 +1,95 @@
+"""
+Circuit Breaker - Fail fast while a backend is down
+
+closed: calls go through; LLM_BREAKER_FAILURES consecutive failures open
+the breaker. open: calls are rejected immediately until
+LLM_BREAKER_RESET_SECONDS have passed. half_open: one trial call (or a
+health probe) is let through; success closes the breaker, failure opens
+it again. Latencies of successful calls are kept in a sliding window for
+percentiles.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+import numpy as np
+from app.core.config import settings
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, reset_seconds: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.LLM_BREAKER_FAILURES
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.LLM_BREAKER_RESET_SECONDS
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.rejected = 0
+        self._trial_in_flight = False
+        self._latencies: deque = deque(maxlen=settings.LLM_LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now; in half_open only one trial at a time"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def is_available(self) -> bool:
+        """Like allow() but without claiming the half-open trial (for routing decisions)"""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_seconds
+            return self.state == CLOSED or not self._trial_in_flight
+
+    def record_success(self, latency: Optional[float] = None):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+            if latency is not None:
+                self._latencies.append(latency)
+
+    def release(self):
+        """Give back a half-open trial that never reached the backend (e.g. it timed out in the queue)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, error: Any = None, trip: bool = False):
+        """Count a failure; `trip` opens the breaker at once (a failed health probe)"""
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error) if error is not None else None
+            self._trial_in_flight = False
+            if trip or self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = np.asarray(self._latencies, dtype=np.float64) * 1000
+            percentiles = {
+                f'p{p}_ms': round(float(np.percentile(latencies, p)), 1) if latencies.size else None
+                for p in (50, 95, 99)
+            }
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'rejected': self.rejected,
+                'last_error': self.last_error,
+                'open_for_s': round(time.monotonic() - self.opened_at, 1) if self.opened_at is not None else None,
+                'samples': int(latencies.size),
+                **percentiles,
+            }
@@ -1,25 +1,80 @@
+import hashlib
 import os
-from typing import List
+import tempfile
+from typing import List, Tuple
+from fastapi import UploadFile
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.models.document import Document
 from app.core.config import settings
+from app.core.exceptions import FileTooLargeError, ValidationError
+from app.services import progress_counters  # noqa: F401  (keeps user_counters current on document writes)
+
+# Leading bytes each allowed file type must start with
+FILE_SIGNATURES = {
+    '.pdf': (b'%PDF-',),
+    '.jpg': (b'\xff\xd8\xff',),
+    '.jpeg': (b'\xff\xd8\xff',),
+    '.png': (b'\x89PNG\r\n\x1a\n',),
+}
 
 def ensure_upload_dir():
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
-def save_document(db: Session, user_id: int, filename: str, file_bytes: bytes, mime_type: str | None) -> Document:
+def _check_file_type(filename: str) -> str:
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in settings.ALLOWED_FILE_TYPES:
+        raise ValidationError(f"File type '{ext or filename}' is not allowed; allowed: {', '.join(settings.ALLOWED_FILE_TYPES)}")
+    return ext
+
+async def save_upload(db: Session, user_id: int, upload: UploadFile) -> Tuple[Document, str]:
+    """
+    Stream an upload to disk in UPLOAD_CHUNK_SIZE chunks, hashing it on the
+    way. The extension and the leading bytes are checked before anything is
+    kept and the size limit is checked again while copying. By the time
+    this runs Starlette has already spooled the whole upload, so oversized
+    request bodies are refused earlier, by UploadSizeLimitMiddleware; this
+    check only catches a file that is too large on its own. The file only
+    appears under its final name once complete (temp file + rename).
+    Returns (document, SHA-256 hex digest of the content).
+    """
     _ensure_document_column(db)
     ensure_upload_dir()
-    safe_name = f"{user_id}_{filename}"
-    path = os.path.join(settings.UPLOAD_DIR, safe_name)
-    with open(path, "wb") as f:
-        f.write(file_bytes)
-    doc = Document(user_id=user_id, filename=filename, path=path, mime_type=mime_type)
+    filename = os.path.basename(upload.filename or 'upload')
+    ext = _check_file_type(filename)
+    path = os.path.join(settings.UPLOAD_DIR, f"{user_id}_{filename}")
+    
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix='.upload_', suffix=ext)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = await upload.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if size == 0 and ext in FILE_SIGNATURES and not chunk.startswith(FILE_SIGNATURES[ext]):
+                    raise ValidationError(f"File content does not match its '{ext}' extension")
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise FileTooLargeError(settings.MAX_FILE_SIZE)
+                digest.update(chunk)
+                f.write(chunk)
+        if size == 0:
+            raise ValidationError("File is empty")
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    
+    doc = Document(user_id=user_id, filename=filename, path=path, mime_type=upload.content_type)
     db.add(doc)
     db.commit()
     db.refresh(doc)
-    return doc
+    return doc, digest.hexdigest()
 
 def list_documents(db: Session, user_id: int) -> List[Document]:
     return db.query(Document).filter(Document.user_id == user_id).order_by(Document.id.desc()).all()
@@ -27,9 +82,10 @@ def list_documents(db: Session, user_id: int) -> List[Document]:
 def get_document(db: Session, doc_id: int, user_id: int) -> Document | None:
     return db.query(Document).filter(Document.id == doc_id, Document.user_id == user_id).first()
 
-def set_ocr_text(db: Session, doc: Document, text: str, confidence: float | None = None):
+def set_ocr_text(db: Session, doc: Document, text: str, confidence: float | None = None, pages: list | None = None):
     doc.ocr_text = text
     doc.ocr_confidence = confidence
+    doc.ocr_pages = pages
     db.commit()
     db.refresh(doc)
     return doc
@@ -39,5 +95,7 @@ def _ensure_document_column(db: Session):
         names = {c['name'] for c in cols}
         if 'ocr_confidence' not in names:
             db.execute(text('ALTER TABLE documents ADD COLUMN ocr_confidence FLOAT'))
+        if 'ocr_pages' not in names:
+            db.execute(text('ALTER TABLE documents ADD COLUMN ocr_pages JSON'))
     except Exception:
         pass
@@ -0,0 +1,125 @@
+"""
+Embedding Store - Quantized, memory-mapped KB vectors
+
+Vectors are kept as int8 (symmetric, with one float32 scale per vector) or
+float16 in .npy files that every worker process memory-maps, so the OS
+page cache holds a single shared copy instead of a float32 array plus a
+FAISS copy per process. Search is a chunked NumPy matmul that dequantizes
+one block at a time. KB vectors are stored L2-normalized, so the inner
+product of a normalized query is its cosine similarity.
+"""
+from pathlib import Path
+from typing import Tuple, Union
+import numpy as np
+from app.utils.atomic_files import save_array
+
+DTYPES = ('int8', 'float16', 'float32')
+
+CODES_FILE = "store_vectors.npy"
+SCALES_FILE = "store_scales.npy"
+
+# Rows dequantized per step; bounds the float32 scratch space of a search
+_SEARCH_CHUNK = 8192
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(codes, per-vector scales) such that codes * scales ~= vectors"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == 'int8':
+        peak = np.abs(vectors).max(axis=1) if vectors.size else np.zeros(len(vectors), dtype=np.float32)
+        scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    if dtype in ('float16', 'float32'):
+        return vectors.astype(dtype), np.ones(len(vectors), dtype=np.float32)
+    raise ValueError(f"Unsupported embedding store dtype '{dtype}'; use one of {DTYPES}")
+
+
+def l2_normalize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(unit vectors, original L2 norms); all-zero rows stay zero"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+    return vectors / np.where(norms > 0, norms, 1.0)[:, None], norms
+
+
+def _merge_top_k(scores: np.ndarray, idxs: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the k highest scores per row (unordered)"""
+    if scores.shape[1] <= k:
+        return scores, idxs
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, keep, axis=1), np.take_along_axis(idxs, keep, axis=1)
+
+
+class EmbeddingStore:
+    def __init__(self, codes: np.ndarray, scales: np.ndarray):
+        if len(codes) != len(scales):
+            raise ValueError(f"{len(codes)} vectors but {len(scales)} scales")
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def from_vectors(cls, vectors: np.ndarray, dtype: str) -> "EmbeddingStore":
+        return cls(*quantize(vectors, dtype))
+
+    @classmethod
+    def load(cls, directory: Union[str, Path]) -> "EmbeddingStore":
+        """Memory-map a saved store; pages are shared between processes"""
+        directory = Path(directory)
+        return cls(np.load(directory / CODES_FILE, mmap_mode='r'), np.load(directory / SCALES_FILE, mmap_mode='r'))
+
+    @staticmethod
+    def exists(directory: Union[str, Path]) -> bool:
+        directory = Path(directory)
+        return (directory / CODES_FILE).exists() and (directory / SCALES_FILE).exists()
+
+    def save(self, directory: Union[str, Path]):
+        """Write both files via temp file + rename, so workers never map a half-written store"""
+        directory = Path(directory)
+        for name, array in ((CODES_FILE, self.codes), (SCALES_FILE, self.scales)):
+            save_array(directory / name, array)
+
+    @property
+    def dtype(self) -> str:
+        return str(self.codes.dtype)
+
+    @property
+    def dim(self) -> int:
+        return int(self.codes.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + self.scales.nbytes)
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def vectors(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Dequantized float32 copy of rows start:stop"""
+        block = slice(start, stop)
+        return np.asarray(self.codes[block], dtype=np.float32) * np.asarray(self.scales[block])[:, None]
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact inner-product search over the dequantized vectors.
+        Returns (scores, indices), each (n_queries, k), best first.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_idxs = np.empty((len(queries), 0), dtype=np.int64)
+        if k <= 0:
+            return best_scores, best_idxs
+
+        for start in range(0, len(self), _SEARCH_CHUNK):
+            block = np.asarray(self.codes[start:start + _SEARCH_CHUNK], dtype=np.float32)
+            # q . (codes * s) == s * (q . codes): scale the scores, not the block
+            scores = (queries @ block.T) * np.asarray(self.scales[start:start + _SEARCH_CHUNK])
+            idxs = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            best_scores, best_idxs = _merge_top_k(
+                np.concatenate([best_scores, scores], axis=1),
+                np.concatenate([best_idxs, idxs], axis=1),
+                k,
+            )
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_idxs, order, axis=1)
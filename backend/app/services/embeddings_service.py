@@ -1,41 +1,75 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import os
+import json
+import logging
+import time
+import hashlib
+import threading
 import numpy as np
 from pathlib import Path
-from app.services.kb_service import load_kb
+from app.services.kb_service import load_kb, resolve_kb_path, kb_content_hash
+from app.services import model_registry
+from app.services import ann_index
+from app.services.embedding_store import EmbeddingStore, l2_normalize
+from app.utils.atomic_files import file_lock, save_array, save_json
+from app.utils.lazy_import import is_installed, optional_import
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 _kb_texts: Optional[List[str]] = None
-_embeddings: Optional[np.ndarray] = None
-_faiss_index = None
-_faiss_available = False
-_st_available = False
-
-try:
-    import faiss
-    _faiss_available = True
-    print("✅ FAISS available")
-except Exception as e:
-    _faiss_available = False
-    print(f"⚠️ FAISS not available: {e}")
-
-try:
-    from sentence_transformers import SentenceTransformer
-    _st_available = True
-    print("✅ SentenceTransformers available")
-except Exception as e:
-    _st_available = False
-    print(f"⚠️ SentenceTransformers not available: {e}")
-
-# Alternative: Use transformers directly if sentence-transformers fails
-try:
-    from transformers import AutoTokenizer, AutoModel
-    import torch
-    _transformers_available = True
-    print("✅ HuggingFace Transformers available")
-except Exception as e:
-    _transformers_available = False
-    print(f"⚠️ HuggingFace Transformers not available: {e}")
+_store: Optional[EmbeddingStore] = None
+_ann = None  # approximate index over _store for large KBs; None = exact scan
+_rebuild_thread: Optional[threading.Thread] = None
+_rebuild_lock = threading.Lock()
+
+# Resolved from import metadata only; the libraries themselves (and torch)
+# are imported on first use, so importing this module stays cheap
+_st_available = is_installed('sentence_transformers')
+_transformers_available = is_installed('transformers') and is_installed('torch')
+
+def _sentence_transformers():
+    """The sentence_transformers module, or None"""
+    global _st_available
+    module = optional_import('sentence_transformers') if _st_available else None
+    _st_available = module is not None
+    return module
+
+def _hf_transformers():
+    """(transformers, torch) for the raw HuggingFace fallback, or None"""
+    global _transformers_available
+    modules = (optional_import('transformers'), optional_import('torch')) if _transformers_available else (None, None)
+    _transformers_available = None not in modules
+    return modules if _transformers_available else None
+
+META_FILE = "index_meta.json"
+INDEX_LOCK_FILE = "index_build.lock"
+
+FALLBACK_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+
+# Part of the index fingerprint: indexes built before vectors were
+# L2-normalized score by raw inner product and are rebuilt
+SIMILARITY = 'cosine'
+
+def get_sentence_model():
+    """Shared SentenceTransformer instance for this process"""
+    name = getattr(settings, 'EMBEDDING_MODEL', FALLBACK_MODEL)
+    return model_registry.get_model(f"st:{name}", lambda: _sentence_transformers().SentenceTransformer(name))
+
+def get_transformers_model():
+    """Shared (tokenizer, model) pair for the raw HuggingFace fallback"""
+    def load():
+        transformers, _ = _hf_transformers()
+        return (transformers.AutoTokenizer.from_pretrained(FALLBACK_MODEL),
+                transformers.AutoModel.from_pretrained(FALLBACK_MODEL))
+    return model_registry.get_model(f"hf:{FALLBACK_MODEL}", load)
+
+def warmup():
+    """Load the embedding model and run one encode so the first query is fast"""
+    if _sentence_transformers() is not None:
+        get_sentence_model().encode(["warmup"], convert_to_numpy=True, show_progress_bar=False)
+    elif _hf_transformers() is not None:
+        get_transformers_model()
 
 def _row_text(row: Dict) -> str:
     """Extract comprehensive text from row for RAG embedding"""
@@ -81,27 +115,225 @@ def _emb_dir() -> Path:
     p.mkdir(parents=True, exist_ok=True)
     return p
 
-def build_index():
-    global _embeddings, _faiss_index
+def _active_model_name() -> Optional[str]:
+    """Name of the model build_index would use right now"""
+    if _st_available:
+        return getattr(settings, 'EMBEDDING_MODEL', FALLBACK_MODEL)
+    if _transformers_available:
+        return f"hf:{FALLBACK_MODEL}"
+    return None
+
+def index_fingerprint() -> Optional[str]:
+    """Hash of the KB file contents plus the embedding model that indexes it"""
+    kb_path = resolve_kb_path()
+    model_name = _active_model_name()
+    if kb_path is None or model_name is None:
+        return None
+    h = hashlib.sha256(kb_content_hash(kb_path).encode('utf-8'))
+    h.update(model_name.encode('utf-8'))
+    h.update(SIMILARITY.encode('utf-8'))
+    return h.hexdigest()
+
+def _store_dtype() -> str:
+    return getattr(settings, 'EMBEDDING_STORE_DTYPE', 'int8')
+
+def _write_meta(emb_dir: Path, meta: Dict):
+    save_json(emb_dir / META_FILE, meta)
+
+def _save_index(embeddings: np.ndarray, norms: np.ndarray, fingerprint: Optional[str]) -> EmbeddingStore:
+    """
+    Persist the L2-normalized float32 embeddings, their original norms, the
+    quantized store built from them and the fingerprint they were built
+    from. Returns the store, memory-mapped from disk when saving worked.
+    Every file is renamed into place, so workers that have the old ones
+    memory-mapped keep a consistent copy; the metadata is removed first and
+    written last, so no worker loads a half-written index.
+    """
+    store = EmbeddingStore.from_vectors(embeddings, _store_dtype())
+    try:
+        emb_dir = _emb_dir()
+        (emb_dir / META_FILE).unlink(missing_ok=True)
+        # Full precision copy: lets the store be re-quantized without re-encoding the KB
+        save_array(emb_dir / "embeddings.npy", embeddings)
+        # Pre-normalization lengths, kept for diagnostics (normalization drops them)
+        save_array(emb_dir / "embedding_norms.npy", norms)
+        store.save(emb_dir)
+        
+        _write_meta(emb_dir, {
+            'fingerprint': fingerprint,
+            'model': _active_model_name(),
+            'count': int(embeddings.shape[0]),
+            'dim': int(embeddings.shape[1]),
+            'store_dtype': store.dtype,
+            'similarity': SIMILARITY,
+            'created_at': time.time(),
+        })
+        
+        logger.info("Embeddings saved to disk")
+        return EmbeddingStore.load(emb_dir)
+    except Exception as e:
+        logger.warning(f"Failed to save embeddings: {e}")
+        return store
+
+def load_index() -> bool:
+    """
+    Memory-map the persisted embedding store (re-quantizing it from the saved
+    float32 embeddings if the configured dtype changed). Returns False when
+    nothing is saved or the saved index does not match the current KB file /
+    embedding model.
+    """
+    global _store
+    emb_dir = _emb_dir()
+    meta_path = emb_dir / META_FILE
+    emb_path = emb_dir / "embeddings.npy"
+    
+    if not meta_path.exists() or not emb_path.exists():
+        logger.warning("No persisted embedding index found")
+        return False
+    
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        current = index_fingerprint()
+        if current is None or meta.get('fingerprint') != current:
+            logger.warning("Persisted embedding index is stale (KB file or model changed)")
+            return False
+        
+        embeddings = np.load(emb_path, mmap_mode='r')
+        ensure_kb_texts()
+        if embeddings.shape[0] != len(_kb_texts):
+            logger.warning(f"Persisted index has {embeddings.shape[0]} vectors but KB has {len(_kb_texts)} entries")
+            return False
+        
+        if not EmbeddingStore.exists(emb_dir) or meta.get('store_dtype') != _store_dtype():
+            logger.info(f"Quantizing embedding store to {_store_dtype()}")
+            EmbeddingStore.from_vectors(embeddings, _store_dtype()).save(emb_dir)
+            _write_meta(emb_dir, {**meta, 'store_dtype': _store_dtype()})
+        
+        store = EmbeddingStore.load(emb_dir)
+        if len(store) != embeddings.shape[0]:
+            logger.warning(f"Embedding store has {len(store)} vectors but the index has {embeddings.shape[0]}")
+            return False
+        
+        _store = store
+        logger.info(f"Loaded persisted embedding index: {len(store)} x {store.dim} {store.dtype} "
+              f"({store.nbytes / 1e6:.1f} MB, memory-mapped)")
+        # Exact search serves queries until a missing ANN index has been built
+        _prepare_ann(store, current, build_now=False)
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to load persisted embedding index: {e}")
+        return False
+
+def _build_ann(store: EmbeddingStore, params: Dict, fingerprint: Optional[str]):
+    global _ann
+    try:
+        # One worker builds; the others wait and then load its index
+        with ann_index.build_lock(_emb_dir()):
+            index = ann_index.load(_emb_dir(), store, params, fingerprint)
+            if index is None:
+                index = ann_index.build(store, params)
+                ann_index.save(index, _emb_dir(), params, fingerprint)
+        if _store is store:
+            _ann = index
+            logger.info(f"{params['backend']} {params['mode']} index ready")
+    except Exception as e:
+        logger.warning(f"ANN index build failed, using exact search: {e}")
+
+def _prepare_ann(store: EmbeddingStore, fingerprint: Optional[str], build_now: bool):
+    """Use the persisted ANN index for `store` if the KB size calls for one, else build it"""
+    global _ann
+    _ann = None
+    mode = ann_index.choose_mode(len(store))
+    if mode == 'flat':
+        return
+    params = ann_index.build_params(mode, store)
+    index = ann_index.load(_emb_dir(), store, params, fingerprint)
+    if index is not None:
+        _ann = index
+        logger.info(f"Loaded {params['backend']} {mode} index")
+    elif build_now:
+        _build_ann(store, params, fingerprint)
+    else:
+        threading.Thread(target=_build_ann, args=(store, params, fingerprint),
+                         name="ann-index-build", daemon=True).start()
+
+def reset_index():
+    """Forget the loaded KB texts and vectors (after the KB file was replaced)"""
+    global _kb_texts, _store, _ann
+    _kb_texts = None
+    _store = None
+    _ann = None
+
+def index_stats() -> Dict:
+    if _store is None:
+        return {'loaded': False}
+    return {
+        'loaded': True,
+        'vectors': len(_store),
+        'dtype': _store.dtype,
+        'store_mb': round(_store.nbytes / 1e6, 1),
+        'index': _ann.mode if _ann is not None else 'flat',
+        'similarity': SIMILARITY,
+        'rebuilding': is_rebuilding(),
+    }
+
+def rebuild_index_async() -> bool:
+    """Rebuild the index in a background thread; returns False if one is already running"""
+    global _rebuild_thread
+    with _rebuild_lock:
+        if _rebuild_thread is not None and _rebuild_thread.is_alive():
+            return False
+        _rebuild_thread = threading.Thread(target=build_index, name="embedding-index-rebuild", daemon=True)
+        _rebuild_thread.start()
+    return True
+
+def is_rebuilding() -> bool:
+    return _rebuild_thread is not None and _rebuild_thread.is_alive()
+
+def load_or_rebuild_index() -> str:
+    """Startup hook: serve the persisted index if fresh, otherwise rebuild it in the background"""
+    if load_index():
+        return 'loaded'
+    if resolve_kb_path() is None or _active_model_name() is None:
+        return 'unavailable'
+    rebuild_index_async()
+    return 'rebuilding'
+
+def build_index(force: bool = False):
+    """
+    Encode the KB and persist the index. Workers rebuild one at a time: the
+    others wait on the lock and then load the index the first one saved
+    instead of encoding the KB again (unless `force`).
+    """
+    with file_lock(_emb_dir() / INDEX_LOCK_FILE):
+        if not force and load_index():
+            logger.info("Embedding index is already up to date")
+            return
+        _encode_index()
+
+def _encode_index():
+    global _store
     ensure_kb_texts()
     
     if not _kb_texts:
-        print("⚠️ No knowledge base texts available")
+        logger.warning("No knowledge base texts available")
         return
     
-    print(f"🔄 Building embeddings for {len(_kb_texts)} entries...")
+    logger.info(f"Building embeddings for {len(_kb_texts)} entries...")
+    fingerprint = index_fingerprint()
     
     # Try SentenceTransformers first
-    if _st_available:
+    if _sentence_transformers() is not None:
         try:
-            print(f"📊 Using SentenceTransformers model: {settings.EMBEDDING_MODEL}")
-            model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            logger.info(f"Using SentenceTransformers model: {settings.EMBEDDING_MODEL}")
+            model = get_sentence_model()
             
             # Process in batches for large datasets (optimized for 1000+ records)
             batch_size = 50 if len(_kb_texts) > 500 else 100  # Smaller batches for large datasets
             all_embeddings = []
             
-            print(f"📊 Processing {len(_kb_texts)} entries in batches of {batch_size}")
+            logger.info(f"Processing {len(_kb_texts)} entries in batches of {batch_size}")
             
             for i in range(0, len(_kb_texts), batch_size):
                 batch = _kb_texts[i:i + batch_size]
@@ -111,43 +343,25 @@ def build_index():
                 batch_num = i//batch_size + 1
                 total_batches = (len(_kb_texts) + batch_size - 1)//batch_size
                 progress = (batch_num / total_batches) * 100
-                print(f"✅ Processed batch {batch_num}/{total_batches} ({progress:.1f}%)")
+                logger.info(f"Processed batch {batch_num}/{total_batches} ({progress:.1f}%)")
             
-            _embeddings = np.vstack(all_embeddings)
-            print(f"💾 Saved embeddings: {_embeddings.shape}")
+            embeddings, norms = l2_normalize(np.vstack(all_embeddings))
             
-            # Build FAISS index if available
-            if _faiss_available:
-                try:
-                    _faiss_index = faiss.IndexFlatIP(_embeddings.shape[1])
-                    _faiss_index.add(_embeddings.astype('float32'))
-                    print(f"🔍 FAISS index built with {_embeddings.shape[0]} vectors")
-                except Exception as e:
-                    print(f"⚠️ FAISS index creation failed: {e}")
-            
-            # Save to disk
-            try:
-                emb_dir = _emb_dir()
-                emb_dir.mkdir(parents=True, exist_ok=True)
-                np.save(emb_dir / "embeddings.npy", _embeddings)
-                
-                if _faiss_available and _faiss_index:
-                    faiss.write_index(_faiss_index, str(emb_dir / "faiss_index.bin"))
-                
-                print("✅ Embeddings saved to disk")
-            except Exception as e:
-                print(f"⚠️ Failed to save embeddings: {e}")
+            # Quantize, save and serve from the shared memory-mapped store
+            _store = _save_index(embeddings, norms, fingerprint)
+            logger.info(f"Embedding store ready: {len(_store)} x {_store.dim} {_store.dtype}")
+            _prepare_ann(_store, fingerprint, build_now=True)
             
         except Exception as e:
-            print(f"❌ SentenceTransformers failed: {e}")
-            _embeddings = None
+            logger.error(f"SentenceTransformers failed: {e}")
+            _store = None
     
     # Fallback to HuggingFace Transformers
-    elif _transformers_available:
+    elif _hf_transformers() is not None:
         try:
-            print("📊 Using HuggingFace Transformers as fallback")
-            tokenizer = AutoTokenizer.from_pretrained('sentence-transformers/all-MiniLM-L6-v2')
-            model = AutoModel.from_pretrained('sentence-transformers/all-MiniLM-L6-v2')
+            logger.info("Using HuggingFace Transformers as fallback")
+            _, torch = _hf_transformers()
+            tokenizer, model = get_transformers_model()
             
             all_embeddings = []
             batch_size = 50  # Smaller batches for raw transformers
@@ -160,44 +374,29 @@ def build_index():
                 
                 with torch.no_grad():
                     outputs = model(**inputs)
-                    # Use mean pooling
-                    embeddings = outputs.last_hidden_state.mean(dim=1).numpy()
-                    all_embeddings.append(embeddings)
+                    all_embeddings.append(_mean_pool(outputs.last_hidden_state, inputs['attention_mask']))
                 
-                print(f"✅ Processed batch {i//batch_size + 1}/{(len(_kb_texts) + batch_size - 1)//batch_size}")
+                logger.info(f"Processed batch {i//batch_size + 1}/{(len(_kb_texts) + batch_size - 1)//batch_size}")
             
-            _embeddings = np.vstack(all_embeddings)
-            print(f"💾 Saved embeddings: {_embeddings.shape}")
+            embeddings, norms = l2_normalize(np.vstack(all_embeddings))
             
-            # Build FAISS index if available
-            if _faiss_available:
-                try:
-                    _faiss_index = faiss.IndexFlatIP(_embeddings.shape[1])
-                    _faiss_index.add(_embeddings.astype('float32'))
-                    print(f"🔍 FAISS index built with {_embeddings.shape[0]} vectors")
-                except Exception as e:
-                    print(f"⚠️ FAISS index creation failed: {e}")
-            
-            # Save to disk
-            try:
-                emb_dir = _emb_dir()
-                emb_dir.mkdir(parents=True, exist_ok=True)
-                np.save(emb_dir / "embeddings.npy", _embeddings)
-                
-                if _faiss_available and _faiss_index:
-                    faiss.write_index(_faiss_index, str(emb_dir / "faiss_index.bin"))
-                
-                print("✅ Embeddings saved to disk")
-            except Exception as e:
-                print(f"⚠️ Failed to save embeddings: {e}")
+            # Quantize, save and serve from the shared memory-mapped store
+            _store = _save_index(embeddings, norms, fingerprint)
+            logger.info(f"Embedding store ready: {len(_store)} x {_store.dim} {_store.dtype}")
+            _prepare_ann(_store, fingerprint, build_now=True)
             
         except Exception as e:
-            print(f"❌ HuggingFace Transformers failed: {e}")
-            _embeddings = None
+            logger.error(f"HuggingFace Transformers failed: {e}")
+            _store = None
     
     else:
-        print("❌ No embedding models available")
-        _embeddings = None
+        logger.error("No embedding models available")
+        _store = None
+
+def _mean_pool(hidden, attention_mask) -> np.ndarray:
+    """Mean over real tokens only; padding would otherwise dilute shorter texts"""
+    mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+    return ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)).numpy()
 
 def naive_similarity(a: str, b: str) -> float:
     sa = set(a.split())
@@ -205,14 +404,32 @@ def naive_similarity(a: str, b: str) -> float:
     inter = len(sa & sb)
     return inter / max(1, len(sa))
 
-def top_k(query: str, k: int = 5) -> List[int]:
+def _encode_query(query: str) -> np.ndarray:
+    qv = get_sentence_model().encode([query], convert_to_numpy=True, show_progress_bar=False)
+    return l2_normalize(qv)[0]
+
+def _apply_threshold(hits: List[Tuple[int, float]], min_score: Optional[float], keep: int) -> List[Tuple[int, float]]:
+    """Drop hits scoring below min_score, but never fewer than the best `keep`"""
+    if min_score is None:
+        return hits
+    return [hit for rank, hit in enumerate(hits) if rank < keep or hit[1] >= min_score]
+
+def search(query: str, k: int = 5, min_score: Optional[float] = None, keep: int = 0) -> List[Tuple[int, float]]:
+    """
+    Best-first (KB row, cosine similarity) pairs for the query. Hits below
+    min_score are dropped, except the best `keep`. The word-overlap fallback
+    is not on the cosine scale, so it is never cut off.
+    """
     ensure_kb_texts()
-    if _faiss_index is not None and _embeddings is not None and _st_available:
-        model = SentenceTransformer(getattr(settings, 'EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'))
-        qv = model.encode([query], convert_to_numpy=True).astype('float32')
-        scores, idxs = _faiss_index.search(qv, k)
-        return list(idxs[0])
+    if _store is not None and _sentence_transformers() is not None:
+        index = _ann if _ann is not None else _store
+        scores, idxs = index.search(_encode_query(query)[None, :], k)
+        hits = [(int(i), float(s)) for i, s in zip(idxs[0], scores[0]) if i >= 0]
+        return _apply_threshold(hits, min_score, keep)
     q = query.lower()
     sims = [(i, naive_similarity(q, _kb_texts[i])) for i in range(len(_kb_texts))]
     sims.sort(key=lambda x: x[1], reverse=True)
-    return [i for i, _ in sims[:k]]
+    return sims[:k]
+
+def top_k(query: str, k: int = 5) -> List[int]:
+    return [i for i, _ in search(query, k)]
@@ -1,226 +1,91 @@
-from typing import List, Dict, Optional
+from typing import AsyncIterator, Callable, Iterator, List, Dict, NamedTuple, Optional
+import itertools
 import os
 import json
 import logging
-import requests
+import time
 from app.core.config import settings
+from app.services import llm_cache, llm_client, llm_health
 
 logger = logging.getLogger(__name__)
 
 _openai_available = False
-_ollama_available = False
-_client = None
-
-# Try to initialize OpenAI client
-try:
-    from openai import OpenAI
-    api_key = settings.GPT5_API_KEY or os.getenv('OPENAI_API_KEY')
-    if api_key:
-        _client = OpenAI(api_key=api_key)
-        _openai_available = True
-        logger.info("OpenAI client initialized successfully")
-    else:
-        logger.info("No OpenAI API key found. Will try Ollama.")
-except Exception as e:
-    logger.info(f"OpenAI not available: {e}")
-    _openai_available = False
-
-# Try to connect to Ollama
-def check_ollama_connection():
-    """Check if Ollama is running and available"""
-    try:
-        ollama_url = os.getenv('OLLAMA_URL', 'http://localhost:11434')
-        response = requests.get(f"{ollama_url}/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            if models:
-                logger.info(f"Ollama connected successfully. Available models: {[m['name'] for m in models[:3]]}")
-                return True, models
-        return False, []
-    except Exception as e:
-        logger.info(f"Ollama not available: {e}")
-        return False, []
 
-_ollama_available, _ollama_models = check_ollama_connection()
+# OpenAI is called through the pooled LLM client; it only needs an API key
+api_key = settings.GPT5_API_KEY or os.getenv('OPENAI_API_KEY')
+if api_key:
+    _openai_available = True
+    logger.info("OpenAI API key found")
+else:
+    logger.info("No OpenAI API key found. Will try Ollama.")
+
+def ollama_available() -> bool:
+    """Whether Ollama is up, per the background health prober and its circuit breaker"""
+    return llm_health.is_available('ollama')
+
+def openai_available() -> bool:
+    """Whether OpenAI is configured and its circuit breaker lets calls through"""
+    return _openai_available and llm_health.is_available('openai')
+
+def await_backend():
+    """
+    When every backend is down, hold the request for up to
+    LLM_UNAVAILABLE_WAIT seconds for one to recover (0 = fail fast)
+    """
+    if settings.LLM_UNAVAILABLE_WAIT <= 0 or ollama_available() or openai_available():
+        return
+    logger.info(f"No LLM backend available; waiting up to {settings.LLM_UNAVAILABLE_WAIT}s for one to recover")
+    llm_health.wait_for_backend(llm_health.configured_backends(), settings.LLM_UNAVAILABLE_WAIT)
+
+OLLAMA_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "num_predict": 1000  # Use num_predict instead of max_tokens for Ollama
+}
 
 def call_ollama(prompt: str, model: str = None) -> str:
     """Call Ollama API for text generation"""
+    # Use specified model or default
+    if not model:
+        model = os.getenv('OLLAMA_MODEL', 'qwen2.5:1.5b')
+    
+    logger.info(f"Calling Ollama with model: {model}")
+    
+    options = OLLAMA_OPTIONS
+    
     try:
-        ollama_url = os.getenv('OLLAMA_URL', 'http://localhost:11434')
-        
-        # Use specified model or default
-        if not model:
-            model = os.getenv('OLLAMA_MODEL', 'qwen2.5:1.5b')
-        
-        logger.info(f"Calling Ollama with model: {model}")
-        
-        payload = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "num_predict": 1000  # Use num_predict instead of max_tokens for Ollama
-            }
-        }
-        
-        response = requests.post(
-            f"{ollama_url}/api/generate",
-            json=payload,
-            timeout=120,  # Increased timeout for AI processing
-            headers={'Content-Type': 'application/json'}
-        )
-        
-        logger.info(f"Ollama response status: {response.status_code}")
-        
-        if response.status_code == 200:
-            result = response.json()
-            response_text = result.get('response', '').strip()
-            logger.info(f"Ollama response length: {len(response_text)} characters")
-            return response_text
-        else:
-            logger.error(f"Ollama API error: {response.status_code} - {response.text}")
-            raise Exception(f"Ollama API returned status {response.status_code}")
-            
-    except requests.exceptions.Timeout:
-        logger.error("Ollama request timed out")
-        raise Exception("Ollama request timed out")
-    except requests.exceptions.ConnectionError:
-        logger.error("Failed to connect to Ollama")
-        raise Exception("Failed to connect to Ollama - is it running?")
+        response_text = llm_client.run(llm_client.ollama_generate_async(prompt, model, options))
+        logger.info(f"Ollama response length: {len(response_text)} characters")
+        return response_text
     except Exception as e:
         logger.error(f"Error calling Ollama: {e}")
         raise Exception(f"Ollama error: {str(e)}")
 
-def create_career_prompt(profile: Dict, roles: List[Dict]) -> str:
-    """Create a structured prompt for career recommendations"""
-    
-    prompt = f"""
-You are a professional career advisor AI. Based on the student profile and available job roles, provide personalized career guidance.
-
-STUDENT PROFILE:
-- Skills: {profile.get('skills', 'Not specified')}
-- Interests: {profile.get('interests', 'Not specified')}
-- Education: {profile.get('education_level', 'Not specified')}
-- Bio: {profile.get('bio', 'Not specified')}
+def openai_model() -> str:
+    return settings.GPT5_MODEL if settings.GPT5_MODEL != 'gpt-5' else 'gpt-4'
 
-AVAILABLE JOB ROLES:
-"""
-    
-    for i, role in enumerate(roles[:5], 1):
-        prompt += f"""
-{i}. {role.get('job_role', 'Unknown Role')}
-   - Level: {role.get('level', 'Not specified')}
-   - Technical Skills: {role.get('technical_skills', 'Not specified')}
-   - Soft Skills: {role.get('soft_skills', 'Not specified')}
-   - Salary: {role.get('average_salary', 'Not specified')}
-   - Description: {role.get('description', 'Not specified')}
-"""
-
-    prompt += """
-
-TASK:
-Provide a JSON response with the following structure:
-{
-    "recommended_roles": [
-        {
-            "role_name": "Role Name",
-            "match_percentage": 85,
-            "reasoning": "Why this role fits the student"
-        }
-    ],
-    "skills_to_develop": [
-        {
-            "skill": "Skill Name",
-            "priority": "High/Medium/Low",
-            "reasoning": "Why this skill is important"
-        }
-    ],
-    "career_path": "A brief 2-3 sentence career path recommendation",
-    "next_steps": ["Specific actionable step 1", "Specific actionable step 2"],
-    "market_insights": "Brief market outlook for recommended roles"
-}
+def call_openai(messages: List[Dict[str, str]], max_tokens: int = 2000, temperature: float = 0.7) -> str:
+    """Call the OpenAI chat completions API through the pooled client"""
+    model = openai_model()
+    return llm_client.run(llm_client.openai_chat_async(messages, model, max_tokens=max_tokens, temperature=temperature))
 
-Focus on:
-1. Realistic role matches based on current skills
-2. Specific, actionable skill development recommendations
-3. Clear reasoning for each recommendation
-4. Market-relevant insights
-"""
-    
-    return prompt
+def llm_cache_keys(prompt: str, model: str, options: Dict, profile: Dict, roles: List[Dict]):
+    """(exact key, near-duplicate key or None) for a guidance completion"""
+    key = llm_cache.prompt_key(prompt, model, options)
+    near_key = None
+    if settings.LLM_CACHE_NEAR_DUPLICATE and profile.get('skills'):
+        role_names = [role.get('job_role', '') for role in roles[:8]]
+        near_key = llm_cache.skill_set_key(profile.get('skills', ''), role_names, model, options)
+    return key, near_key
 
-def parse_gpt_response(content: str) -> Dict:
-    """Parse GPT response and extract structured data"""
-    try:
-        # Try to parse as JSON first
-        if content.strip().startswith('{'):
-            return json.loads(content)
-        
-        # Fallback: extract information using text parsing
-        lines = content.split('\n')
-        result = {
-            'recommended_roles': [],
-            'skills_to_develop': [],
-            'career_path': '',
-            'next_steps': [],
-            'market_insights': ''
-        }
-        
-        current_section = None
-        for line in lines:
-            line = line.strip()
-            if 'recommended' in line.lower() and 'role' in line.lower():
-                current_section = 'roles'
-            elif 'skill' in line.lower() and ('develop' in line.lower() or 'learn' in line.lower()):
-                current_section = 'skills'
-            elif 'career path' in line.lower():
-                current_section = 'path'
-            elif 'next step' in line.lower():
-                current_section = 'steps'
-            elif 'market' in line.lower():
-                current_section = 'market'
-            elif line and current_section:
-                if current_section == 'roles' and line.startswith(('-', '*', '•')):
-                    role_name = line.lstrip('-*•').strip()
-                    result['recommended_roles'].append({
-                        'role_name': role_name,
-                        'match_percentage': 75,
-                        'reasoning': 'Based on profile analysis'
-                    })
-                elif current_section == 'skills' and line.startswith(('-', '*', '•')):
-                    skill_name = line.lstrip('-*•').strip()
-                    result['skills_to_develop'].append({
-                        'skill': skill_name,
-                        'priority': 'Medium',
-                        'reasoning': 'Important for career growth'
-                    })
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error parsing GPT response: {e}")
-        return {
-            'recommended_roles': [{'role_name': 'Software Developer', 'match_percentage': 70, 'reasoning': 'General recommendation'}],
-            'skills_to_develop': [{'skill': 'Programming', 'priority': 'High', 'reasoning': 'Essential skill'}],
-            'career_path': 'Focus on building technical skills and gaining practical experience.',
-            'next_steps': ['Complete online courses', 'Build portfolio projects'],
-            'market_insights': 'Technology sector continues to show strong growth.'
-        }
+def cached_llm_call(generate, prompt: str, model: str, options: Dict, profile: Dict, roles: List[Dict]) -> str:
+    """Run `generate` through the LLM response cache for this prompt/model/options"""
+    key, near_key = llm_cache_keys(prompt, model, options, profile, roles)
+    return llm_cache.cached_completion(generate, model, key, near_key)
 
-def summarize(profile: Dict, roles: List[Dict]) -> Dict:
-    """Generate AI-powered career recommendations using Ollama or OpenAI - AI ONLY, NO FALLBACKS"""
-    
-    # Create the career guidance prompt
-    prompt = create_career_prompt(profile, roles)
-    
-    # Try Ollama first (local LLM)
-    if _ollama_available:
-        logger.info("Using Ollama for career recommendations")
-        try:
-            # Create a comprehensive prompt for Ollama
-            ollama_prompt = f"""You are an expert career advisor with deep knowledge of technology, business, and emerging career paths. Analyze this student profile and provide detailed, personalized career guidance.
+def create_guidance_prompt(profile: Dict, roles: List[Dict]) -> str:
+    """Section-formatted guidance prompt, parsed line by line by GuidanceParser"""
+    return f"""You are an expert career advisor with deep knowledge of technology, business, and emerging career paths. Analyze this student profile and provide detailed, personalized career guidance.
 
 STUDENT PROFILE:
 - Skills: {profile.get('skills', 'Not specified')}
@@ -259,110 +124,150 @@ PROVIDE DETAILED ANALYSIS:
 
 Format your response with clear sections and bullet points. Be specific and actionable."""
 
-            response = call_ollama(ollama_prompt, model=settings.OLLAMA_MODEL)
-            
-            if response and response.strip():
-                # Parse Ollama response
-                parsed = parse_ollama_response(response, roles)
-                logger.info("Successfully generated Ollama career recommendations")
-                return parsed
-            else:
-                logger.error("Ollama returned empty response")
-                raise Exception("Ollama failed to generate response")
-                
-        except Exception as e:
-            logger.error(f"Error with Ollama: {e}")
-            if not _openai_available:
-                raise Exception("AI service unavailable: Ollama failed and OpenAI not configured")
+GUIDANCE_SYSTEM_PROMPT = "You are an expert career advisor. Answer using the numbered sections and bullet points requested."
+
+OPENAI_OPTIONS = {"max_tokens": 2000, "temperature": 0.7}
+
+UNAVAILABLE_MESSAGE = "AI service unavailable: Neither Ollama nor OpenAI is configured and working. Please set up at least one AI service."
+
+class GuidanceBackend(NamedTuple):
+    """
+    How one backend is asked for guidance. summarize() and stream_guidance()
+    both use these, so a backend gets the same prompt, cache key and parser
+    whether its answer is streamed or not.
+    """
+    name: str
+    model: str
+    options: Dict
+    cache_text: str  # what the response cache key is built from
+    complete: Callable[[], str]
+    stream: Callable[[], AsyncIterator[str]]
+
+def guidance_backends(profile: Dict, roles: List[Dict]) -> List[GuidanceBackend]:
+    """Available backends in preference order: Ollama (local), then OpenAI"""
+    prompt = create_guidance_prompt(profile, roles)
+    backends = []
+    if ollama_available():
+        ollama_model = settings.OLLAMA_MODEL
+        backends.append(GuidanceBackend(
+            'ollama', ollama_model, OLLAMA_OPTIONS, prompt,
+            lambda: call_ollama(prompt, model=ollama_model),
+            lambda: llm_client.ollama_generate_stream(prompt, ollama_model, OLLAMA_OPTIONS),
+        ))
+    if openai_available():
+        gpt_model = openai_model()
+        messages = [{"role": "system", "content": GUIDANCE_SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+        backends.append(GuidanceBackend(
+            'openai', gpt_model, OPENAI_OPTIONS, json.dumps(messages),
+            lambda: call_openai(messages, **OPENAI_OPTIONS),
+            lambda: llm_client.openai_chat_stream(messages, gpt_model, **OPENAI_OPTIONS),
+        ))
+    return backends
+
+def summarize(profile: Dict, roles: List[Dict]) -> Dict:
+    """Generate AI-powered career recommendations using Ollama or OpenAI - AI ONLY, NO FALLBACKS"""
+    await_backend()
+    backends = guidance_backends(profile, roles)
+    if not backends:
+        raise Exception(UNAVAILABLE_MESSAGE)
     
-    # Try OpenAI if Ollama fails
-    if _openai_available and _client:
-        logger.info("Using OpenAI for career recommendations")
+    errors = []
+    for backend in backends:
+        logger.info(f"Using {backend.name} for career recommendations")
         try:
-            response = _client.chat.completions.create(
-                model=settings.GPT5_MODEL if settings.GPT5_MODEL != 'gpt-5' else 'gpt-4',
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert career advisor with deep knowledge of the job market, skills requirements, and career development paths. Provide specific, actionable, and realistic career guidance. Always provide detailed, personalized recommendations."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=2000,
-                temperature=0.7
-            )
-            
-            content = response.choices[0].message.content
-            logger.info("Successfully generated OpenAI career recommendations")
-            
-            # Parse the structured response
-            structured_response = parse_gpt_response(content)
-            
-            # Convert to expected format
-            return {
-                'job_roles': [role['role_name'] for role in structured_response.get('recommended_roles', [])],
-                'skills_to_learn': [skill['skill'] for skill in structured_response.get('skills_to_develop', [])],
-                'references': [r.get('sources', '') for r in roles if r.get('sources')],
-                'career_path': structured_response.get('career_path', ''),
-                'next_steps': structured_response.get('next_steps', []),
-                'market_insights': structured_response.get('market_insights', ''),
-                'detailed_recommendations': structured_response.get('recommended_roles', []),
-                'detailed_skills': structured_response.get('skills_to_develop', [])
-            }
-            
+            response = cached_llm_call(backend.complete, backend.cache_text, backend.model, backend.options,
+                                       profile, roles)
+            if not response or not response.strip():
+                raise Exception(f"{backend.name} returned empty response")
+            parsed = parse_guidance_response(response, roles)
+            logger.info(f"Successfully generated {backend.name} career recommendations")
+            return parsed
         except Exception as e:
-            logger.error(f"Error calling OpenAI API: {e}")
-            raise Exception(f"OpenAI API failed: {e}")
+            logger.error(f"Error with {backend.name}: {e}")
+            errors.append(f"{backend.name}: {e}")
     
-    # NO FALLBACKS - Raise error if AI is not available
-    raise Exception("AI service unavailable: Neither Ollama nor OpenAI is configured and working. Please set up at least one AI service.")
+    raise Exception(f"AI service unavailable: {'; '.join(errors)}")
 
-def parse_ollama_response(response: str, roles: List[Dict]) -> Dict:
-    """Parse Ollama response into structured format"""
-    try:
-        lines = response.split('\n')
-        job_roles = []
-        skills_to_learn = []
-        career_path = ""
-        next_steps = []
-        
-        current_section = None
-        
+class GuidanceParser:
+    """
+    Incremental parser for section-formatted guidance text. Feed it text as
+    it streams in; every completed line is classified and each extracted
+    item is returned as a (field, value) event.
+    """
+
+    def __init__(self):
+        self.job_roles: List[str] = []
+        self.skills_to_learn: List[str] = []
+        self.career_path = ""
+        self.next_steps: List[str] = []
+        self.current_section = None
+        self.text = ""
+        self._pending = ""
+
+    def feed(self, chunk: str) -> List[tuple]:
+        self.text += chunk
+        self._pending += chunk
+        *lines, self._pending = self._pending.split('\n')
+        events = []
         for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Detect sections
-            if any(keyword in line.lower() for keyword in ['recommended', 'job role', 'roles']):
-                current_section = 'roles'
-                continue
-            elif any(keyword in line.lower() for keyword in ['skill', 'learn']):
-                current_section = 'skills'
-                continue
-            elif any(keyword in line.lower() for keyword in ['career path', 'advice']):
-                current_section = 'path'
-                continue
-            elif any(keyword in line.lower() for keyword in ['next step', 'steps']):
-                current_section = 'steps'
-                continue
+            event = self.feed_line(line)
+            if event:
+                events.append(event)
+        return events
+
+    def close(self) -> List[tuple]:
+        line, self._pending = self._pending, ""
+        event = self.feed_line(line)
+        return [event] if event else []
+
+    def feed_line(self, line: str) -> Optional[tuple]:
+        line = line.strip()
+        if not line:
+            return None
             
-            # Extract content based on section
-            if current_section == 'roles' and (line.startswith(('-', '*', '•')) or line[0].isdigit()):
-                role = line.lstrip('-*•0123456789. ').strip()
-                if role and len(role) > 3:
-                    job_roles.append(role)
-            elif current_section == 'skills' and (line.startswith(('-', '*', '•')) or line[0].isdigit()):
-                skill = line.lstrip('-*•0123456789. ').strip()
-                if skill and len(skill) > 2:
-                    skills_to_learn.append(skill)
-            elif current_section == 'path' and len(line) > 20:
-                career_path += line + " "
-            elif current_section == 'steps' and (line.startswith(('-', '*', '•')) or line[0].isdigit()):
-                step = line.lstrip('-*•0123456789. ').strip()
-                if step and len(step) > 5:
-                    next_steps.append(step)
+        # Detect sections
+        if any(keyword in line.lower() for keyword in ['recommended', 'job role', 'roles']):
+            self.current_section = 'roles'
+            return None
+        elif any(keyword in line.lower() for keyword in ['skill', 'learn']):
+            self.current_section = 'skills'
+            return None
+        elif any(keyword in line.lower() for keyword in ['career path', 'advice']):
+            self.current_section = 'path'
+            return None
+        elif any(keyword in line.lower() for keyword in ['next step', 'steps']):
+            self.current_section = 'steps'
+            return None
         
+        # Extract content based on section
+        current_section = self.current_section
+        if current_section == 'roles' and (line.startswith(('-', '*', '•')) or line[0].isdigit()):
+            role = line.lstrip('-*•0123456789. ').strip()
+            if role and len(role) > 3:
+                self.job_roles.append(role)
+                return ('job_roles', role)
+        elif current_section == 'skills' and (line.startswith(('-', '*', '•')) or line[0].isdigit()):
+            skill = line.lstrip('-*•0123456789. ').strip()
+            if skill and len(skill) > 2:
+                self.skills_to_learn.append(skill)
+                return ('skills_to_learn', skill)
+        elif current_section == 'path' and len(line) > 20:
+            self.career_path += line + " "
+            return ('career_path', line)
+        elif current_section == 'steps' and (line.startswith(('-', '*', '•')) or line[0].isdigit()):
+            step = line.lstrip('-*•0123456789. ').strip()
+            if step and len(step) > 5:
+                self.next_steps.append(step)
+                return ('next_steps', step)
+        return None
+
+    def result(self, roles: List[Dict]) -> Dict:
+        response = self.text
+        job_roles = self.job_roles
+        skills_to_learn = self.skills_to_learn
+        career_path = self.career_path
+        next_steps = self.next_steps
+
         # Fallback extraction if sections weren't detected properly
         if not job_roles:
             # Extract job roles from available roles that appear in response
@@ -390,10 +295,68 @@ def parse_ollama_response(response: str, roles: List[Dict]) -> Dict:
             'next_steps': next_steps[:5] if next_steps else [],
             'market_insights': 'AI-generated market insights based on current industry trends and student profile.'
         }
+
+def parse_guidance_response(response: str, roles: List[Dict]) -> Dict:
+    """Parse a section-formatted guidance response into structured format"""
+    try:
+        parser = GuidanceParser()
+        parser.feed(response)
+        parser.close()
+        return parser.result(roles)
         
     except Exception as e:
-        logger.error(f"Error parsing Ollama response: {e}")
+        logger.error(f"Error parsing guidance response: {e}")
         raise Exception(f"Failed to parse AI response: {e}")
 
-# Fallback function removed - AI ONLY system
+def stream_guidance(profile: Dict, roles: List[Dict]) -> Iterator[tuple]:
+    """
+    Stream career guidance as (event, data) pairs: 'start' once the first
+    token has arrived, then 'token' and 'section' events as the model
+    generates, then 'done' with the same structure summarize() returns. A
+    backend that fails before its first token falls through to the next
+    one. The finished completion is stored under the cache key summarize()
+    uses for that backend, so either path can serve the other's result;
+    the raw text is what is cached, and the structure is re-parsed from it
+    on a hit (the parser is deterministic, so this yields the same result).
+    """
+    await_backend()
+    backends = guidance_backends(profile, roles)
+    if not backends:
+        raise Exception(UNAVAILABLE_MESSAGE)
+
+    for position, backend in enumerate(backends):
+        key, near_key = llm_cache_keys(backend.cache_text, backend.model, backend.options, profile, roles)
+        cached = llm_cache.lookup(key, near_key) if settings.LLM_CACHE_ENABLED else None
+        started = time.perf_counter()
+        if cached is not None:
+            chunks = iter([cached])
+        else:
+            chunks = llm_client.iterate(backend.stream())
+            try:
+                first = next(chunks, None)
+                if first is None:
+                    raise Exception(f"{backend.name} returned empty response")
+            except Exception as e:
+                if position == len(backends) - 1:
+                    raise
+                logger.warning(f"{backend.name} failed before streaming, trying {backends[position + 1].name}: {e}")
+                continue
+            chunks = itertools.chain([first], chunks)
+        break
+
+    yield 'start', {'backend': backend.name, 'model': backend.model, 'cached': cached is not None}
+
+    parser = GuidanceParser()
+    for chunk in chunks:
+        yield 'token', {'text': chunk}
+        for field, value in parser.feed(chunk):
+            yield 'section', {'field': field, 'value': value}
+    for field, value in parser.close():
+        yield 'section', {'field': field, 'value': value}
 
+    if not parser.text.strip():
+        raise Exception(f"{backend.name} returned empty response")
+    result = parser.result(roles)
+    if cached is None and settings.LLM_CACHE_ENABLED:
+        llm_cache.store(parser.text.strip(), backend.model, time.perf_counter() - started, key, near_key)
+    yield 'done', result
@@ -1,17 +1,42 @@
 """
 Journey Service - Manages user journey stages and progress tracking
 """
+from sqlalchemy import exists, func, select
 from sqlalchemy.orm import Session
 from app.models.student import Student
 from app.models.document import Document
 from app.models.career_score import CareerScore
-from typing import Tuple, List, Dict
+from app.services.progress_counters import get_counters
+from typing import NamedTuple, Optional, Tuple, List, Dict
 
-def calculate_completion_percentage(db: Session, student: Student) -> float:
+class JourneySnapshot(NamedTuple):
+    """Per-user evidence the journey rules depend on, loaded once per request"""
+    doc_count: int
+    has_score: bool
+
+
+def load_journey_snapshot(db: Session, user_id: int) -> JourneySnapshot:
+    """Document count and score existence in a single round-trip"""
+    counters = get_counters(db, user_id)
+    if counters is not None:
+        return JourneySnapshot(doc_count=counters.doc_count, has_score=counters.latest_score_id is not None)
+    
+    doc_count = (
+        select(func.count(Document.id))
+        .where(Document.user_id == user_id)
+        .scalar_subquery()
+    )
+    has_score = exists().where(CareerScore.user_id == user_id)
+    row = db.execute(select(doc_count, has_score)).one()
+    return JourneySnapshot(doc_count=row[0] or 0, has_score=bool(row[1]))
+
+
+def calculate_completion_percentage(db: Session, student: Student, snapshot: Optional[JourneySnapshot] = None) -> float:
     """
     Calculate overall profile completion percentage (0-100)
     Based on: profile fields, documents uploaded, score generated
     """
+    snapshot = snapshot or load_journey_snapshot(db, student.user_id)
     completion = 0.0
     total_weight = 100.0
     
@@ -37,7 +62,7 @@ def calculate_completion_percentage(db: Session, student: Student) -> float:
             completion += weight
     
     # Documents uploaded (20% weight)
-    doc_count = db.query(Document).filter(Document.user_id == student.user_id).count()
+    doc_count = snapshot.doc_count
     if doc_count >= 1:
         completion += 5
     if doc_count >= 2:
@@ -48,14 +73,13 @@ def calculate_completion_percentage(db: Session, student: Student) -> float:
         completion += 5
     
     # Career score generated (20% weight)
-    score_exists = db.query(CareerScore).filter(CareerScore.user_id == student.user_id).first()
-    if score_exists:
+    if snapshot.has_score:
         completion += 20
     
     return min(completion, 100.0)
 
 
-def get_current_stage(db: Session, student: Student) -> int:
+def get_current_stage(db: Session, student: Student, snapshot: Optional[JourneySnapshot] = None) -> int:
     """
     Determine current journey stage (1-5) based on completion criteria
     Stage 1: Profile Onboarding
@@ -64,6 +88,8 @@ def get_current_stage(db: Session, student: Student) -> int:
     Stage 4: Pathway Navigation
     Stage 5: Improvement Actions
     """
+    snapshot = snapshot or load_journey_snapshot(db, student.user_id)
+    
     # Stage 1: Always accessible
     stage = 1
     
@@ -73,13 +99,11 @@ def get_current_stage(db: Session, student: Student) -> int:
         stage = 2
     
     # Stage 3: At least 1 document uploaded
-    doc_count = db.query(Document).filter(Document.user_id == student.user_id).count()
-    if stage >= 2 and doc_count >= 1:
+    if stage >= 2 and snapshot.doc_count >= 1:
         stage = 3
     
     # Stage 4: Career score generated
-    score_exists = db.query(CareerScore).filter(CareerScore.user_id == student.user_id).first()
-    if stage >= 3 and score_exists:
+    if stage >= 3 and snapshot.has_score:
         stage = 4
     
     # Stage 5: Viewed pathways (auto-unlock after stage 4)
@@ -89,21 +113,30 @@ def get_current_stage(db: Session, student: Student) -> int:
     return stage
 
 
-def can_unlock_stage(db: Session, student: Student, target_stage: int) -> bool:
+def can_unlock_stage(db: Session, student: Student, target_stage: int, snapshot: Optional[JourneySnapshot] = None) -> bool:
     """
     Check if user can access a specific stage
     """
-    current_stage = get_current_stage(db, student)
+    current_stage = get_current_stage(db, student, snapshot)
     return target_stage <= current_stage
 
 
-def get_next_actions(db: Session, student: Student) -> List[Dict[str, str]]:
+def can_access_stages(db: Session, student: Student, snapshot: Optional[JourneySnapshot] = None) -> Dict[int, bool]:
+    """
+    Accessibility of every stage (1-5), computed from one snapshot
+    """
+    current_stage = get_current_stage(db, student, snapshot)
+    return {stage: stage == 1 or stage <= current_stage for stage in range(1, 6)}
+
+
+def get_next_actions(db: Session, student: Student, snapshot: Optional[JourneySnapshot] = None) -> List[Dict[str, str]]:
     """
     Get smart CTA suggestions based on current stage and completion
     Returns list of actions with title, description, and link
     """
+    snapshot = snapshot or load_journey_snapshot(db, student.user_id)
     actions = []
-    current_stage = get_current_stage(db, student)
+    current_stage = get_current_stage(db, student, snapshot)
     
     # Stage 1: Complete profile
     if current_stage == 1:
@@ -138,7 +171,7 @@ def get_next_actions(db: Session, student: Student) -> List[Dict[str, str]]:
     
     # Stage 2: Upload documents
     elif current_stage == 2:
-        doc_count = db.query(Document).filter(Document.user_id == student.user_id).count()
+        doc_count = snapshot.doc_count
         if doc_count == 0:
             actions.append({
                 'title': 'Upload Your First Certificate',
@@ -156,8 +189,7 @@ def get_next_actions(db: Session, student: Student) -> List[Dict[str, str]]:
     
     # Stage 3: Generate score
     elif current_stage == 3:
-        score_exists = db.query(CareerScore).filter(CareerScore.user_id == student.user_id).first()
-        if not score_exists:
+        if not snapshot.has_score:
             actions.append({
                 'title': 'Generate Your Career Score',
                 'description': 'See your career readiness analysis',
@@ -184,7 +216,7 @@ def get_next_actions(db: Session, student: Student) -> List[Dict[str, str]]:
         })
     
     # Always suggest completing profile if not 100%
-    completion = calculate_completion_percentage(db, student)
+    completion = calculate_completion_percentage(db, student, snapshot)
     if completion < 100 and current_stage > 1:
         actions.append({
             'title': f'Complete Your Profile ({int(completion)}%)',
@@ -239,13 +271,14 @@ def get_encouraging_message(stage: int, completion: float) -> str:
         return stage_messages[2]
 
 
-def update_journey_progress(db: Session, student: Student) -> Tuple[int, float]:
+def update_journey_progress(db: Session, student: Student, snapshot: Optional[JourneySnapshot] = None) -> Tuple[int, float]:
     """
     Update student's journey stage and completion percentage
     Returns (new_stage, new_completion)
     """
-    new_stage = get_current_stage(db, student)
-    new_completion = calculate_completion_percentage(db, student)
+    snapshot = snapshot or load_journey_snapshot(db, student.user_id)
+    new_stage = get_current_stage(db, student, snapshot)
+    new_completion = calculate_completion_percentage(db, student, snapshot)
     
     student.journey_stage = new_stage
     student.completion_percentage = new_completion
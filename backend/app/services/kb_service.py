@@ -1,31 +1,152 @@
+import os
+import hashlib
+import threading
 import pandas as pd
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional, Tuple
 from app.core.config import settings
 from pathlib import Path
 
 _kb_cache = None
+_kb_version = 0
+_derived: Dict[str, Tuple[int, Any]] = {}
+_derived_lock = threading.Lock()
+
+try:
+    import pyarrow.feather as feather
+    _arrow_available = True
+except Exception:
+    _arrow_available = False
+
+def kb_candidate_paths() -> List[Path]:
+    """KB file locations in lookup order"""
+    base = Path(__file__).resolve().parents[3]
+    
+    # Primary path (where upload saves)
+    upload_path = base / "backend" / "knowledge_base" / "career_intelligence_kb.xlsx"
+    
+    # Secondary path (original config)
+    config_path = base / settings.KB_FILE_PATH
+    
+    return [upload_path, config_path]
+
+def resolve_kb_path() -> Optional[Path]:
+    """First KB file that exists on disk, or None"""
+    for path in kb_candidate_paths():
+        if path.exists():
+            return path
+    return None
+
+def kb_content_hash(path: Path) -> str:
+    """SHA-256 of the KB file bytes"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _cache_dir() -> Path:
+    base = Path(__file__).resolve().parents[3]
+    p = base / settings.KB_CACHE_DIR
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+def _columnar_path(content_hash: str) -> Path:
+    return _cache_dir() / f"kb_{content_hash}.arrow"
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The form every KB frame is served in, whether parsed from Excel or read
+    from the columnar cache: string column names, and values in mixed
+    object columns (text columns with stray numbers) as strings. Arrow
+    needs one type per column, so applying this to fresh parses too keeps
+    cached and uncached loads identical.
+    """
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    for col in out.columns:
+        if out[col].dtype == object:
+            out[col] = out[col].map(lambda v: v if v is None or isinstance(v, str) or pd.isna(v) else str(v))
+    return out.reset_index(drop=True)
+
+def _write_columnar(df: pd.DataFrame, content_hash: str) -> Optional[Path]:
+    """
+    Write the parsed KB as an uncompressed Arrow IPC (Feather v2) file so
+    later loads can memory-map it instead of re-parsing the Excel file.
+    """
+    if not _arrow_available:
+        return None
+    dest = _columnar_path(content_hash)
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    try:
+        feather.write_feather(_normalize_frame(df), tmp, compression='uncompressed')
+        os.replace(tmp, dest)
+        # Older versions are no longer reachable by hash
+        for stale in _cache_dir().glob("kb_*.arrow"):
+            if stale != dest:
+                stale.unlink(missing_ok=True)
+        return dest
+    except Exception as e:
+        print(f"⚠️ Failed to write columnar KB cache: {e}")
+        try:
+            tmp.unlink(missing_ok=True)
+        except Exception:
+            pass
+        return None
+
+def _read_kb_file(path: Path) -> pd.DataFrame:
+    """Read a KB Excel file, preferring its memory-mapped columnar copy"""
+    content_hash = kb_content_hash(path)
+    cached = _columnar_path(content_hash)
+    if _arrow_available and cached.exists():
+        try:
+            # pd.read_feather has no memory_map option; read through pyarrow directly
+            return feather.read_table(cached, memory_map=True).to_pandas().fillna('')
+        except Exception as e:
+            print(f"⚠️ Columnar KB cache unreadable, re-parsing Excel: {e}")
+    df = _normalize_frame(pd.read_excel(path))
+    _write_columnar(df, content_hash)
+    return df.fillna('')
+
+def get_kb_version() -> int:
+    """Counter bumped every time a different KB DataFrame becomes active; keys derived indexes"""
+    load_kb()
+    return _kb_version
+
+def kb_derived(name: str, build: Callable[[pd.DataFrame], Any]) -> Any:
+    """
+    Structure computed from the active KB (indexes, matrices, vocabularies),
+    built once and reused until the KB version changes
+    """
+    version = get_kb_version()
+    cached = _derived.get(name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _derived_lock:
+        cached = _derived.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, build(load_kb()))
+            _derived[name] = cached
+    return cached[1]
+
+def import_kb_file(path: Path) -> pd.DataFrame:
+    """Parse an uploaded KB file once, write its columnar cache and make it the active KB"""
+    global _kb_cache, _kb_version
+    _kb_cache = _read_kb_file(path)
+    _kb_version += 1
+    return _kb_cache
 
 def load_kb() -> pd.DataFrame:
-    global _kb_cache
+    global _kb_cache, _kb_version
     if _kb_cache is None:
-        # Try multiple possible paths
-        base = Path(__file__).resolve().parents[3]
-        
-        # Primary path (where upload saves)
-        upload_path = base / "backend" / "knowledge_base" / "career_intelligence_kb.xlsx"
-        
-        # Secondary path (original config)
-        config_path = base / settings.KB_FILE_PATH
-        
+        _kb_version += 1
         # Try paths in order
-        paths_to_try = [upload_path, config_path]
+        paths_to_try = kb_candidate_paths()
         
         _kb_cache = None
         for path in paths_to_try:
             try:
-                _kb_cache = pd.read_excel(path)
                 # Clean NaN values for JSON serialization
-                _kb_cache = _kb_cache.fillna('')
+                _kb_cache = _read_kb_file(path)
                 print(f"✅ Loaded {len(_kb_cache)} entries from {path}")
                 break
             except Exception as e:
@@ -109,7 +230,7 @@ def search_roles(query: str, limit: int = 5) -> List[Dict]:
 
 def delete_kb_entry(entry_id: int) -> bool:
     """Delete a knowledge base entry by index and save to file"""
-    global _kb_cache
+    global _kb_cache, _kb_version
     try:
         df = load_kb()
         if entry_id < 0 or entry_id >= len(df):
@@ -123,9 +244,11 @@ def delete_kb_entry(entry_id: int) -> bool:
         path = base / settings.KB_FILE_PATH
         if path.exists():
             df.to_excel(path, index=False)
+            _write_columnar(df, kb_content_hash(path))
         
         # Update cache
         _kb_cache = df
+        _kb_version += 1
         return True
     except Exception:
         return False
@@ -0,0 +1,193 @@
+"""
+LLM Cache - Persistent response cache for LLM completions
+
+Responses are stored in SQLite so they survive restarts. The key is a hash
+of the normalized prompt, the model name and the generation options.
+Entries expire after LLM_CACHE_TTL seconds, and the least recently used are
+evicted beyond LLM_CACHE_MAX_ENTRIES. With LLM_CACHE_NEAR_DUPLICATE on,
+answers are also stored under a key built from the canonicalized skill set
+and the candidate roles, so two profiles with the same skills reuse one
+answer even when the rest of their prompts differ.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.services.skill_matcher import default_matcher
+
+logger = logging.getLogger(__name__)
+
+_SKILL_SPLIT_RE = re.compile(r'[,;|\n]+')
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+_stats = {'hits': 0, 'near_duplicate_hits': 0, 'misses': 0, 'saved_model_seconds': 0.0}
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        path = Path(__file__).resolve().parents[3] / settings.LLM_CACHE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(path), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " model_seconds REAL NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_responses_last_used ON llm_responses (last_used)")
+        _conn.commit()
+    return _conn
+
+
+def _hash(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so formatting-only differences share a key"""
+    return ' '.join(prompt.split())
+
+
+def prompt_key(prompt: str, model: str, options: Optional[Dict[str, Any]] = None) -> str:
+    return _hash('prompt', normalize_prompt(prompt), model, options or {})
+
+
+def canonical_skill_set(skills: Any) -> List[str]:
+    """
+    Sorted canonical skills: each comma/semicolon separated entry is mapped
+    through the skill dictionary ('NodeJS' -> 'node.js'); unknown entries are
+    kept lowercased with whitespace collapsed.
+    """
+    if isinstance(skills, str):
+        entries: Iterable[str] = _SKILL_SPLIT_RE.split(skills)
+    else:
+        entries = skills or []
+    matcher = default_matcher()
+    canonical = set()
+    for entry in entries:
+        entry = ' '.join(str(entry).lower().split())
+        if not entry:
+            continue
+        found = matcher.find(entry)
+        canonical.update(found if found else [entry])
+    return sorted(canonical)
+
+
+def skill_set_key(skills: Any, role_names: Iterable[str], model: str, options: Optional[Dict[str, Any]] = None) -> str:
+    return _hash('skills', canonical_skill_set(skills), list(role_names), model, options or {})
+
+
+def get(key: str) -> Optional[str]:
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        row = conn.execute(
+            "SELECT response, model_seconds, created_at FROM llm_responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        response, model_seconds, created_at = row
+        if now - created_at > settings.LLM_CACHE_TTL:
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        conn.execute("UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key))
+        conn.commit()
+        _stats['saved_model_seconds'] += model_seconds
+        return response
+
+
+def put(keys: Iterable[str], model: str, response: str, model_seconds: float):
+    now = time.time()
+    with _lock:
+        conn = _connection()
+        conn.executemany(
+            "INSERT OR REPLACE INTO llm_responses (key, model, response, model_seconds, created_at, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            [(key, model, response, model_seconds, now, now) for key in keys],
+        )
+        conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - settings.LLM_CACHE_TTL,))
+        conn.execute(
+            "DELETE FROM llm_responses WHERE key IN ("
+            " SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (settings.LLM_CACHE_MAX_ENTRIES,),
+        )
+        conn.commit()
+
+
+def _count(stat: str):
+    with _lock:
+        _stats[stat] += 1
+
+
+def lookup(key: str, near_key: Optional[str] = None) -> Optional[str]:
+    """Cached response for `key`, else for `near_key` (near-duplicate mode); counts hits and misses"""
+    response = get(key)
+    if response is not None:
+        _count('hits')
+        logger.info("LLM cache hit")
+        return response
+    if near_key is not None:
+        response = get(near_key)
+        if response is not None:
+            _count('near_duplicate_hits')
+            logger.info("LLM cache near-duplicate hit")
+            return response
+    _count('misses')
+    return None
+
+
+def store(response: str, model: str, model_seconds: float, key: str, near_key: Optional[str] = None):
+    if response and response.strip():
+        put([k for k in (key, near_key) if k is not None], model, response, model_seconds)
+
+
+def cached_completion(generate: Callable[[], str], model: str, key: str, near_key: Optional[str] = None) -> str:
+    """
+    Return the cached response for `key` (or `near_key` in near-duplicate
+    mode), otherwise call `generate`, time it and store the result.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return generate()
+
+    response = lookup(key, near_key)
+    if response is not None:
+        return response
+
+    started = time.perf_counter()
+    response = generate()
+    store(response, model, time.perf_counter() - started, key, near_key)
+    return response
+
+
+def clear():
+    with _lock:
+        conn = _connection()
+        conn.execute("DELETE FROM llm_responses")
+        conn.commit()
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        entries = _connection().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] \
+            if settings.LLM_CACHE_ENABLED else 0
+        hits = _stats['hits'] + _stats['near_duplicate_hits']
+        lookups = hits + _stats['misses']
+        return {
+            **_stats,
+            'saved_model_seconds': round(_stats['saved_model_seconds'], 1),
+            'entries': entries,
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,318 @@
+"""
+LLM Client - Async, connection-pooled HTTP client for the AI backends
+
+Every backend (Ollama, OpenAI) gets one keep-alive httpx.AsyncClient and a
+concurrency semaphore. Requests beyond the limit wait in the semaphore's
+queue until their deadline, then fail fast instead of tying up a worker.
+All clients live on one background event loop so sync FastAPI handlers and
+async code share the same pools.
+
+Sync callers (the guidance endpoints and the report job pool) still block
+their thread while they wait, for up to LLM_REQUEST_TIMEOUT +
+LLM_QUEUE_TIMEOUT seconds. A call that gives up is cancelled on the loop,
+so it frees its concurrency slot at once.
+"""
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+import httpx
+from app.core.config import settings
+from app.core.exceptions import ExternalServiceError
+from app.services.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend:
+    def __init__(self, name: str, base_url: str, max_concurrency: int, headers: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self._headers = headers or {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.breaker = CircuitBreaker(name)
+
+    def _ensure(self):
+        # Created on the loop thread so both bind to the background loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={'Content-Type': 'application/json', **self._headers},
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _acquire(self, deadline: float):
+        # An open breaker rejects in microseconds instead of waiting out a dead backend's timeout
+        if not self.breaker.allow():
+            raise ExternalServiceError(self.name, f"circuit open after repeated failures ({self.breaker.last_error})")
+        self._ensure()
+        self.queued += 1
+        try:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ExternalServiceError(self.name, "deadline expired before the request was queued")
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=min(remaining, settings.LLM_QUEUE_TIMEOUT))
+        except asyncio.TimeoutError:
+            self.breaker.release()
+            raise ExternalServiceError(self.name, f"timed out waiting for one of {self.max_concurrency} request slots")
+        except BaseException:
+            self.breaker.release()
+            raise
+        finally:
+            self.queued -= 1
+
+    def _remaining(self, deadline: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ExternalServiceError(self.name, "deadline expired while queued")
+        return remaining
+
+    def _failed(self, message: str) -> ExternalServiceError:
+        self.breaker.record_failure(message)
+        return ExternalServiceError(self.name, message)
+
+    async def post_json(self, path: str, payload: Dict[str, Any], deadline: float) -> Dict[str, Any]:
+        """POST within an absolute time.monotonic() deadline covering queueing and the request"""
+        await self._acquire(deadline)
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            response = await self._client.post(path, json=payload, timeout=self._remaining(deadline))
+        except httpx.TimeoutException:
+            raise self._failed("request timed out")
+        except httpx.ConnectError:
+            raise self._failed(f"failed to connect to {self.base_url}")
+        except BaseException:
+            self.breaker.release()
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+        # 5xx means the backend is unhealthy; a 4xx is our request's fault and leaves the breaker alone
+        if response.status_code >= 500:
+            raise self._failed(f"status {response.status_code}: {response.text[:200]}")
+        self.breaker.record_success(time.monotonic() - started)
+        if response.status_code != 200:
+            raise ExternalServiceError(self.name, f"status {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def stream_lines(self, path: str, payload: Dict[str, Any], deadline: float) -> AsyncIterator[str]:
+        """POST and yield the response body line by line as it arrives; holds a slot until exhausted"""
+        await self._acquire(deadline)
+        self.in_flight += 1
+        started = time.monotonic()
+        healthy = False
+        try:
+            async with self._client.stream('POST', path, json=payload, timeout=self._remaining(deadline)) as response:
+                if response.status_code >= 500:
+                    body = await response.aread()
+                    raise self._failed(f"status {response.status_code}: {body[:200].decode(errors='replace')}")
+                # Latency to the response headers: streams run as long as the generation does
+                healthy = True
+                self.breaker.record_success(time.monotonic() - started)
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise ExternalServiceError(self.name, f"status {response.status_code}: {body[:200].decode(errors='replace')}")
+                async for line in response.aiter_lines():
+                    if time.monotonic() > deadline:
+                        raise ExternalServiceError(self.name, "deadline expired while streaming")
+                    if line:
+                        yield line
+        except httpx.TimeoutException:
+            raise self._failed("request timed out")
+        except httpx.ConnectError:
+            raise self._failed(f"failed to connect to {self.base_url}")
+        finally:
+            if not healthy:
+                self.breaker.release()
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def probe(self, path: str, timeout: float) -> Dict[str, Any]:
+        """
+        Health check GET outside the concurrency limit (it must not queue
+        behind generations). Feeds the breaker: success closes it, failure
+        opens it at once. Raises ExternalServiceError when unhealthy.
+        """
+        self._ensure()
+        try:
+            response = await self._client.get(path, timeout=timeout)
+        except httpx.HTTPError as e:
+            self.breaker.record_failure(f"probe failed: {e!r}", trip=True)
+            raise ExternalServiceError(self.name, f"probe failed: {e!r}")
+        if response.status_code != 200:
+            self.breaker.record_failure(f"probe status {response.status_code}", trip=True)
+            raise ExternalServiceError(self.name, f"probe status {response.status_code}")
+        self.breaker.record_success()
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {'max_concurrency': self.max_concurrency, 'in_flight': self.in_flight, 'queued': self.queued,
+                'breaker': self.breaker.stats()}
+
+
+class _LoopThread:
+    """A daemon thread running the event loop all LLM clients live on"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="llm-client-loop", daemon=True).start()
+        return self._loop
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+_loop_thread = _LoopThread()
+_backends: Dict[str, LLMBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str) -> LLMBackend:
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name == 'ollama':
+                backend = LLMBackend('ollama', os.getenv('OLLAMA_URL', settings.OLLAMA_URL), settings.OLLAMA_MAX_CONCURRENCY)
+            elif name == 'openai':
+                api_key = settings.GPT5_API_KEY or os.getenv('OPENAI_API_KEY', '')
+                backend = LLMBackend('openai', settings.OPENAI_BASE_URL, settings.OPENAI_MAX_CONCURRENCY,
+                                     headers={'Authorization': f'Bearer {api_key}'})
+            else:
+                raise ValueError(f"Unknown LLM backend: {name}")
+            _backends[name] = backend
+        return backend
+
+
+def _deadline(timeout: Optional[float]) -> float:
+    return time.monotonic() + (timeout if timeout is not None else settings.LLM_REQUEST_TIMEOUT)
+
+
+async def ollama_generate_async(prompt: str, model: str, options: Optional[Dict[str, Any]] = None,
+                                timeout: Optional[float] = None) -> str:
+    payload = {"model": model, "prompt": prompt, "stream": False, "options": options or {}}
+    result = await get_backend('ollama').post_json("/api/generate", payload, _deadline(timeout))
+    return result.get('response', '').strip()
+
+
+async def openai_chat_async(messages: List[Dict[str, str]], model: str, max_tokens: int = 2000,
+                            temperature: float = 0.7, timeout: Optional[float] = None) -> str:
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+    result = await get_backend('openai').post_json("/chat/completions", payload, _deadline(timeout))
+    return result['choices'][0]['message']['content']
+
+
+async def ollama_generate_stream(prompt: str, model: str, options: Optional[Dict[str, Any]] = None,
+                                 timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """Yield Ollama completion tokens as they are generated"""
+    payload = {"model": model, "prompt": prompt, "stream": True, "options": options or {}}
+    async for line in get_backend('ollama').stream_lines("/api/generate", payload, _deadline(timeout)):
+        chunk = json.loads(line)
+        if chunk.get('response'):
+            yield chunk['response']
+        if chunk.get('done'):
+            break
+
+
+async def openai_chat_stream(messages: List[Dict[str, str]], model: str, max_tokens: int = 2000,
+                             temperature: float = 0.7, timeout: Optional[float] = None) -> AsyncIterator[str]:
+    """Yield OpenAI chat completion deltas from its server-sent event stream"""
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens,
+               "temperature": temperature, "stream": True}
+    async for line in get_backend('openai').stream_lines("/chat/completions", payload, _deadline(timeout)):
+        if not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            break
+        delta = json.loads(data)['choices'][0].get('delta', {})
+        if delta.get('content'):
+            yield delta['content']
+
+
+def run(coro, timeout: Optional[float] = None):
+    """Run a client coroutine from sync code on the shared loop and wait for it"""
+    future = _loop_thread.submit(coro)
+    wait = (timeout if timeout is not None else settings.LLM_REQUEST_TIMEOUT) + settings.LLM_QUEUE_TIMEOUT
+    try:
+        return future.result(timeout=wait)
+    except concurrent.futures.TimeoutError:
+        # Otherwise the coroutine keeps running on the loop and holds its slot
+        future.cancel()
+        raise ExternalServiceError('llm', f"no response within {wait:.1f}s")
+
+
+def iterate(agen: AsyncIterator[Any]) -> Iterator[Any]:
+    """
+    Consume an async generator from sync code (e.g. a StreamingResponse
+    iterator). Items are handed over through a queue as they arrive; closing
+    the iterator early cancels the generator and frees its backend slot.
+    """
+    items: "queue.Queue" = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((None, e))
+            raise
+        finally:
+            items.put((done, None))
+
+    future = _loop_thread.submit(pump())
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        future.cancel()
+
+
+async def run_async(coro):
+    """Await a client coroutine from any other event loop (e.g. an async endpoint)"""
+    return await asyncio.wrap_future(_loop_thread.submit(coro))
+
+
+def client_stats() -> Dict[str, Any]:
+    return {name: backend.stats() for name, backend in _backends.items()}
+
+
+def reset_backends():
+    """Close all pooled clients (tests / config reloads)"""
+    with _backends_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        run(backend.aclose(), timeout=5)
@@ -0,0 +1,123 @@
+"""
+LLM Health - Background health prober for the AI backends
+
+A daemon thread probes every configured backend (Ollama: GET /api/tags,
+OpenAI: GET /models) each LLM_HEALTH_INTERVAL seconds and caches the
+result. Request paths read the cached status together with the backend's
+circuit breaker, so routing decisions never block on a network check and
+a dead backend is skipped within microseconds. A failed probe opens the
+breaker at once; a successful one closes it, so recovery is noticed
+without a user request having to be the trial call.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+from app.core.config import settings
+from app.services import llm_client
+
+logger = logging.getLogger(__name__)
+
+PROBE_PATHS = {'ollama': '/api/tags', 'openai': '/models'}
+
+_status: Dict[str, Dict[str, Any]] = {}
+_changed = threading.Condition()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def configured_backends() -> List[str]:
+    names = ['ollama']
+    if settings.GPT5_API_KEY or os.getenv('OPENAI_API_KEY'):
+        names.append('openai')
+    return names
+
+
+def probe(name: str) -> Dict[str, Any]:
+    """Check one backend now, update its cached status and breaker, and return the status"""
+    backend = llm_client.get_backend(name)
+    started = time.monotonic()
+    try:
+        body = llm_client.run(backend.probe(PROBE_PATHS[name], settings.LLM_HEALTH_TIMEOUT),
+                              timeout=settings.LLM_HEALTH_TIMEOUT)
+        listed = body.get('models') or body.get('data') or []
+        models = [m.get('name') or m.get('id') for m in listed[:20] if isinstance(m, dict)]
+        # An Ollama without any pulled model cannot generate
+        healthy = bool(models) or name != 'ollama'
+        status = {'healthy': healthy, 'error': None if healthy else 'no models pulled', 'models': models}
+    except Exception as e:
+        status = {'healthy': False, 'error': str(e), 'models': []}
+    status['latency_ms'] = round((time.monotonic() - started) * 1000, 1)
+    status['checked_at'] = time.time()
+
+    with _changed:
+        previous = _status.get(name)
+        _status[name] = status
+        _changed.notify_all()
+    if previous is None or previous['healthy'] != status['healthy']:
+        logger.info(f"LLM backend '{name}' is {'up' if status['healthy'] else 'down'}"
+                    f"{'' if status['healthy'] else ': ' + status['error']}")
+    return status
+
+
+def is_available(name: str) -> bool:
+    """
+    Cached health and breaker state of a backend. Only blocks for the very
+    first check, or when results are stale and the prober is not running
+    (e.g. scripts).
+    """
+    status = _status.get(name)
+    stale = status is None or time.time() - status['checked_at'] > 2 * settings.LLM_HEALTH_INTERVAL
+    # Without a result yet (first use) or a running prober, check inline
+    if status is None or (stale and not is_running()):
+        status = probe(name)
+    return _available(name, status)
+
+
+def _available(name: str, status: Optional[Dict[str, Any]]) -> bool:
+    if status is None or not status['healthy']:
+        return False
+    return llm_client.get_backend(name).breaker.is_available()
+
+
+def wait_for_backend(names: Sequence[str], timeout: float) -> Optional[str]:
+    """First of `names` that is (or within `timeout` seconds becomes) available, else None"""
+    deadline = time.monotonic() + timeout
+    while True:
+        for name in names:
+            if is_available(name):
+                return name
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        with _changed:
+            _changed.wait(min(remaining, settings.LLM_HEALTH_INTERVAL))
+
+
+def _run():
+    while not _stop.is_set():
+        for name in configured_backends():
+            probe(name)
+        _stop.wait(settings.LLM_HEALTH_INTERVAL)
+
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+
+def start_prober():
+    global _thread
+    if is_running():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="llm-health", daemon=True)
+    _thread.start()
+
+
+def stop_prober():
+    _stop.set()
+
+
+def health_stats() -> Dict[str, Any]:
+    return {name: {**status, 'available': _available(name, status)} for name, status in list(_status.items())}
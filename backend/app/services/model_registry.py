@@ -0,0 +1,83 @@
+"""
+Model Registry - Loads each embedding model once per process and shares it
+between index building and querying
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_models: Dict[str, Any] = {}
+_stats: Dict[str, Dict[str, float]] = {}
+_lock = threading.Lock()
+
+
+def _rss_mb() -> float:
+    """Current resident set size of this process in MB (0.0 if unknown)"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        import resource
+        # ru_maxrss is the peak RSS in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    except Exception:
+        return 0.0
+
+
+def get_model(key: str, loader: Callable[[], Any]) -> Any:
+    """
+    Return the model registered under `key`, loading it with `loader` on first use.
+    Concurrent callers wait for a single load instead of loading in parallel.
+    """
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        logger.info(f"Loading model '{key}'")
+        rss_before = _rss_mb()
+        started = time.perf_counter()
+        model = loader()
+        load_seconds = time.perf_counter() - started
+        rss_after = _rss_mb()
+
+        _models[key] = model
+        _stats[key] = {
+            'load_seconds': round(load_seconds, 3),
+            'memory_mb': round(max(0.0, rss_after - rss_before), 1),
+            'process_rss_mb': round(rss_after, 1),
+            'loaded_at': time.time(),
+        }
+        logger.info(f"Model '{key}' loaded in {load_seconds:.2f}s (+{_stats[key]['memory_mb']} MB RSS)")
+        return model
+
+
+def is_loaded(key: str) -> bool:
+    return key in _models
+
+
+def unload(key: str) -> None:
+    """Drop a model from the registry (next get_model call reloads it)"""
+    with _lock:
+        _models.pop(key, None)
+        _stats.pop(key, None)
+
+
+def model_stats() -> Dict[str, Any]:
+    """Load time and memory footprint per loaded model, for sizing workers"""
+    return {
+        'models': {key: dict(stats) for key, stats in _stats.items()},
+        'process_rss_mb': round(_rss_mb(), 1),
+        'pid': os.getpid(),
+    }
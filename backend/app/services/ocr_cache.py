@@ -0,0 +1,125 @@
+"""
+OCR Cache - Content-addressed store of text extraction results
+
+Results are keyed by the SHA-256 of the file bytes plus the extraction
+settings and engine versions (ocr_service.engine_signature), so re-uploads
+of the same certificate and repeated analyze calls skip OCR entirely, while
+a settings or engine change never serves stale text. Text, confidence and
+per-page metadata are kept in SQLite; least recently used entries are
+evicted once the stored text exceeds OCR_CACHE_MAX_BYTES.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.services.ocr_service import OCRResult, engine_signature
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 1024 * 1024
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        path = Path(__file__).resolve().parents[3] / settings.OCR_CACHE_PATH
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(path), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS ocr_results ("
+            " key TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " confidence REAL,"
+            " pages TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        _conn.execute("CREATE INDEX IF NOT EXISTS ix_ocr_results_last_used ON ocr_results (last_used)")
+        _conn.commit()
+    return _conn
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(content_sha256: str) -> str:
+    signature = json.dumps(engine_signature(), sort_keys=True)
+    return hashlib.sha256(f"{content_sha256}:{signature}".encode('utf-8')).hexdigest()
+
+
+def get(key: str) -> Optional[OCRResult]:
+    with _lock:
+        conn = _connection()
+        row = conn.execute("SELECT text, confidence, pages FROM ocr_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            _stats['misses'] += 1
+            return None
+        conn.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+        conn.commit()
+        _stats['hits'] += 1
+        return OCRResult(row[0], row[1], json.loads(row[2]))
+
+
+def put(key: str, result: OCRResult):
+    # Failed extractions are not cached, so they are retried next time. That
+    # includes results where no page succeeded (OCR worker crash, no engine),
+    # which combine into "" with confidence 0.0 and look like a blank document
+    if result.text is None or not any(page.get('ok') for page in result.pages):
+        return
+    size = len(result.text.encode('utf-8'))
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO ocr_results (key, text, confidence, pages, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, result.text, result.confidence, json.dumps(result.pages), size, time.time()),
+        )
+        # Evict least recently used entries beyond the byte budget
+        evicted = conn.execute(
+            "DELETE FROM ocr_results WHERE key IN ("
+            " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS running FROM ocr_results)"
+            " WHERE running > ?)",
+            (settings.OCR_CACHE_MAX_BYTES,),
+        ).rowcount
+        conn.commit()
+        _stats['evictions'] += max(evicted, 0)
+
+
+def lookup_file(path: str, content_sha256: Optional[str] = None) -> tuple:
+    """(key, cached result or None) for the file at `path`; hashes it unless the digest is given"""
+    key = cache_key(content_sha256 or file_sha256(path))
+    return key, get(key)
+
+
+def clear():
+    with _lock:
+        conn = _connection()
+        conn.execute("DELETE FROM ocr_results")
+        conn.commit()
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        entries, size = _connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results").fetchone() \
+            if settings.OCR_CACHE_ENABLED else (0, 0)
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            **_stats,
+            'entries': entries,
+            'bytes': size,
+            'hit_rate': round(_stats['hits'] / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,175 @@
+"""
+OCR Executor - Runs OCR in a pool of worker processes
+
+Each worker process loads its own OCR reader once (in the pool initializer)
+and keeps it warm. PDFs are split into pages that are OCR'd in parallel on
+different workers and merged back in page order. Requests only wait on
+futures, so CPU-heavy OCR never runs on an API thread, and uploads can be
+queued for OCR in the background. Results go through the content-addressed
+OCR cache, so identical files are only processed once.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from app.core.config import settings
+from app.services import ocr_cache, ocr_service
+from app.services.ocr_service import OCRResult
+
+logger = logging.getLogger(__name__)
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_dispatch_pool: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'pages': 0}
+
+
+def _init_worker():
+    """Pool initializer: load the reader once per worker process"""
+    if ocr_service.easyocr_available:
+        ocr_service.get_easyocr_reader()
+    logger.info(f"OCR worker {os.getpid()} ready")
+
+
+def _pools() -> Tuple[Optional[ProcessPoolExecutor], ThreadPoolExecutor]:
+    global _process_pool, _dispatch_pool
+    with _lock:
+        if _dispatch_pool is None:
+            # Threads only orchestrate and wait; the OCR itself runs in the process pool
+            _dispatch_pool = ThreadPoolExecutor(max_workers=max(4, 2 * settings.OCR_WORKERS),
+                                                thread_name_prefix="ocr-dispatch")
+        if _process_pool is None and settings.OCR_WORKERS > 0:
+            # spawn: torch/EasyOCR state is not fork-safe
+            _process_pool = ProcessPoolExecutor(max_workers=settings.OCR_WORKERS,
+                                                mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=_init_worker)
+        return _process_pool, _dispatch_pool
+
+
+def _run(fn: Callable, *args):
+    """Run fn in a worker process, or inline when the pool is disabled"""
+    process_pool, _ = _pools()
+    if process_pool is None:
+        return fn(*args)
+    return process_pool.submit(fn, *args).result()
+
+
+def _ocr_pages_parallel(path: str, page_numbers: List[int]) -> List[Tuple]:
+    """Fan pages out across workers, results in page order"""
+    process_pool, _ = _pools()
+    futures = [process_pool.submit(ocr_service.extract_pdf_page, path, n) for n in page_numbers]
+    results = []
+    for n, future in zip(page_numbers, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.error(f"OCR of {path} page {n} failed: {e}")
+            results.append((None, None))
+    with _lock:
+        _stats['pages'] += len(page_numbers)
+    return results
+
+
+def _extract(path: str) -> OCRResult:
+    process_pool, _ = _pools()
+    if process_pool is None:
+        return ocr_service.extract_document(path)
+    if Path(path).suffix.lower() != '.pdf' or not os.path.exists(path):
+        return _run(ocr_service.extract_document, path)
+
+    # The text layer is read here (cheap); only pages without one reach the workers
+    try:
+        return ocr_service.extract_pdf_document(path, ocr_pages=_ocr_pages_parallel)
+    except Exception as e:
+        logger.error(f"Text extraction failed for {path}: {e}")
+        return OCRResult(None, None, [])
+
+
+def _cached_extract(path: str, content_sha256: Optional[str] = None) -> OCRResult:
+    if not settings.OCR_CACHE_ENABLED or not os.path.exists(path):
+        return _extract(path)
+    try:
+        key, cached = ocr_cache.lookup_file(path, content_sha256)
+    except Exception as e:
+        logger.warning(f"OCR cache lookup failed: {e}")
+        return _extract(path)
+    if cached is not None:
+        logger.info(f"OCR cache hit for {path}")
+        return cached
+    result = _extract(path)
+    try:
+        ocr_cache.put(key, result)
+    except Exception as e:
+        logger.warning(f"OCR cache store failed: {e}")
+    return result
+
+
+def _tracked(path: str, content_sha256: Optional[str] = None) -> OCRResult:
+    try:
+        result = _cached_extract(path, content_sha256)
+    except Exception as e:
+        with _lock:
+            _stats['failed'] += 1
+        logger.error(f"Text extraction failed for {path}: {e}")
+        return OCRResult(None, None, [])
+    with _lock:
+        _stats['completed'] += 1
+    return result
+
+
+def submit(path: str, content_sha256: Optional[str] = None) -> "Future[OCRResult]":
+    """
+    Queue text extraction of a document; the future resolves to an OCRResult.
+    Pass the content hash when it is already known to skip re-hashing the file.
+    """
+    _, dispatch_pool = _pools()
+    with _lock:
+        _stats['submitted'] += 1
+    return dispatch_pool.submit(_tracked, path, content_sha256)
+
+
+def extract_document(path: str, timeout: Optional[float] = None) -> OCRResult:
+    """Same contract as ocr_service.extract_document, executed on the worker pool"""
+    return submit(path).result(timeout=timeout)
+
+
+def queue_document_ocr(doc_id: int, user_id: int, path: str, content_sha256: Optional[str] = None) -> "Future[OCRResult]":
+    """OCR an uploaded document in the background and store the result on its row"""
+    def store(future: "Future[OCRResult]"):
+        from app.database import SessionLocal
+        from app.services.document_service import get_document, set_ocr_text
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Background OCR of document {doc_id} failed: {e}")
+            return
+        db = SessionLocal()
+        try:
+            doc = get_document(db, doc_id, user_id)
+            # Don't overwrite text a user or an explicit OCR call already set
+            if doc is not None and not doc.ocr_text:
+                set_ocr_text(db, doc, result.text or "", result.confidence, result.pages)
+        finally:
+            db.close()
+
+    future = submit(path, content_sha256)
+    future.add_done_callback(store)
+    return future
+
+
+def executor_stats() -> dict:
+    with _lock:
+        return {**_stats, 'workers': settings.OCR_WORKERS, 'started': _process_pool is not None}
+
+
+def shutdown(wait: bool = False):
+    global _process_pool, _dispatch_pool
+    with _lock:
+        pools, _process_pool, _dispatch_pool = (_process_pool, _dispatch_pool), None, None
+    for pool in pools:
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -1,20 +1,38 @@
-from typing import Optional, Tuple
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+from functools import lru_cache
+import importlib.metadata
 import logging
 import os
 from pathlib import Path
+import numpy as np
+from app.core.config import settings
+from app.utils.lazy_import import is_installed, optional_import
 
 logger = logging.getLogger(__name__)
 
-# Try to import EasyOCR (preferred)
-easyocr_available = False
+# A file path, or an in-memory page (PIL image / numpy array)
+ImageSource = Union[str, Any]
+
+class OCRResult(NamedTuple):
+    text: Optional[str]
+    confidence: Optional[float]
+    pages: List[dict]  # [{page, method: 'text_layer' | 'ocr', ok, chars, confidence}]
+
+# Try to import pypdf (native PDF text layer)
+pypdf_available = False
 try:
-    import easyocr
-    easyocr_reader = None
-    easyocr_available = True
-    logger.info("EasyOCR is available")
+    from pypdf import PdfReader
+    pypdf_available = True
 except ImportError:
+    logger.info("pypdf not available - PDFs will always be OCR'd")
+
+# EasyOCR (preferred) pulls in torch, so it is only imported when the reader is built
+easyocr_available = is_installed('easyocr')
+easyocr_reader = None
+if easyocr_available:
+    logger.info("EasyOCR is available")
+else:
     logger.info("EasyOCR not available, will use Tesseract")
-    easyocr_available = False
 
 # Try to import Tesseract (fallback)
 pytesseract_available = False
@@ -29,8 +47,12 @@ except ImportError:
 
 def get_easyocr_reader():
     """Get or create EasyOCR reader instance"""
-    global easyocr_reader
+    global easyocr_reader, easyocr_available
     if easyocr_reader is None and easyocr_available:
+        easyocr = optional_import('easyocr')
+        if easyocr is None:
+            easyocr_available = False
+            return None
         try:
             # Initialize with English and common languages
             easyocr_reader = easyocr.Reader(['en'], gpu=False)  # Set gpu=True if you have CUDA
@@ -40,14 +62,16 @@ def get_easyocr_reader():
             return None
     return easyocr_reader
 
-def _extract_image_easyocr(path: str) -> Tuple[Optional[str], Optional[float]]:
-    """Extract text from image using EasyOCR"""
+def _extract_image_easyocr(path: ImageSource) -> Tuple[Optional[str], Optional[float]]:
+    """Extract text from an image file or in-memory array using EasyOCR"""
     try:
         reader = get_easyocr_reader()
         if reader is None:
             return None, None
         
-        # Read text from image
+        # Read text from image (EasyOCR wants a path or an array, not a PIL image)
+        if not isinstance(path, str):
+            path = np.asarray(path)
         results = reader.readtext(path, detail=1)
         
         if not results:
@@ -72,10 +96,10 @@ def _extract_image_easyocr(path: str) -> Tuple[Optional[str], Optional[float]]:
         logger.error(f"EasyOCR extraction failed: {e}")
         return None, None
 
-def _extract_image_tesseract(path: str) -> Tuple[Optional[str], Optional[float]]:
-    """Extract text from image using Tesseract (fallback)"""
+def _extract_image_tesseract(path: ImageSource) -> Tuple[Optional[str], Optional[float]]:
+    """Extract text from an image file or in-memory image using Tesseract (fallback)"""
     try:
-        img = Image.open(path)
+        img = Image.open(path) if isinstance(path, str) else path
         
         # Use better OCR configuration
         custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,!?@#$%^&*()_+-=[]{}|;:,.<>?/~` '
@@ -95,8 +119,8 @@ def _extract_image_tesseract(path: str) -> Tuple[Optional[str], Optional[float]]
         logger.error(f"Tesseract extraction failed: {e}")
         return None, None
 
-def _extract_image(path: str) -> Tuple[Optional[str], Optional[float]]:
-    """Extract text from image using best available OCR"""
+def _extract_image(path: ImageSource) -> Tuple[Optional[str], Optional[float]]:
+    """Extract text from an image (file path or in-memory page) using best available OCR"""
     # Try EasyOCR first (better accuracy)
     if easyocr_available:
         result = _extract_image_easyocr(path)
@@ -111,76 +135,145 @@ def _extract_image(path: str) -> Tuple[Optional[str], Optional[float]]:
     logger.error("No OCR engine available")
     return None, None
 
-def _extract_pdf(path: str) -> Tuple[Optional[str], Optional[float]]:
-    """Extract text from PDF by converting to images"""
+def open_pdf(path: str) -> Optional[Any]:
+    """pypdf reader for path, or None when pypdf is missing or cannot parse the file"""
+    if not pypdf_available:
+        return None
     try:
-        from pdf2image import convert_from_path
-    except ImportError:
-        logger.error("pdf2image not available for PDF processing")
-        return None, None
-    
+        return PdfReader(path)
+    except Exception as e:
+        logger.warning(f"pypdf cannot parse {path}, using poppler: {e}")
+        return None
+
+def pdf_page_count(path: str, reader: Optional[Any] = None) -> int:
+    """
+    Number of pages extraction will look at (capped at OCR_MAX_PDF_PAGES).
+    Counted by `reader` when given; poppler's pdfinfo is the fallback for
+    PDFs pypdf cannot parse, since poppler may still render them.
+    """
+    total = None
+    if reader is not None:
+        try:
+            total = len(reader.pages)
+        except Exception as e:
+            logger.warning(f"pypdf cannot count pages of {path}, using poppler: {e}")
+    if total is None:
+        from pdf2image import pdfinfo_from_path
+        total = int(pdfinfo_from_path(path)['Pages'])
+    return min(total, settings.OCR_MAX_PDF_PAGES)
+
+def pdf_text_layer(reader: Optional[Any], page_count: int) -> List[str]:
+    """Embedded text of the first `page_count` pages ('' where a page has none)"""
+    if reader is None:
+        return [''] * page_count
     try:
-        # Convert PDF pages to images
-        pages = convert_from_path(path, dpi=200, first_page=1, last_page=3)  # Limit to first 3 pages
-        
-        if not pages:
-            return "", 0.0
-        
-        all_texts = []
-        all_confidences = []
-        
-        for i, page_image in enumerate(pages):
-            logger.info(f"Processing PDF page {i+1}")
-            
-            # Save page as temporary image
-            temp_path = f"/tmp/pdf_page_{i}.png" if os.name != 'nt' else f"temp_pdf_page_{i}.png"
-            page_image.save(temp_path, 'PNG')
-            
-            try:
-                # Extract text from page image
-                text, confidence = _extract_image(temp_path)
-                
-                if text and text.strip():
-                    all_texts.append(text.strip())
-                    if confidence is not None:
-                        all_confidences.append(confidence)
-                
-            finally:
-                # Clean up temporary file
-                try:
-                    os.remove(temp_path)
-                except:
-                    pass
-        
-        combined_text = "\n\n".join(all_texts)
-        avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
-        
-        logger.info(f"PDF processing complete: {len(all_texts)} pages, avg confidence {avg_confidence:.2f}")
-        return combined_text, avg_confidence
-        
+        return [(reader.pages[i].extract_text() or '') for i in range(page_count)]
     except Exception as e:
-        logger.error(f"PDF extraction failed: {e}")
-        return None, None
+        logger.warning(f"Reading PDF text layer failed, using OCR: {e}")
+        return [''] * page_count
 
-def extract_text(path: str) -> Tuple[Optional[str], Optional[float]]:
+def has_usable_text(text: str) -> bool:
+    """A page counts as digital when its text layer has enough real characters"""
+    return sum(ch.isalnum() for ch in text) >= settings.PDF_TEXT_MIN_CHARS
+
+def render_pdf_page(path: str, page_number: int):
     """
-    Extract text from document using the best available OCR engine.
+    Render one PDF page (1-based) to an in-memory PIL image at OCR_PDF_DPI,
+    downscaled so its longer side is at most OCR_MAX_IMAGE_SIDE pixels.
+    Pages are rendered one at a time, so memory stays flat for long PDFs.
+    """
+    from pdf2image import convert_from_path
+    
+    pages = convert_from_path(path, dpi=settings.OCR_PDF_DPI, first_page=page_number, last_page=page_number)
+    if not pages:
+        return None
+    page = pages[0]
+    max_side = settings.OCR_MAX_IMAGE_SIDE
+    if max_side and max(page.size) > max_side:
+        page.thumbnail((max_side, max_side))
+    return page
+
+def extract_pdf_page(path: str, page_number: int) -> Tuple[Optional[str], Optional[float]]:
+    """OCR a single PDF page (1-based); runs inside OCR worker processes"""
+    logger.info(f"Processing PDF page {page_number}")
+    page = render_pdf_page(path, page_number)
+    if page is None:
+        return "", None
+    try:
+        return _extract_image(page)
+    finally:
+        page.close()
+
+def combine_pdf_pages(results: List[Tuple[Optional[str], Optional[float]]]) -> Tuple[str, float]:
+    """Merge per-page results (in page order) into one text and an average confidence"""
+    all_texts = []
+    all_confidences = []
+    for text, confidence in results:
+        if text and text.strip():
+            all_texts.append(text.strip())
+            if confidence is not None:
+                all_confidences.append(confidence)
+    
+    combined_text = "\n\n".join(all_texts)
+    avg_confidence = sum(all_confidences) / len(all_confidences) if all_confidences else 0.0
+    
+    logger.info(f"PDF processing complete: {len(all_texts)} pages, avg confidence {avg_confidence:.2f}")
+    return combined_text, avg_confidence
+
+def _page_info(page_number: int, method: str, text: Optional[str], confidence: Optional[float]) -> dict:
+    # ok: the engine ran; a blank page is ok, a crashed worker or missing engine is not
+    return {'page': page_number, 'method': method, 'ok': text is not None, 'chars': len(text or ''),
+            'confidence': confidence}
+
+def extract_pdf_document(path: str, ocr_pages: Optional[Callable[[str, List[int]], List[Tuple]]] = None) -> OCRResult:
+    """
+    Read each page's native text layer and OCR only the pages without usable
+    text. `ocr_pages(path, page_numbers)` does the OCR (sequential by default;
+    the OCR executor passes a parallel one). Returns per-page metadata with
+    the path each page took ('text_layer' or 'ocr').
+    """
+    reader = open_pdf(path)
+    page_count = pdf_page_count(path, reader)
+    if not page_count:
+        return OCRResult("", 0.0, [])
+    
+    native = pdf_text_layer(reader, page_count)
+    needs_ocr = [n for n in range(1, page_count + 1) if not has_usable_text(native[n - 1])]
+    ocr_results: Dict[int, Tuple] = {}
+    if needs_ocr:
+        if not easyocr_available and not pytesseract_available:
+            logger.error("No OCR engine available (neither EasyOCR nor Tesseract)")
+            ocr_results = {n: (None, None) for n in needs_ocr}
+        else:
+            ocr_pages = ocr_pages or (lambda p, numbers: [extract_pdf_page(p, n) for n in numbers])
+            ocr_results = dict(zip(needs_ocr, ocr_pages(path, needs_ocr)))
+    
+    results, pages = [], []
+    for n in range(1, page_count + 1):
+        if n in ocr_results:
+            text, confidence = ocr_results[n]
+            pages.append(_page_info(n, 'ocr', text, confidence))
+        else:
+            text, confidence = native[n - 1], settings.PDF_TEXT_LAYER_CONFIDENCE
+            pages.append(_page_info(n, 'text_layer', text, confidence))
+        results.append((text, confidence))
+    
+    logger.info(f"PDF pages via text layer: {page_count - len(needs_ocr)}, via OCR: {len(needs_ocr)}")
+    text, confidence = combine_pdf_pages(results)
+    return OCRResult(text, confidence, pages)
+
+def extract_document(path: str) -> OCRResult:
+    """
+    Extract text from a document: PDFs through their text layer where
+    possible, everything else through the best available OCR engine.
     
-    Args:
-        path: Path to the document file
-        
     Returns:
-        Tuple of (extracted_text, confidence_score)
-        confidence_score is between 0.0 and 1.0
+        OCRResult(text, confidence, pages); text and confidence are None on
+        failure, confidence is between 0.0 and 1.0
     """
     if not os.path.exists(path):
         logger.error(f"File not found: {path}")
-        return None, None
-    
-    # Check if any OCR engine is available
-    if not easyocr_available and not pytesseract_available:
-        logger.error("No OCR engine available (neither EasyOCR nor Tesseract)")
-        return None, None
+        return OCRResult(None, None, [])
     
     file_path = Path(path)
     file_extension = file_path.suffix.lower()
@@ -189,16 +282,63 @@ def extract_text(path: str) -> Tuple[Optional[str], Optional[float]]:
     
     try:
         if file_extension == '.pdf':
-            return _extract_pdf(path)
+            return extract_pdf_document(path)
         elif file_extension in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']:
-            return _extract_image(path)
+            # Check if any OCR engine is available
+            if not easyocr_available and not pytesseract_available:
+                logger.error("No OCR engine available (neither EasyOCR nor Tesseract)")
+                return OCRResult(None, None, [])
+            text, confidence = _extract_image(path)
+            return OCRResult(text, confidence, [_page_info(1, 'ocr', text, confidence)])
         else:
             logger.warning(f"Unsupported file type: {file_extension}")
-            return None, None
+            return OCRResult(None, None, [])
             
     except Exception as e:
         logger.error(f"Text extraction failed for {path}: {e}")
-        return None, None
+        return OCRResult(None, None, [])
+
+def extract_text(path: str) -> Tuple[Optional[str], Optional[float]]:
+    """
+    Extract text from document using the best available OCR engine.
+    
+    Args:
+        path: Path to the document file
+        
+    Returns:
+        Tuple of (extracted_text, confidence_score)
+        confidence_score is between 0.0 and 1.0
+    """
+    result = extract_document(path)
+    return result.text, result.confidence
+
+@lru_cache(maxsize=1)
+def _tesseract_version() -> Optional[str]:
+    """Version of the tesseract binary (not the pytesseract wrapper); runs it once per process"""
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+def _package_version(name: str) -> Optional[str]:
+    # From metadata, so the lazily imported easyocr is not loaded just to read its version
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def engine_signature() -> dict:
+    """Everything besides the file bytes that can change extraction output"""
+    return {
+        'easyocr': _package_version('easyocr') if easyocr_available else None,
+        'tesseract': _tesseract_version() if pytesseract_available else None,
+        'pypdf': _package_version('pypdf') if pypdf_available else None,
+        'dpi': settings.OCR_PDF_DPI,
+        'max_image_side': settings.OCR_MAX_IMAGE_SIDE,
+        'max_pdf_pages': settings.OCR_MAX_PDF_PAGES,
+        'text_min_chars': settings.PDF_TEXT_MIN_CHARS,
+        'text_layer_confidence': settings.PDF_TEXT_LAYER_CONFIDENCE,
+    }
 
 def get_ocr_info() -> dict:
     """Get information about available OCR engines"""
@@ -206,5 +346,6 @@ def get_ocr_info() -> dict:
         'easyocr_available': easyocr_available,
         'tesseract_available': pytesseract_available,
         'primary_engine': 'EasyOCR' if easyocr_available else 'Tesseract' if pytesseract_available else 'None',
+        'pdf_text_layer_available': pypdf_available,
         'supported_formats': ['.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif']
     }
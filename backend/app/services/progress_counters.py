@@ -0,0 +1,165 @@
+"""
+Progress Counters - Materialized per-user aggregates maintained on write
+
+Scoring and the journey read a user's document count, verified count,
+average OCR confidence, latest score and completed soft-skill courses on
+every request. Those live in one user_counters row per user, so reads are
+a single primary-key lookup. After every flush that touches a document,
+score, course enrolment or course category, the affected users' rows are
+recomputed from the source tables with one aggregate statement on the
+flush's connection, i.e. in the same transaction as the write.
+
+Concurrent writers for the same user are serialized on that user's row
+(SELECT ... FOR NO KEY UPDATE, which still lets other transactions insert
+rows referencing the user), so each recompute sees every write committed
+before it, and the counters row is upserted (ON CONFLICT DO UPDATE) rather
+than deleted and re-inserted. rebuild_counters
+(scripts/rebuild_progress_counters.py) reconciles rows after writes that
+bypass the ORM.
+"""
+import logging
+from typing import Iterable, NamedTuple, Optional, Set
+from sqlalchemy import case, delete, event, func, inspect, insert, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from app.models.career_score import CareerScore
+from app.models.course import Course
+from app.models.document import Document
+from app.models.user import User
+from app.models.user_counters import UserCounters
+from app.models.user_course import UserCourse
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressCounters(NamedTuple):
+    doc_count: int
+    verified_count: int
+    avg_ocr_confidence: Optional[float]
+    latest_score_id: Optional[int]
+    completed_soft_skill_courses: int
+
+
+def _aggregate(user_ids: Optional[Iterable[int]] = None):
+    """SELECT producing one user_counters row per user, straight from the source tables"""
+    doc_count = select(func.count(Document.id)).where(Document.user_id == User.id).scalar_subquery()
+    verified_count = select(
+        func.coalesce(func.sum(case((Document.verification_status == 'verified', 1), else_=0)), 0)
+    ).where(Document.user_id == User.id).scalar_subquery()
+    avg_confidence = select(func.avg(Document.ocr_confidence)).where(Document.user_id == User.id).scalar_subquery()
+    latest_score = select(func.max(CareerScore.id)).where(CareerScore.user_id == User.id).scalar_subquery()
+    soft_skill_courses = select(func.count(UserCourse.id)).join(Course, UserCourse.course_id == Course.id).where(
+        UserCourse.user_id == User.id,
+        UserCourse.status == 'completed',
+        Course.category == 'soft_skill',
+    ).scalar_subquery()
+
+    query = select(User.id, doc_count, verified_count, avg_confidence, latest_score, soft_skill_courses, func.now())
+    # Always a WHERE: SQLite would otherwise parse the upsert's ON CONFLICT as a join constraint
+    return query.where(User.id.in_(list(user_ids)) if user_ids is not None else true())
+
+
+_COLUMNS = ['user_id', 'doc_count', 'verified_count', 'avg_ocr_confidence',
+            'latest_score_id', 'completed_soft_skill_courses', 'updated_at']
+
+_UPSERT_DIALECTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def _lock_users(connection: Connection, user_ids: Optional[Iterable[int]]):
+    """Serialize counter refreshes per user; a no-op on SQLite, which locks the whole database"""
+    query = select(User.id).order_by(User.id).with_for_update(key_share=True)
+    if user_ids is not None:
+        query = query.where(User.id.in_(user_ids))
+    connection.execute(query).all()
+
+
+def rebuild_counters(connection: Connection, user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the counters of `user_ids` (every user when None) on the given
+    connection, inside its current transaction. Returns the number of rows written.
+    """
+    if user_ids is not None:
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return 0
+
+    _lock_users(connection, user_ids)
+
+    dialect_insert = _UPSERT_DIALECTS.get(connection.dialect.name)
+    if dialect_insert is None:
+        stale = delete(UserCounters)
+        if user_ids is not None:
+            stale = stale.where(UserCounters.user_id.in_(user_ids))
+        connection.execute(stale)
+        result = connection.execute(insert(UserCounters).from_select(_COLUMNS, _aggregate(user_ids)))
+        return max(result.rowcount, 0)
+
+    statement = dialect_insert(UserCounters).from_select(_COLUMNS, _aggregate(user_ids))
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserCounters.user_id],
+        set_={col: statement.excluded[col] for col in _COLUMNS[1:]},
+    )
+    result = connection.execute(statement)
+    return max(result.rowcount, 0)
+
+
+def get_counters(db: Session, user_id: int) -> Optional[ProgressCounters]:
+    """The user's counters row, or None when it was never built"""
+    # Columns rather than the entity, so an identity-mapped row is never served stale
+    row = db.execute(
+        select(
+            UserCounters.doc_count,
+            UserCounters.verified_count,
+            UserCounters.avg_ocr_confidence,
+            UserCounters.latest_score_id,
+            UserCounters.completed_soft_skill_courses,
+        ).where(UserCounters.user_id == user_id)
+    ).first()
+    return ProgressCounters(*row) if row is not None else None
+
+
+# Columns whose changes move a counter; other updates (e.g. ocr_text) skip the rebuild
+_WATCHED_COLUMNS = {
+    Document: ('user_id', 'ocr_confidence', 'verification_status'),
+    CareerScore: ('user_id',),
+    UserCourse: ('user_id', 'course_id', 'status'),
+}
+
+
+def _changed_users(session: Session) -> Set[int]:
+    user_ids: Set[int] = set()
+    course_ids: Set[int] = set()
+
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif type(obj) in _WATCHED_COLUMNS:
+            user_ids.add(obj.user_id)
+
+    for obj in session.dirty:
+        state = inspect(obj)
+        if isinstance(obj, Course):
+            if state.attrs.category.history.has_changes():
+                course_ids.add(obj.id)
+            continue
+        watched = _WATCHED_COLUMNS.get(type(obj))
+        if not watched or not any(state.attrs[col].history.has_changes() for col in watched):
+            continue
+        # A moved row changes both its old and its new owner
+        history = state.attrs.user_id.history
+        user_ids.update(history.deleted or ())
+        user_ids.add(obj.user_id)
+
+    if course_ids:
+        enrolled = select(UserCourse.user_id).where(UserCourse.course_id.in_(course_ids))
+        user_ids.update(session.connection().execute(enrolled).scalars())
+    user_ids.discard(None)
+    return user_ids
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_after_flush(session: Session, flush_context):
+    user_ids = _changed_users(session)
+    if user_ids:
+        rebuild_counters(session.connection(), user_ids)
@@ -1,10 +1,18 @@
-from typing import List, Dict
-from app.services.embeddings_service import top_k
+from typing import List, Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.embeddings_service import search
 from app.services.kb_service import load_kb
 
-def retrieve_roles(query: str, k: int = 5) -> List[Dict]:
+def retrieve_roles_scored(query: str, k: int = 5, min_score: Optional[float] = None) -> List[Tuple[Dict, float]]:
+    """
+    Up to k (KB role, similarity) pairs, best first. Roles below min_score
+    (default RAG_MIN_SIMILARITY) are cut off so they never reach the prompt;
+    the best match is always kept.
+    """
+    min_score = (settings.RAG_MIN_SIMILARITY if min_score is None else min_score) or None
     df = load_kb()
     records = df.to_dict(orient='records')
-    idxs = top_k(query, k)
-    return [records[i] for i in idxs]
+    return [(records[i], score) for i, score in search(query, k, min_score=min_score, keep=1)]
 
+def retrieve_roles(query: str, k: int = 5, min_score: Optional[float] = None) -> List[Dict]:
+    return [role for role, _ in retrieve_roles_scored(query, k, min_score)]
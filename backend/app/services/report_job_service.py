@@ -0,0 +1,361 @@
+"""
+Report Jobs - Background report generation with persisted per-stage progress
+
+/reports/generate creates a queued Report row and returns at once. A local
+thread pool runs the stages (score, recommend, retrieve_roles, summarize,
+render) and records each stage's status, attempts and duration on the row,
+so clients can poll it. A failing stage is retried with backoff. Cancelling
+takes effect before the next stage starts.
+
+Several worker processes may share the reports table. A worker runs a job
+only after claiming it with one conditional UPDATE (owner + lease), and
+renews the lease of its running jobs from a heartbeat thread. Jobs that
+were never claimed, or whose owner stopped heartbeating for
+REPORT_JOB_LEASE_SECONDS, are taken over at startup and by the heartbeat;
+a live worker's jobs are never run twice.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.report import Report
+from app.models.user import User
+from app.services.gpt_service import summarize
+from app.services.rag_service import retrieve_roles
+from app.services.report_service import create_professional_pdf_report, render_report, save_report
+from app.services.score_cache import get_or_compute_score
+from app.services.scoring_service import recommend
+from app.services.student_service import get_by_user_id
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('queued', 'running')
+FINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+# Unique per process, so a restarted worker never mistakes old leases for its own
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLost(Exception):
+    """Another worker took the job over after this one's lease expired"""
+
+
+def _stage_score(db: Session, job: Report, ctx: Dict[str, Any]):
+    (s, strengths, improvements, breakdown, confidence), _ = get_or_compute_score(db, ctx['profile'], persist=False)
+    ctx.update(score=s, strengths=strengths, improvements=improvements, breakdown=breakdown, confidence=confidence)
+
+
+def _stage_recommend(db: Session, job: Report, ctx: Dict[str, Any]):
+    ctx['job_roles'], ctx['skills_to_learn'] = recommend(db, ctx['profile'])
+
+
+def _stage_retrieve_roles(db: Session, job: Report, ctx: Dict[str, Any]):
+    profile = ctx['profile']
+    query = f"{profile.skills or ''} {profile.interests or ''}".strip() or 'software developer'
+    ctx['roles'] = retrieve_roles(query, k=5)
+
+
+def _stage_summarize(db: Session, job: Report, ctx: Dict[str, Any]):
+    profile = ctx['profile']
+    profile_dict = {
+        'skills': profile.skills or '',
+        'interests': profile.interests or '',
+        'education_level': profile.education_level or '',
+        'bio': profile.bio or ''
+    }
+    ctx['ai_summary'] = summarize(profile_dict, ctx['roles'])
+
+
+def _stage_render(db: Session, job: Report, ctx: Dict[str, Any]):
+    profile, user, ai_summary = ctx['profile'], ctx['user'], ctx['ai_summary']
+    context = {
+        "name": getattr(user, 'name', 'Student'),
+        "email": getattr(user, 'email', 'Not provided'),
+        "education_level": profile.education_level or "Not specified",
+        "skills": profile.skills or "",
+        "interests": profile.interests or "",
+        "bio": profile.bio or "",
+        "score": ctx['score'],
+        "breakdown": ctx['breakdown'],
+        "confidence": ctx['confidence'],
+        "strengths": ctx['strengths'],
+        "improvements": ctx['improvements'],
+        "job_roles": ctx['job_roles'],
+        "skills_to_learn": ctx['skills_to_learn'],
+        "career_path": ai_summary.get('career_path', ''),
+        "next_steps": ai_summary.get('next_steps', []),
+        "market_insights": ai_summary.get('market_insights', ''),
+        "detailed_recommendations": ai_summary.get('detailed_recommendations', []),
+        "detailed_skills": ai_summary.get('detailed_skills', [])
+    }
+    if job.format == 'pdf':
+        create_professional_pdf_report(db, job.user_id, context, report=job)
+    else:
+        save_report(db, job.user_id, render_report(context), report=job)
+
+
+STAGES: List[Tuple[str, Callable[[Session, Report, Dict[str, Any]], None]]] = [
+    ('score', _stage_score),
+    ('recommend', _stage_recommend),
+    ('retrieve_roles', _stage_retrieve_roles),
+    ('summarize', _stage_summarize),
+    ('render', _stage_render),
+]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_heartbeat: Optional[threading.Thread] = None
+_stop = threading.Event()
+_queued: Set[int] = set()  # submitted to this process's pool and not finished yet
+_running: Set[int] = set()  # claimed by this process; leases renewed by the heartbeat
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _heartbeat
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.REPORT_JOB_WORKERS, thread_name_prefix="report-job")
+        if _heartbeat is None or not _heartbeat.is_alive():
+            _stop.clear()
+            _heartbeat = threading.Thread(target=_heartbeat_loop, name="report-job-heartbeat", daemon=True)
+            _heartbeat.start()
+        return _executor
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _lease_until() -> datetime:
+    return _now() + timedelta(seconds=settings.REPORT_JOB_LEASE_SECONDS)
+
+
+def _claimable(now: datetime):
+    """Jobs no live worker holds: never claimed, or the owner's lease ran out"""
+    return or_(Report.owner.is_(None), Report.lease_expires_at.is_(None), Report.lease_expires_at < now)
+
+
+def _claim(db: Session, report_id: int) -> bool:
+    """Take ownership of an active job in one conditional UPDATE; False if another worker holds it"""
+    claimed = db.query(Report).filter(
+        Report.id == report_id,
+        Report.status.in_(ACTIVE_STATUSES),
+        _claimable(_now()),
+    ).update({Report.owner: WORKER_ID, Report.lease_expires_at: _lease_until(), Report.status: 'running'},
+             synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+def _renew_leases(job_ids: Iterable[int]):
+    job_ids = list(job_ids)
+    if not job_ids:
+        return
+    db = SessionLocal()
+    try:
+        db.query(Report).filter(Report.id.in_(job_ids), Report.owner == WORKER_ID).update(
+            {Report.lease_expires_at: _lease_until()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _heartbeat_loop():
+    interval = settings.REPORT_JOB_LEASE_SECONDS / 3
+    while not _stop.wait(interval):
+        try:
+            _renew_leases(set(_running))
+            _enqueue_claimable()
+        except Exception as e:
+            logger.warning(f"Report job heartbeat failed: {e}")
+
+
+def _initial_stages() -> List[Dict[str, Any]]:
+    return [{'name': name, 'status': 'pending', 'attempts': 0, 'seconds': None, 'error': None} for name, _ in STAGES]
+
+
+def _set_stage(db: Session, job: Report, index: int, **fields):
+    # JSON columns only persist on reassignment, so copy before mutating
+    stages = [dict(stage) for stage in job.stages]
+    stages[index].update(fields)
+    job.stages = stages
+    db.commit()
+
+
+def _finish(db: Session, job: Report, status: str, error: Optional[str] = None):
+    job.status = status
+    job.error = error
+    job.stage = None
+    job.lease_expires_at = None
+    job.finished_at = _now()
+    db.commit()
+
+
+def _check_cancelled(db: Session, job: Report):
+    db.refresh(job, attribute_names=['cancel_requested', 'owner'])
+    if job.owner != WORKER_ID:
+        raise JobLost()
+    if job.cancel_requested:
+        raise JobCancelled()
+
+
+def run_job(report_id: int):
+    """Claim one job and run every stage of it; called on a pool thread"""
+    db = SessionLocal()
+    try:
+        if not _claim(db, report_id):
+            return
+        _running.add(report_id)
+        job = db.query(Report).filter(Report.id == report_id).first()
+        if job.cancel_requested:
+            return _finish(db, job, 'cancelled')
+
+        # A job taken over from a dead worker starts again from the first stage
+        job.stages = _initial_stages()
+        db.commit()
+
+        profile = get_by_user_id(db, job.user_id)
+        if profile is None:
+            return _finish(db, job, 'failed', 'Profile not found')
+        ctx: Dict[str, Any] = {'profile': profile, 'user': db.query(User).filter(User.id == job.user_id).first()}
+
+        for index, (name, stage) in enumerate(STAGES):
+            job.stage = name
+            _set_stage(db, job, index, status='running')
+            for attempt in range(1, settings.REPORT_JOB_MAX_ATTEMPTS + 1):
+                _check_cancelled(db, job)
+                started = time.perf_counter()
+                try:
+                    stage(db, job, ctx)
+                    _set_stage(db, job, index, status='completed', attempts=attempt,
+                               seconds=round(time.perf_counter() - started, 3), error=None)
+                    break
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Report {report_id} stage '{name}' attempt {attempt} failed: {e}")
+                    if attempt == settings.REPORT_JOB_MAX_ATTEMPTS:
+                        _set_stage(db, job, index, status='failed', attempts=attempt, error=str(e))
+                        return _finish(db, job, 'failed', f"{name}: {e}")
+                    _set_stage(db, job, index, attempts=attempt, error=str(e))
+                    time.sleep(settings.REPORT_JOB_RETRY_DELAY * attempt)
+
+        _finish(db, job, 'completed')
+        logger.info(f"Report {report_id} generated: {job.filename}")
+    except JobLost:
+        db.rollback()
+        logger.warning(f"Report {report_id} was taken over by another worker; stopping")
+    except JobCancelled:
+        db.rollback()
+        job.stages = [dict(s, status='cancelled') if s['status'] in ('pending', 'running') else s for s in job.stages]
+        _finish(db, job, 'cancelled')
+        logger.info(f"Report {report_id} cancelled")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Report job {report_id} crashed: {e}")
+        job = db.query(Report).filter(Report.id == report_id).first()
+        if job is not None and job.owner == WORKER_ID:
+            _finish(db, job, 'failed', str(e))
+    finally:
+        _running.discard(report_id)
+        db.close()
+
+
+def _run_queued(report_id: int):
+    try:
+        run_job(report_id)
+    finally:
+        _queued.discard(report_id)
+
+
+def _enqueue(job_ids: Iterable[int]) -> int:
+    """Submit jobs to this process's pool, skipping ones it already has queued"""
+    submitted = 0
+    for job_id in job_ids:
+        with _executor_lock:
+            if job_id in _queued:
+                continue
+            _queued.add(job_id)
+        _get_executor().submit(_run_queued, job_id)
+        submitted += 1
+    return submitted
+
+
+def _enqueue_claimable() -> int:
+    db = SessionLocal()
+    try:
+        job_ids = [job_id for (job_id,) in db.query(Report.id).filter(
+            Report.status.in_(ACTIVE_STATUSES), _claimable(_now())).order_by(Report.id)]
+    finally:
+        db.close()
+    return _enqueue(job_ids)
+
+
+def submit_report_job(db: Session, user_id: int, format: str = 'html') -> Report:
+    job = Report(user_id=user_id, format=format, status='queued', stages=_initial_stages())
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _enqueue([job.id])
+    return job
+
+
+def cancel_report_job(db: Session, job: Report) -> Report:
+    """Queued jobs are cancelled immediately; running ones stop before their next stage"""
+    if job.status in ACTIVE_STATUSES:
+        job.cancel_requested = True
+        if job.status == 'queued':
+            job.status = 'cancelled'
+            job.finished_at = _now()
+        db.commit()
+        db.refresh(job)
+    return job
+
+
+def resume_report_jobs() -> int:
+    """
+    Queue the active jobs no live worker holds (never claimed, or lease
+    expired). Jobs other running workers are heartbeating are left alone.
+    """
+    return _enqueue_claimable()
+
+
+def job_status(job: Report) -> Dict[str, Any]:
+    stages = job.stages or []
+    done = sum(1 for stage in stages if stage['status'] == 'completed')
+    return {
+        'id': job.id,
+        'status': job.status,
+        'format': job.format,
+        'stage': job.stage,
+        'progress': 1.0 if job.status == 'completed' else round(done / len(STAGES), 2),
+        'stages': stages,
+        'error': job.error,
+        'filename': job.filename,
+        'path': job.path,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
+
+
+def shutdown(wait: bool = False):
+    global _executor
+    _stop.set()
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+        _queued.clear()
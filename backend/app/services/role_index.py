@@ -0,0 +1,67 @@
+"""
+Role Index - Precompiled inverted index for target-role selection
+
+Built once per KB version so get_target_role_for_profile becomes a sparse
+lookup instead of a kb.iterrows() scan per score.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from app.services.kb_service import kb_derived
+
+# Columns that make up a role's matching text, in scan order
+ROLE_TEXT_COLUMNS = ('technical_skills', 'domain_skills', 'job_role')
+
+
+def role_text(row) -> str:
+    return ' '.join(str(row.get(col, '')) for col in ROLE_TEXT_COLUMNS).lower()
+
+
+class RoleIndex:
+    """token -> role ids, plus the distinct-token count of every role"""
+
+    def __init__(self, kb: pd.DataFrame):
+        self.kb = kb
+        postings: Dict[str, List[int]] = {}
+        token_counts = np.zeros(len(kb), dtype=np.float64)
+
+        # iterrows (not to_dict records) so values stringify exactly as the row scan did
+        for role_id, (_, row) in enumerate(kb.iterrows()):
+            role_words = set(role_text(row).split())
+            token_counts[role_id] = len(role_words)
+            for token in role_words:
+                postings.setdefault(token, []).append(role_id)
+
+        self.postings = {token: np.asarray(ids, dtype=np.int32) for token, ids in postings.items()}
+        # overlap / max(len(role_words), 1)
+        self.denominators = np.maximum(token_counts, 1.0)
+
+    def __len__(self) -> int:
+        return len(self.denominators)
+
+    def best_match(self, profile_text: str) -> Optional[int]:
+        """
+        Row position of the role with the highest overlap / len(role_words)
+        score, first row winning ties; None when nothing overlaps.
+        """
+        if not len(self):
+            return None
+        scores = self.scores(profile_text)
+        best = int(np.argmax(scores))
+        return best if scores[best] > 0 else None
+
+    def scores(self, profile_text: str) -> np.ndarray:
+        """overlap / len(role_words) for every role"""
+        hits = [self.postings[t] for t in set(profile_text.split()) if t in self.postings]
+        if not hits:
+            return np.zeros(len(self), dtype=np.float64)
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self))
+        return overlap / self.denominators
+
+    def role(self, role_id: int) -> Dict:
+        return self.kb.iloc[role_id].to_dict()
+
+
+def get_role_index() -> RoleIndex:
+    """Role index for the active KB, rebuilt when the KB version changes"""
+    return kb_derived('role_index', RoleIndex)
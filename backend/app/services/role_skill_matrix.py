@@ -0,0 +1,105 @@
+"""
+Role Skill Matrix - Precomputed role x skill incidence for recommend()
+
+Built once per KB version. A profile's match score against every role is one
+matrix-vector product instead of a per-row skill extraction and nested
+substring scan. The skill vocabulary is the built-in skill dictionary, so
+the matrix stays narrow and is kept dense.
+"""
+from typing import Dict, Iterable, List
+import numpy as np
+import pandas as pd
+from app.services.kb_service import kb_derived
+from app.services.role_index import role_text
+from app.services.skill_matcher import SkillMatcher, default_matcher
+
+
+def _covers(a: str, b: str) -> bool:
+    """The substring relation recommend() has always used between skills"""
+    return a in b or b in a
+
+
+class RoleSkillMatrix:
+    def __init__(self, kb: pd.DataFrame, matcher: SkillMatcher = None):
+        matcher = matcher or default_matcher()
+        self.vocab: List[str] = sorted(matcher.canonical_ids)
+        self.vocab_pos: Dict[str, int] = {s: i for i, s in enumerate(self.vocab)}
+
+        rows = [row for _, row in kb.iterrows()]
+        self.incidence = np.zeros((len(rows), len(self.vocab)), dtype=np.float32)
+        self.roles: List[Dict] = []
+        required: List[str] = []
+        required_offsets = [0]
+
+        for i, row in enumerate(rows):
+            role_dict = row.to_dict()
+            for skill in matcher.find(role_text(role_dict)):
+                self.incidence[i, self.vocab_pos[skill]] = 1.0
+
+            skills_required = role_dict.get('technical_skills', '')
+            self.roles.append({
+                'role': role_dict.get('job_role', 'Unknown Role'),
+                'level': role_dict.get('level', 'Entry'),
+                'salary': role_dict.get('average_salary', 'Not specified'),
+                'skills_required': skills_required,
+            })
+            if skills_required:
+                required.extend(skill.strip().lower() for skill in str(skills_required).split(','))
+            required_offsets.append(len(required))
+
+        self.role_skill_counts = self.incidence.sum(axis=1)
+        # covers[a, b]: a profile skill a counts as having role skill b
+        self.covers = np.array([[_covers(a, b) for b in self.vocab] for a in self.vocab], dtype=bool)
+
+        # Comma-separated technical skills of every role, for skill-gap derivation
+        self.required = required
+        self.required_offsets = np.asarray(required_offsets, dtype=np.int64)
+        self.required_covers = np.array(
+            [[_covers(v, req) for v in self.vocab] for req in required], dtype=bool
+        ).reshape(len(required), len(self.vocab))
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def _profile_ids(self, profile_skills: Iterable[str]) -> List[int]:
+        return [self.vocab_pos[s] for s in profile_skills if s in self.vocab_pos]
+
+    def match_scores(self, profile_skills: Iterable[str], fallback_scores: np.ndarray) -> np.ndarray:
+        """
+        matched role skills / role skills for every role; roles with no
+        recognised skills take their word-overlap score from fallback_scores
+        """
+        ids = self._profile_ids(profile_skills)
+        covered = self.covers[ids].any(axis=0).astype(np.float32) if ids else np.zeros(len(self.vocab), dtype=np.float32)
+        matched = (self.incidence @ covered).astype(np.float64)
+        has_skills = self.role_skill_counts > 0
+        scores = np.asarray(fallback_scores, dtype=np.float64).copy()
+        scores[has_skills] = matched[has_skills] / self.role_skill_counts[has_skills].astype(np.float64)
+        return scores
+
+    def top_roles(self, scores: np.ndarray, k: int = 5, threshold: float = 0.1) -> List[int]:
+        """Best k roles scoring above threshold, ties in KB order"""
+        candidates = np.flatnonzero(scores > threshold)
+        if len(candidates) > k:
+            # Everything tied with the k-th best stays in, so the stable order below is exact
+            kth = np.partition(scores[candidates], len(candidates) - k)[len(candidates) - k]
+            candidates = candidates[scores[candidates] >= kth]
+        order = np.lexsort((candidates, -scores[candidates]))
+        return [int(i) for i in candidates[order][:k]]
+
+    def missing_skills(self, role_ids: Iterable[int], profile_skills: Iterable[str]) -> List[str]:
+        """Required skills of the given roles that no profile skill covers"""
+        ids = self._profile_ids(profile_skills)
+        missing = []
+        for role_id in role_ids:
+            start, end = self.required_offsets[role_id], self.required_offsets[role_id + 1]
+            if start == end:
+                continue
+            covered = self.required_covers[start:end][:, ids].any(axis=1) if ids else np.zeros(end - start, dtype=bool)
+            missing.extend(self.required[j] for j in range(start, end) if not covered[j - start])
+        return missing
+
+
+def get_role_skill_matrix() -> RoleSkillMatrix:
+    """Role x skill matrix for the active KB, rebuilt when the KB version changes"""
+    return kb_derived('role_skill_matrix', RoleSkillMatrix)
@@ -0,0 +1,182 @@
+"""
+Score Cache - Reuses the last career score while nothing it depends on changed
+
+Every write to a user's Student, Document or UserCourse rows in this
+process bumps that user's version (mapper events below). A lookup whose
+version, scored profile fields and KB version all match the entry is a
+pure in-memory hit, with no database round-trip. Writes made by other
+worker processes do not fire this process's events, so an entry is also
+re-validated against a fingerprint of the database aggregates
+(load_scoring_inputs) once it is older than
+SCORE_CACHE_REVALIDATE_SECONDS.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.document import Document
+from app.models.student import Student
+from app.models.user_course import UserCourse
+from app.services.kb_service import get_kb_version
+from app.services.scoring_service import ScoringInputs, compute_score, load_scoring_inputs, persist_score
+
+# Student columns that feed the scoring formulas
+SCORED_PROFILE_FIELDS = (
+    'skills', 'interests', 'bio', 'education_level', 'experience_years', 'name',
+    'contact_email', 'career_direction', 'linkedin_url', 'github_url',
+)
+
+
+class Entry(NamedTuple):
+    version: int  # user's write version when the score was computed
+    profile_key: str  # scored profile fields + KB version; checked without the database
+    fingerprint: str  # profile_key + database aggregates; the cross-worker check
+    result: tuple
+    persisted: bool
+    checked_at: float  # monotonic time the fingerprint was last confirmed
+
+
+_entries: "OrderedDict[int, Entry]" = OrderedDict()
+_versions: Dict[int, int] = {}
+_lock = threading.Lock()
+_stats = {'hits': 0, 'revalidated_hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _hash(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, default=str).encode('utf-8')).hexdigest()
+
+
+def profile_key(profile: Any) -> str:
+    return _hash([profile.user_id, [getattr(profile, field, None) for field in SCORED_PROFILE_FIELDS],
+                  get_kb_version()])
+
+
+def fingerprint(profile: Any, inputs: ScoringInputs) -> str:
+    return _hash([profile_key(profile), list(inputs)])
+
+
+def version(user_id: int) -> int:
+    with _lock:
+        return _versions.get(user_id, 0)
+
+
+def _lookup(user_id: int, version_: int, key: str, require_persisted: bool) -> Optional[Entry]:
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is None or entry.version != version_ or entry.profile_key != key \
+                or (require_persisted and not entry.persisted):
+            return None
+        _entries.move_to_end(user_id)
+        return entry
+
+
+def _count(stat: str):
+    with _lock:
+        _stats[stat] += 1
+
+
+def put(user_id: int, entry: Entry):
+    """Store unless the user was written to since entry.version was read (the result may be stale)"""
+    with _lock:
+        if _versions.get(user_id, 0) != entry.version:
+            return
+        _entries[user_id] = entry._replace(result=copy.deepcopy(entry.result))
+        _entries.move_to_end(user_id)
+        while len(_entries) > settings.SCORE_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def _confirm(user_id: int, entry: Entry):
+    with _lock:
+        if _entries.get(user_id) is entry:
+            _entries[user_id] = entry._replace(checked_at=time.monotonic())
+
+
+def invalidate(user_id: int):
+    with _lock:
+        _versions[user_id] = _versions.get(user_id, 0) + 1
+        if _entries.pop(user_id, None) is not None:
+            _stats['invalidations'] += 1
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def cache_stats() -> Dict[str, Any]:
+    with _lock:
+        hits = _stats['hits'] + _stats['revalidated_hits']
+        lookups = hits + _stats['misses']
+        return {
+            **_stats,
+            'entries': len(_entries),
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def get_or_compute_score(db: Session, profile: Any, persist: bool = True) -> Tuple[tuple, bool]:
+    """
+    compute_score (and persist_score when `persist`) unless an identical
+    profile/evidence/KB state was already scored. Returns (result, cached).
+    """
+    user_id = profile.user_id
+    current = version(user_id)
+    key = profile_key(profile)
+    inputs = None
+
+    entry = _lookup(user_id, current, key, require_persisted=persist)
+    if entry is not None:
+        if time.monotonic() - entry.checked_at < settings.SCORE_CACHE_REVALIDATE_SECONDS:
+            _count('hits')
+            return copy.deepcopy(entry.result), True
+        inputs = load_scoring_inputs(db, user_id)
+        if fingerprint(profile, inputs) == entry.fingerprint:
+            _confirm(user_id, entry)
+            _count('revalidated_hits')
+            return copy.deepcopy(entry.result), True
+    _count('misses')
+
+    if inputs is None:
+        inputs = load_scoring_inputs(db, user_id)
+    checked_at = time.monotonic()
+    result = compute_score(db, profile, inputs)
+    final, strengths, improvements, breakdown, confidence = result
+    if persist:
+        persist_score(db, user_id, final, breakdown, confidence)
+
+    # Stored only once persisting succeeded, so persisted=True entries always have a row
+    put(user_id, Entry(current, key, fingerprint(profile, inputs), result, persist, checked_at))
+    return result, False
+
+
+# Columns whose changes can move a score; other updates (e.g. journey_stage) keep the entry
+_WATCHED_COLUMNS = {
+    Student: SCORED_PROFILE_FIELDS,
+    Document: ('user_id', 'ocr_confidence', 'verification_status'),
+    UserCourse: ('user_id', 'course_id', 'status'),
+}
+
+
+def _invalidate_target(mapper, connection, target):
+    user_id = getattr(target, 'user_id', None)
+    if user_id is not None:
+        invalidate(user_id)
+
+
+def _invalidate_on_change(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[col].history.has_changes() for col in _WATCHED_COLUMNS[mapper.class_]):
+        _invalidate_target(mapper, connection, target)
+
+
+for _model in _WATCHED_COLUMNS:
+    event.listen(_model, 'after_insert', _invalidate_target)
+    event.listen(_model, 'after_delete', _invalidate_target)
+    event.listen(_model, 'after_update', _invalidate_on_change)
@@ -1,12 +1,13 @@
 from sqlalchemy.orm import Session
 # Models imported inside functions to avoid circular dependency
-from app.services.kb_service import load_kb
-from app.services.document_service import list_documents
+from app.services.role_index import get_role_index
+from app.services.skill_matcher import extract_skills
+from app.services.role_skill_matrix import get_role_skill_matrix
+from app.services.progress_counters import get_counters
 from app.core.exceptions import ScoringError, ProfileNotFoundError, KnowledgeBaseError
-import pandas as pd
-import re
 import logging
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, NamedTuple, Optional
+from sqlalchemy import case, func, select
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -21,25 +22,10 @@ def _norm(x: float) -> float:
     return max(0.0, min(1.0, x))
 
 def _extract_skills_from_text(text: str) -> List[str]:
-    """Extract skills from text using common patterns"""
+    """Extract skills from text using the shared single-pass skill matcher"""
     if not text:
         return []
-    
-    # Common technical skills patterns
-    skills_patterns = [
-        r'\b(python|java|javascript|react|angular|vue|node\.?js|sql|mysql|postgresql|mongodb|docker|kubernetes|aws|azure|gcp|git|github|html|css|bootstrap|tailwind)\b',
-        r'\b(machine learning|ml|artificial intelligence|ai|data science|data analysis|deep learning|tensorflow|pytorch|pandas|numpy|scikit-learn)\b',
-        r'\b(project management|agile|scrum|kanban|jira|confluence|slack|teams|communication|leadership|problem solving)\b'
-    ]
-    
-    found_skills = []
-    text_lower = text.lower()
-    
-    for pattern in skills_patterns:
-        matches = re.findall(pattern, text_lower, re.IGNORECASE)
-        found_skills.extend(matches)
-    
-    return list(set(found_skills))
+    return extract_skills(text)
 
 def calculate_degree_score(education_level: str) -> float:
     """Calculate degree score based on education level"""
@@ -142,12 +128,8 @@ def calculate_practical_score(profile: Any) -> float:
     
     return _norm(evidence_score)
 
-def calculate_soft_skills_score(db: Session, profile: Any) -> float:
-    """Calculate Soft Skill Score (SS) = Base + Course Boost"""
-    from app.models.course import Course
-    from app.models.user_course import UserCourse
-    
-    # 1. Base Soft Skill Score (SS_base) - Max 0.7
+def soft_skills_base(profile: Any) -> float:
+    """Base Soft Skill Score (SS_base) from profile text - Max 0.7"""
     ss_base = 0.0
     
     # Check for soft skills mentions in profile
@@ -163,16 +145,10 @@ def calculate_soft_skills_score(db: Session, profile: Any) -> float:
             ss_base += 0.05
             
     # Cap base score at 0.7
-    ss_base = min(0.7, ss_base)
-    
-    # 2. Soft Skill Course Boost (SS_course)
-    # Count completed soft skill courses
-    completed_courses = db.query(UserCourse).join(Course).filter(
-        UserCourse.user_id == profile.user_id,
-        UserCourse.status == 'completed',
-        Course.category == 'soft_skill'
-    ).count()
-    
+    return min(0.7, ss_base)
+
+def soft_skills_score(ss_base: float, completed_courses: int) -> float:
+    """SS = min(SS_base + SS_course, 0.99)"""
     # Each course contributes ~0.03 (to reach ~0.3 with 10 courses)
     ss_course = (completed_courses / 10) * 0.29
     
@@ -212,24 +188,8 @@ def calculate_market_factors(profile: Any, target_role: Dict) -> Tuple[float, fl
     
     return _norm(market_factor), role_demand, role_difficulty, salary_fit
 
-def calculate_meta_factors(db: Session, user_id: int, profile: Any) -> Tuple[float, float, float]:
-    """Calculate Meta Factor = (0.8 * EC) + (0.2 * DC)"""
-    # Evidence Confidence (EC)
-    documents = list_documents(db, user_id)
-    avg_confidence = 0.5  # Default start
-    
-    if documents:
-        confidences = [doc.ocr_confidence for doc in documents if doc.ocr_confidence is not None]
-        if confidences:
-            avg_confidence = sum(confidences) / len(confidences)
-            # Boost if verified
-            verified_count = sum(1 for doc in documents if doc.verification_status == 'verified')
-            if verified_count > 0:
-                avg_confidence += 0.2
-    
-    evidence_confidence = _norm(avg_confidence)
-    
-    # Data Completeness (DC)
+def profile_completeness(profile: Any) -> float:
+    """Data Completeness (DC) contribution of the profile fields (documents add 0.2 on top)"""
     completeness_score = 0.0
     if profile.education_level: completeness_score += 0.1
     if profile.skills and len(profile.skills) > 10: completeness_score += 0.1
@@ -239,7 +199,28 @@ def calculate_meta_factors(db: Session, user_id: int, profile: Any) -> Tuple[flo
     if profile.contact_email: completeness_score += 0.1
     if profile.career_direction: completeness_score += 0.1
     if profile.linkedin_url: completeness_score += 0.1
-    if documents: completeness_score += 0.2
+    return completeness_score
+
+def meta_factors_from_evidence(profile: Any, doc_count: int, avg_ocr_confidence: Optional[float],
+                               verified_count: int) -> Tuple[float, float, float]:
+    """
+    Meta Factor = (0.8 * EC) + (0.2 * DC) from document aggregates.
+    avg_ocr_confidence is None when no document has an OCR confidence yet.
+    """
+    # Evidence Confidence (EC)
+    avg_confidence = 0.5  # Default start
+    
+    if doc_count and avg_ocr_confidence is not None:
+        avg_confidence = avg_ocr_confidence
+        # Boost if verified
+        if verified_count > 0:
+            avg_confidence += 0.2
+    
+    evidence_confidence = _norm(avg_confidence)
+    
+    # Data Completeness (DC)
+    completeness_score = profile_completeness(profile)
+    if doc_count: completeness_score += 0.2
     
     data_completeness = _norm(completeness_score)
     
@@ -248,44 +229,82 @@ def calculate_meta_factors(db: Session, user_id: int, profile: Any) -> Tuple[flo
     
     return _norm(meta_factor), evidence_confidence, data_completeness
 
+class ScoringInputs(NamedTuple):
+    """Database aggregates a score needs for one user"""
+    completed_soft_skill_courses: int
+    doc_count: int
+    avg_ocr_confidence: Optional[float]  # None when no document has a confidence yet
+    verified_count: int
+
+def load_scoring_inputs(db: Session, user_id: int) -> ScoringInputs:
+    """
+    Fetch every aggregate scoring needs in one round-trip: the user's
+    materialized counters row, or the aggregate over documents and courses
+    when it has not been built yet. Only the columns being aggregated are
+    touched, so OCR text blobs are never loaded.
+    """
+    counters = get_counters(db, user_id)
+    if counters is not None:
+        return ScoringInputs(
+            completed_soft_skill_courses=counters.completed_soft_skill_courses,
+            doc_count=counters.doc_count,
+            avg_ocr_confidence=counters.avg_ocr_confidence,
+            verified_count=counters.verified_count,
+        )
+    
+    from app.models.course import Course
+    from app.models.document import Document
+    from app.models.user_course import UserCourse
+    
+    completed_courses = select(func.count(UserCourse.id)).join(Course, UserCourse.course_id == Course.id).where(
+        UserCourse.user_id == user_id,
+        UserCourse.status == 'completed',
+        Course.category == 'soft_skill'
+    ).scalar_subquery()
+    
+    doc_count, avg_confidence, verified_count, course_count = db.query(
+        func.count(Document.id),
+        func.avg(Document.ocr_confidence),
+        func.sum(case((Document.verification_status == 'verified', 1), else_=0)),
+        completed_courses,
+    ).filter(Document.user_id == user_id).one()
+    
+    return ScoringInputs(
+        completed_soft_skill_courses=int(course_count or 0),
+        doc_count=int(doc_count or 0),
+        avg_ocr_confidence=float(avg_confidence) if avg_confidence is not None else None,
+        verified_count=int(verified_count or 0),
+    )
+
 def get_target_role_for_profile(profile: Any) -> Dict:
     """Get the most suitable target role based on profile"""
-    kb = load_kb()
+    index = get_role_index()
     
-    # Simple matching based on skills and interests
+    # Simple word overlap scoring against the precompiled role index
     profile_text = f"{profile.skills or ''} {profile.interests or ''} {profile.bio or ''}".lower()
     
-    best_match = None
-    best_score = 0
-    
-    for _, row in kb.iterrows():
-        role_text = f"{row.get('technical_skills', '')} {row.get('domain_skills', '')} {row.get('job_role', '')}".lower()
-        
-        # Simple word overlap scoring
-        profile_words = set(profile_text.split())
-        role_words = set(role_text.split())
-        
-        overlap = len(profile_words & role_words)
-        score = overlap / max(len(role_words), 1)
-        
-        if score > best_score:
-            best_score = score
-            best_match = row.to_dict()
-    
-    return best_match or {}
+    best = index.best_match(profile_text)
+    return index.role(best) if best is not None else {}
+
+def target_role_skills(target_role: Dict) -> List[str]:
+    """Comma-separated technical skills of the target role"""
+    if target_role and 'technical_skills' in target_role:
+        tech_skills = str(target_role['technical_skills'])
+        return [skill.strip() for skill in tech_skills.split(',') if skill.strip()]
+    return []
 
-def calculate_metrics(db: Session, profile: Any) -> dict:
+def calculate_metrics(db: Session, profile: Any, inputs: Optional[ScoringInputs] = None) -> dict:
     """Calculate all metrics according to Updated Framework"""
     # Get target role
     target_role = get_target_role_for_profile(profile)
-    target_skills = []
+    target_skills = target_role_skills(target_role)
     
-    if target_role and 'technical_skills' in target_role:
-        tech_skills = str(target_role['technical_skills'])
-        target_skills = [skill.strip() for skill in tech_skills.split(',') if skill.strip()]
+    # Course and document aggregates in a single query
+    if inputs is None:
+        inputs = load_scoring_inputs(db, profile.user_id)
     
     # Calculate Layer 1: Core Readiness Factors
-    soft_skills = calculate_soft_skills_score(db, profile)  # SS
+    soft_skills = soft_skills_score(soft_skills_base(profile), inputs.completed_soft_skill_courses)  # SS
     domain_score = calculate_domain_score(profile, target_skills)  # DS
     practical_score = calculate_practical_score(profile)  # P
     
@@ -293,7 +312,9 @@ def calculate_metrics(db: Session, profile: Any) -> dict:
     market_factor, role_demand, role_difficulty, salary_fit = calculate_market_factors(profile, target_role)
     
     # Calculate Layer 3: Meta Factors
-    meta_factor, evidence_confidence, data_completeness = calculate_meta_factors(db, profile.user_id, profile)
+    meta_factor, evidence_confidence, data_completeness = meta_factors_from_evidence(
+        profile, inputs.doc_count, inputs.avg_ocr_confidence, inputs.verified_count
+    )
     
     # Legacy metrics for backward compatibility
     degree_score = calculate_degree_score(profile.education_level)
@@ -317,7 +338,7 @@ def calculate_metrics(db: Session, profile: Any) -> dict:
         'target_role': target_role
     }
 
-def compute_score(db: Session, profile: Any) -> tuple[int, list[str], list[str], dict, float]:
+def compute_score(db: Session, profile: Any, inputs: Optional[ScoringInputs] = None) -> tuple[int, list[str], list[str], dict, float]:
     """Compute career readiness score according to Updated Framework"""
     try:
         if not profile:
@@ -326,7 +347,7 @@ def compute_score(db: Session, profile: Any) -> tuple[int, list[str], list[str],
         logger.info(f"Computing career score for user {profile.user_id}")
         
         # Calculate all metrics
-        m = calculate_metrics(db, profile)
+        m = calculate_metrics(db, profile, inputs)
         
         # CoreScore = (0.60 * SS) + (0.25 * DS) + (0.15 * P)
         core_score = (0.60 * m['SS']) + (0.25 * m['DS']) + (0.15 * m['P'])
@@ -410,58 +431,23 @@ def persist_score(db: Session, user_id: int, final: int, breakdown: dict, confid
 
 def recommend(db: Session, profile: Any) -> tuple[list[str], list[str]]:
     """Generate job recommendations and skill gaps based on profile and KB"""
-    kb = load_kb()
+    matrix = get_role_skill_matrix()
     
     # Get profile skills and interests
     profile_text = f"{profile.skills or ''} {profile.interests or ''} {profile.bio or ''}".lower()
     profile_skills = _extract_skills_from_text(profile_text)
     
-    # Find matching roles from KB
-    role_matches = []
+    # Score every KB role at once; roles without recognised skills fall back to word overlap
+    scores = matrix.match_scores(profile_skills, get_role_index().scores(profile_text))
     
-    for _, row in kb.iterrows():
-        role_dict = row.to_dict()
-        role_text = f"{role_dict.get('technical_skills', '')} {role_dict.get('domain_skills', '')} {role_dict.get('job_role', '')}".lower()
-        
-        # Calculate match score
-        role_skills = _extract_skills_from_text(role_text)
-        
-        if role_skills:
-            matched_skills = sum(1 for skill in role_skills if any(ps in skill or skill in ps for ps in profile_skills))
-            match_score = matched_skills / len(role_skills) if role_skills else 0
-        else:
-            # Fallback to text similarity
-            profile_words = set(profile_text.split())
-            role_words = set(role_text.split())
-            match_score = len(profile_words & role_words) / max(len(role_words), 1)
-        
-        if match_score > 0.1:  # Minimum threshold
-            role_matches.append({
-                'role': role_dict.get('job_role', 'Unknown Role'),
-                'level': role_dict.get('level', 'Entry'),
-                'salary': role_dict.get('average_salary', 'Not specified'),
-                'skills_required': role_dict.get('technical_skills', ''),
-                'match_score': match_score
-            })
-    
-    # Sort by match score and take top 5
-    role_matches.sort(key=lambda x: x['match_score'], reverse=True)
-    top_roles = role_matches[:5]
+    # Top 5 roles above the minimum threshold
+    top_roles = matrix.top_roles(scores, k=5, threshold=0.1)
     
     # Extract job names
-    job_recommendations = [role['role'] for role in top_roles]
+    job_recommendations = [matrix.roles[i]['role'] for i in top_roles]
     
     # Calculate skill gaps
-    skills_to_learn = set()
-    
-    for role in top_roles:
-        required_skills = role['skills_required']
-        if required_skills:
-            role_skills = [skill.strip().lower() for skill in required_skills.split(',')]
-            for skill in role_skills:
-                # Check if skill is missing from profile
-                if not any(ps in skill or skill in ps for ps in profile_skills):
-                    skills_to_learn.add(skill.title())
+    skills_to_learn = {skill.title() for skill in matrix.missing_skills(top_roles, profile_skills)}
     
     # Add some common high-value skills if missing
     common_skills = ['SQL', 'Python', 'Git', 'Communication', 'Problem Solving']
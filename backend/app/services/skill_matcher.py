@@ -0,0 +1,137 @@
+"""
+Skill Matcher - Single-pass multi-pattern skill extraction
+
+Skill terms are compiled into a token trie once. Text is tokenized a single
+time and every term is found by walking the trie from each token, so the
+cost grows with the text length, not with the size of the dictionary.
+Matching follows the old regex semantics: case-insensitive, whole words
+(word boundaries at both ends), exact separators inside multi-word terms.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import pandas as pd
+from app.services.kb_service import kb_derived
+
+_WORD_RE = re.compile(r'\w+')
+_END = None  # trie key holding the terms that end at a node
+
+# Built-in dictionary: canonical skill id -> surface forms
+DEFAULT_SKILLS: Dict[str, List[str]] = {
+    # Technical
+    **{s: [s] for s in [
+        'python', 'java', 'javascript', 'react', 'angular', 'vue', 'sql', 'mysql', 'postgresql',
+        'mongodb', 'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'git', 'github', 'html', 'css',
+        'bootstrap', 'tailwind'
+    ]},
+    'node.js': ['node.js', 'nodejs'],
+    # Data / AI
+    **{s: [s] for s in [
+        'machine learning', 'ml', 'artificial intelligence', 'ai', 'data science', 'data analysis',
+        'deep learning', 'tensorflow', 'pytorch', 'pandas', 'numpy', 'scikit-learn'
+    ]},
+    # Process / soft
+    **{s: [s] for s in [
+        'project management', 'agile', 'scrum', 'kanban', 'jira', 'confluence', 'slack', 'teams',
+        'communication', 'leadership', 'problem solving'
+    ]},
+}
+
+
+def _compile_term(term: str) -> Optional[Tuple[List[str], str, str]]:
+    """
+    Split a term into trie keys: the first word, then separator+word for each
+    following word. Leading/trailing punctuation ('.net', 'c++') is returned
+    separately and checked around the match.
+    """
+    words = list(_WORD_RE.finditer(term))
+    if not words:
+        return None
+    keys = [words[0].group()]
+    for prev, cur in zip(words, words[1:]):
+        keys.append(term[prev.end():cur.end()])
+    return keys, term[:words[0].start()], term[words[-1].end():]
+
+
+class SkillMatcher:
+    def __init__(self, skills: Dict[str, Iterable[str]]):
+        self._root: Dict = {}
+        self.size = 0
+        self.canonical_ids: Set[str] = set()
+        for canonical, forms in skills.items():
+            for form in forms:
+                self.add(form.lower().strip(), canonical)
+
+    @classmethod
+    def from_terms(cls, terms: Iterable[str]) -> 'SkillMatcher':
+        """Dictionary where every term is its own canonical id"""
+        return cls({t.lower().strip(): [t] for t in terms if t and t.strip()})
+
+    def add(self, form: str, canonical: str):
+        compiled = _compile_term(form)
+        if compiled is None:
+            return
+        keys, prefix, suffix = compiled
+        node = self._root
+        for key in keys:
+            node = node.setdefault(key, {})
+        node.setdefault(_END, []).append((prefix, suffix, canonical))
+        self.canonical_ids.add(canonical)
+        self.size += 1
+
+    def find(self, text: str) -> Set[str]:
+        """Canonical ids of every dictionary term occurring in text"""
+        if not text:
+            return set()
+        text = text.lower()
+        spans = [(m.start(), m.end()) for m in _WORD_RE.finditer(text)]
+        n = len(spans)
+        found: Set[str] = set()
+
+        for i in range(n):
+            node = self._root.get(text[spans[i][0]:spans[i][1]])
+            j = i
+            while node is not None:
+                ends = node.get(_END)
+                if ends:
+                    start, end = spans[i][0], spans[j][1]
+                    for prefix, suffix, canonical in ends:
+                        if prefix and not text.endswith(prefix, 0, start):
+                            continue
+                        if suffix and not text.startswith(suffix, end):
+                            continue
+                        found.add(canonical)
+                j += 1
+                if j >= n:
+                    break
+                node = node.get(text[spans[j - 1][1]:spans[j][1]])
+
+        return found
+
+
+_default_matcher = SkillMatcher(DEFAULT_SKILLS)
+
+
+def default_matcher() -> SkillMatcher:
+    return _default_matcher
+
+
+def extract_skills(text: str) -> List[str]:
+    """Skills from the built-in dictionary found in text"""
+    return list(_default_matcher.find(text))
+
+
+def _build_kb_matcher(kb: pd.DataFrame) -> SkillMatcher:
+    skill_col = next((c for c in kb.columns if 'technical' in str(c).lower() and 'skills' in str(c).lower()), None)
+    vocab = set()
+    if skill_col is not None:
+        for s in kb[skill_col].dropna().astype(str).tolist():
+            for token in s.replace(';', ',').split(','):
+                t = token.strip().lower()
+                if t:
+                    vocab.add(t)
+    return SkillMatcher.from_terms(vocab)
+
+
+def get_kb_skill_matcher() -> SkillMatcher:
+    """Matcher over every technical skill listed in the active KB"""
+    return kb_derived('kb_skill_matcher', _build_kb_matcher)
@@ -0,0 +1,50 @@
+import contextlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterator, Union
+import numpy as np
+
+
+def write_atomic(path: Path, write: Callable[[Path], None]):
+    """
+    Write via `write(temp_path)`, then rename over `path`. Processes that
+    still have the old file open or memory-mapped keep reading it; new
+    readers never see a half-written one.
+    """
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def save_array(path: Path, array: np.ndarray):
+    def write(temp_path: Path):
+        with open(temp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+    write_atomic(path, write)
+
+
+def save_json(path: Path, data: Any):
+    def write(temp_path: Path):
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+    write_atomic(path, write)
+
+
+@contextlib.contextmanager
+def file_lock(path: Union[str, Path]) -> Iterator[None]:
+    """Exclusive lock on `path` across worker processes; blocks until the holder releases it"""
+    try:
+        import fcntl
+    except ImportError:  # Windows: single-worker deployments only
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
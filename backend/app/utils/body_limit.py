@@ -0,0 +1,98 @@
+import json
+from typing import Iterable
+from app.core.config import settings
+from app.core.exceptions import FileTooLargeError
+
+# Allowance on top of MAX_FILE_SIZE for multipart boundaries, part headers
+# and the other form fields sent alongside the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject multipart requests to `paths` whose body exceeds MAX_FILE_SIZE
+    before the form is parsed; other routes (the KB Excel import) are left
+    uncapped. Starlette spools every uploaded file to a temp file before
+    the route runs, so a check in the handler only fires after the whole
+    body has been received; this one refuses an oversized Content-Length
+    up front and stops reading chunked bodies as soon as they pass the
+    limit. Either way the client gets the usual 413 FILE_TOO_LARGE response.
+    """
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = {p.rstrip('/') for p in paths}
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http' or scope['path'].rstrip('/') not in self.paths
+                or not _is_multipart(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD
+        length = _header(scope, b'content-length')
+        if length is not None and length.isdigit() and int(length) > limit:
+            await _reject(send)
+            return
+
+        received = 0
+        tripped = False
+        started = False
+
+        async def limited_receive():
+            nonlocal received, tripped
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    tripped = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            # Whatever the app makes of the aborted body, the client gets the 413
+            if tripped:
+                return
+            started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not tripped:
+                raise
+        if tripped and not started:
+            await _reject(send)
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _is_multipart(scope) -> bool:
+    return (_header(scope, b'content-type') or '').lower().startswith('multipart/form-data')
+
+
+async def _reject(send):
+    error = FileTooLargeError(settings.MAX_FILE_SIZE)
+    body = json.dumps({
+        "error": True,
+        "error_code": error.error_code,
+        "message": error.message,
+        "type": "CareerIntelligenceException",
+    }).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': 413,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()),
+                    (b'connection', b'close')],
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,56 @@
+"""
+Lazy Import - Optional heavy dependencies resolved on first use
+
+Modules like torch, faiss, sentence_transformers and easyocr take seconds
+to import. Services check `is_installed` (import metadata only, nothing is
+executed) at import time and call `optional_import` where the dependency
+is actually needed, so importing the API stays fast. Import cost per
+module is recorded for /system/status.
+"""
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from types import ModuleType
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_modules: Dict[str, Optional[ModuleType]] = {}
+_seconds: Dict[str, float] = {}
+_lock = threading.RLock()
+
+
+def is_installed(name: str) -> bool:
+    """True when `name` can be found on the path; does not import it"""
+    if name in _modules:
+        return _modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Import `name` once; None (logged, cached) when it is missing or fails to import"""
+    if name in _modules:
+        return _modules[name]
+    with _lock:
+        if name in _modules:
+            return _modules[name]
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+            logger.info(f"{name} loaded in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            module = None
+            logger.warning(f"{name} not available: {e}")
+        _seconds[name] = round(time.perf_counter() - started, 3)
+        _modules[name] = module
+        return module
+
+
+def import_stats() -> Dict[str, dict]:
+    with _lock:
+        return {name: {'loaded': _modules[name] is not None, 'seconds': _seconds[name]} for name in _modules}
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryLog:
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[QueryLog]:
+    """
+    Record every SQL statement executed on `engine` inside the block.
+
+        with count_queries(engine) as log:
+            compute_score(db, profile)
+        assert log.count == 1, log.statements
+    """
+    log = QueryLog()
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        yield log
+    finally:
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,33 @@
+"""
+Shared test fixtures: an empty in-memory SQLite database per test, and a
+student user for tests that seed rows belonging to one.
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.models import User
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user(db) -> User:
+    user = User(id=1, email="s@example.com", name="Student", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
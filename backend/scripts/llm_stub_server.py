@@ -0,0 +1,134 @@
+"""
+Local stand-in for Ollama and the OpenAI chat API with simulated latency.
+
+    python scripts/llm_stub_server.py --port 11500 --latency 2.0
+    OLLAMA_URL=http://localhost:11500 OPENAI_BASE_URL=http://localhost:11500/v1 uvicorn app.main:app
+
+Serves /api/tags, /api/generate and /v1/chat/completions. With "stream": true
+the completion is sent token by token (NDJSON for Ollama, SSE for OpenAI),
+spreading the latency across the tokens.
+"""
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_RESPONSE = """1. RECOMMENDED JOB ROLES:
+- Data Analyst
+- Backend Developer
+
+2. SKILLS TO DEVELOP:
+- SQL
+- Docker
+
+3. CAREER PATH STRATEGY:
+Start as a data analyst, grow into analytics engineering within two years.
+
+4. NEXT STEPS:
+- Complete an SQL certification
+- Build a portfolio project
+"""
+
+
+class StubState:
+    def __init__(self, latency: float = 0.5, response: str = CANNED_RESPONSE):
+        self.latency = latency
+        self.response = response
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, body: dict, status: int = 200):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, chunks):
+            # Body is delimited by closing the connection, so no Content-Length is needed
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson" if self.path == "/api/generate" else "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(chunk.encode())
+                self.wfile.flush()
+
+        def _tokens(self):
+            tokens = re.findall(r"\s*\S+", state.response) or [""]
+            for token in tokens:
+                time.sleep(state.latency / len(tokens))
+                yield token
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                return self._send_json({"models": [{"name": "stub:latest"}]})
+            self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                if body.get("stream") and self.path == "/api/generate":
+                    return self._stream(itertools.chain(
+                        (json.dumps({"response": t, "done": False}) + "\n" for t in self._tokens()),
+                        [json.dumps({"response": "", "done": True}) + "\n"],
+                    ))
+                if body.get("stream") and self.path == "/v1/chat/completions":
+                    return self._stream(itertools.chain(
+                        ("data: " + json.dumps({"choices": [{"delta": {"content": t}}]}) + "\n\n" for t in self._tokens()),
+                        ["data: [DONE]\n\n"],
+                    ))
+                time.sleep(state.latency)
+                if self.path == "/api/generate":
+                    return self._send_json({"model": body.get("model"), "response": state.response, "done": True})
+                if self.path == "/v1/chat/completions":
+                    return self._send_json({"choices": [{"message": {"role": "assistant", "content": state.response}}]})
+                self._send_json({"error": "not found"}, 404)
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+    return Handler
+
+
+def start_stub_server(port: int = 0, latency: float = 0.5):
+    """Start the stub on a background thread; returns (server, state, base_url)"""
+    state = StubState(latency=latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama/OpenAI server")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=2.0, help="Seconds per completion")
+    args = parser.parse_args()
+    server, _, url = start_stub_server(args.port, args.latency)
+    print(f"🧪 LLM stub listening on {url} (latency {args.latency}s)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,7 +1,18 @@
+import time
 import requests
 
 BASE='http://localhost:8000'
 
+def wait_for_report(report_id, headers, timeout=300):
+    """Poll the job until it leaves queued/running; returns its last status"""
+    deadline = time.time() + timeout
+    while True:
+        job = requests.get(BASE+f'/api/v1/reports/{report_id}', headers=headers).json()
+        if job['status'] not in ('queued', 'running') or time.time() > deadline:
+            return job
+        print('  ', job['status'], job.get('stage'), job.get('progress'))
+        time.sleep(1)
+
 def run():
     login={'email':'student1@example.com','password':'pass12345'}
     r = requests.post(BASE+'/api/v1/auth/login', json=login)
@@ -10,10 +21,11 @@ def run():
     headers={'Authorization':'Bearer '+token}
     r = requests.post(BASE+'/api/v1/reports/generate', headers=headers)
     print('generate', r.status_code)
+    job = wait_for_report(r.json()['id'], headers)
+    print('job', job['status'], job.get('error') or '')
     r = requests.get(BASE+'/api/v1/reports/', headers=headers)
     print('list', r.status_code, len(r.json()))
-    first = r.json()[0]
-    r = requests.get(BASE+f"/api/v1/reports/{first['id']}/download", headers=headers)
+    r = requests.get(BASE+f"/api/v1/reports/{job['id']}/download", headers=headers)
     print('download', r.status_code, r.headers.get('content-type'))
 
 if __name__ == '__main__':
@@ -0,0 +1,74 @@
+"""
+ANN index test: the approximate KB index must reach a recall@k floor
+against the exact scan, and auto mode must pick the index by KB size.
+"""
+import tempfile
+from pathlib import Path
+import numpy as np
+from app.core.config import settings
+from app.services import ann_index
+from app.services.embedding_store import EmbeddingStore
+from app.utils.lazy_import import is_installed
+
+K = 10
+
+
+def _store(n: int = 20000, dim: int = 64):
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(100, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(n, 100, replace=False)]
+    return EmbeddingStore.from_vectors(vectors, 'int8'), EmbeddingStore.from_vectors(vectors, 'float32'), queries
+
+
+def test_auto_mode_follows_kb_size():
+    assert ann_index.choose_mode(settings.EMBEDDING_ANN_MIN_VECTORS - 1, 'auto') == 'flat'
+    assert ann_index.choose_mode(settings.EMBEDDING_ANN_MIN_VECTORS, 'auto') in ('ivf', 'hnsw')
+    assert ann_index.choose_mode(10, 'ivf') == 'ivf'
+
+
+def test_recall_counts_only_existing_neighbours():
+    vectors = np.eye(4, 8, dtype=np.float32)
+    exact = EmbeddingStore.from_vectors(vectors, 'float32')
+    # k above the store size: the exact scan returns all 4, and so does the store itself
+    assert ann_index.recall_at_k(exact, exact, vectors, K)['recall'] == 1.0
+
+
+def test_numpy_ivf_recall_and_persistence():
+    store, exact, queries = _store()
+    params = {**ann_index.build_params('ivf', store), 'backend': 'numpy'}
+    params.pop('pq_m', None)
+    index = ann_index.build(store, params)
+    # Spherical k-means: unit-length centroids
+    assert np.allclose(np.linalg.norm(index.centroids, axis=1), 1.0, atol=1e-5)
+
+    nprobe = settings.EMBEDDING_IVF_NPROBE
+    try:
+        settings.EMBEDDING_IVF_NPROBE = 1
+        narrow = ann_index.recall_at_k(index, exact, queries, K)['recall']
+        settings.EMBEDDING_IVF_NPROBE = 32
+        wide = ann_index.recall_at_k(index, exact, queries, K)['recall']
+        assert wide >= 0.9, wide
+        assert wide >= narrow
+
+        with tempfile.TemporaryDirectory() as tmp:
+            with ann_index.build_lock(tmp):
+                ann_index.save(index, tmp, params, 'fp')
+            assert not list(Path(tmp).glob("*.tmp")), "temp files left behind"
+            assert ann_index.load(tmp, store, params, 'other-fp') is None
+            loaded = ann_index.load(tmp, store, params, 'fp')
+            assert ann_index.recall_at_k(loaded, exact, queries, K)['recall'] == wide
+            del loaded
+    finally:
+        settings.EMBEDDING_IVF_NPROBE = nprobe
+
+
+def test_faiss_indexes_recall():
+    if not is_installed('faiss'):
+        return
+    store, exact, queries = _store()
+    for mode in ('ivf', 'hnsw'):
+        index = ann_index.build(store, ann_index.build_params(mode, store))
+        recall = ann_index.recall_at_k(index, exact, queries, K)['recall']
+        assert recall >= 0.8, f"{mode} recall@{K} {recall}"
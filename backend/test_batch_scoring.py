@@ -0,0 +1,64 @@
+"""
+Batch scoring test: the vectorised cohort scores must equal compute_score
+for every student of a small seeded cohort (profiles, documents and soft
+skill courses varied at random), and persisting writes exactly one
+CareerScore per user with the counters pointing at it.
+"""
+import random
+import pytest
+from sqlalchemy import func
+from app.models import User, Student, Document, Course, UserCourse, CareerScore, UserCounters
+from app.services.batch_scoring_service import score_cohort
+from app.services.scoring_service import compute_score
+
+EDUCATION = [None, "btech", "MSc Physics", "diploma", "PhD", "high school"]
+SKILLS = ["python", "sql", "communication", "excel", "aws", "docker", "leadership", "machine learning", "accounting"]
+INTERESTS = [None, "data science", "cloud", "finance", "teaching"]
+COHORT = 12
+SEED = 7
+
+
+@pytest.fixture(autouse=True)
+def _seed_cohort(db):
+    rng = random.Random(SEED)
+
+    db.add_all([Course(id=1, title="Comms", category="soft_skill"), Course(id=2, title="Teamwork", category="soft_skill"),
+                Course(id=3, title="SQL", category="domain")])
+    for uid in range(1, COHORT + 1):
+        db.add(User(id=uid, email=f"s{uid}@example.com", name=f"Student {uid}", hashed_password="x"))
+        db.add(Student(
+            user_id=uid,
+            education_level=rng.choice(EDUCATION),
+            skills=", ".join(rng.sample(SKILLS, rng.randint(0, 5))) or None,
+            interests=rng.choice(INTERESTS),
+            bio=rng.choice([None, "built projects and an internship"]),
+            experience_years=rng.choice([None, 0.0, 1.5, 4.0]),
+            name=rng.choice([None, f"Student {uid}"]),
+            linkedin_url=rng.choice([None, "https://linkedin.com/in/x"]),
+        ))
+        for n in range(rng.randint(0, 3)):
+            db.add(Document(user_id=uid, filename=f"{n}.pdf", path=f"{n}.pdf",
+                            ocr_confidence=rng.choice([None, round(rng.random(), 3)]),
+                            verification_status=rng.choice([None, "verified"])))
+        for course_id in rng.sample([1, 2, 3], rng.randint(0, 3)):
+            db.add(UserCourse(user_id=uid, course_id=course_id, status=rng.choice(["completed", "in_progress"])))
+    db.commit()
+
+
+def test_cohort_scores_match_compute_score(db):
+    batch = score_cohort(db, chunk_size=5, persist=False)
+    assert sorted(batch) == list(range(1, COHORT + 1))
+    for profile in db.query(Student).order_by(Student.user_id).all():
+        assert batch[profile.user_id] == compute_score(db, profile)[0], profile.user_id
+    assert db.query(CareerScore).count() == 0, "persist=False wrote scores"
+
+
+def test_persist_writes_one_score_per_user(db):
+    batch = score_cohort(db, chunk_size=5)
+
+    rows = db.query(CareerScore.user_id, func.count(CareerScore.id)).group_by(CareerScore.user_id).all()
+    assert dict(rows) == {uid: 1 for uid in batch}
+    for score in db.query(CareerScore).all():
+        assert score.total_score == batch[score.user_id]
+        assert db.get(UserCounters, score.user_id).latest_score_id == score.id
+
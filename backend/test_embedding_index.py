@@ -0,0 +1,57 @@
+"""
+Embedding index persistence test: a saved index leaves no temp files and
+its metadata is written last, and workers rebuilding a stale index at the
+same time encode the KB once; the others load the saved result.
+"""
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from app.services import embeddings_service as emb
+from app.services.embedding_store import l2_normalize
+
+
+def test_save_index_is_atomic():
+    real_emb_dir = emb._emb_dir
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        emb._emb_dir = lambda: tmp
+        try:
+            vectors, norms = l2_normalize(np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32))
+            (tmp / emb.META_FILE).write_text(json.dumps({'fingerprint': 'old'}))
+            store = emb._save_index(vectors, norms, 'new')
+        finally:
+            emb._emb_dir = real_emb_dir
+
+        assert len(store) == 50
+        assert not list(tmp.glob(".*.tmp")), "temp files left behind"
+        assert json.loads((tmp / emb.META_FILE).read_text())['fingerprint'] == 'new'
+        np.testing.assert_array_equal(np.load(tmp / "embeddings.npy"), vectors)
+
+
+def test_concurrent_rebuilds_encode_once():
+    real = emb._emb_dir, emb.load_index, emb._encode_index
+    encoded = []
+
+    def encode():
+        time.sleep(0.2)
+        encoded.append(threading.current_thread().name)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        emb._emb_dir = lambda: Path(tmp)
+        emb.load_index = lambda: bool(encoded)
+        emb._encode_index = encode
+        try:
+            workers = [threading.Thread(target=emb.build_index, name=f"worker-{i}") for i in range(4)]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            assert len(encoded) == 1, encoded
+
+            emb.build_index(force=True)
+            assert len(encoded) == 2, "force must rebuild a fresh index"
+        finally:
+            emb._emb_dir, emb.load_index, emb._encode_index = real
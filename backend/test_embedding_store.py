@@ -0,0 +1,67 @@
+"""
+Embedding store test: top-k over the quantized, memory-mapped store must
+match the exact float32 top-k within a recall tolerance.
+"""
+import tempfile
+import numpy as np
+from app.services.embedding_store import EmbeddingStore, l2_normalize
+
+K = 10
+MIN_RECALL = {'int8': 0.95, 'float16': 0.99, 'float32': 1.0}
+
+
+def _data(n: int = 5000, dim: int = 384, queries: int = 50):
+    rng = np.random.default_rng(0)
+    # Clustered, unnormalized vectors, like role-text embeddings
+    centers = rng.normal(size=(40, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors *= rng.uniform(0.5, 2.0, size=(n, 1)).astype(np.float32)
+    return vectors, vectors[rng.integers(0, n, queries)] + 0.1 * rng.normal(size=(queries, dim)).astype(np.float32)
+
+
+def _recall(found: np.ndarray, exact: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact)]))
+
+
+def test_quantized_recall():
+    vectors, queries = _data()
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :K]
+    for dtype, min_recall in MIN_RECALL.items():
+        with tempfile.TemporaryDirectory() as tmp:
+            EmbeddingStore.from_vectors(vectors, dtype).save(tmp)
+            store = EmbeddingStore.load(tmp)
+            assert isinstance(store.codes, np.memmap)
+            scores, idxs = store.search(queries, K)
+            assert idxs.shape == (len(queries), K)
+            assert np.all(np.diff(scores, axis=1) <= 0)
+            recall = _recall(idxs, exact)
+            assert recall >= min_recall, f"{dtype} recall@{K} {recall:.3f} < {min_recall}"
+            del store, scores, idxs
+
+
+def test_store_is_smaller():
+    vectors, _ = _data(n=1000)
+    assert EmbeddingStore.from_vectors(vectors, 'int8').nbytes < vectors.nbytes / 3.5
+    assert EmbeddingStore.from_vectors(vectors, 'float16').nbytes < vectors.nbytes / 1.9
+
+
+def test_search_spans_chunks():
+    vectors, queries = _data(n=20000, dim=32, queries=5)
+    store = EmbeddingStore.from_vectors(vectors, 'float32')
+    _, idxs = store.search(queries, K)
+    assert _recall(idxs, np.argsort(-(queries @ vectors.T), axis=1)[:, :K]) == 1.0
+
+
+def test_normalized_scores_are_cosine():
+    vectors, queries = _data(n=2000, dim=64, queries=20)
+    vectors[0] = 0.0
+    unit, norms = l2_normalize(vectors)
+    assert np.allclose(norms[1:], np.linalg.norm(vectors[1:], axis=1), rtol=1e-5)
+    assert norms[0] == 0.0 and not np.any(unit[0])
+    unit_queries, _ = l2_normalize(queries)
+    cosine = unit_queries @ unit.T
+    expected = np.sort(cosine, axis=1)[:, ::-1][:, :K]
+    for dtype, atol in (('float32', 1e-5), ('int8', 0.02)):
+        scores, _ = EmbeddingStore.from_vectors(unit, dtype).search(unit_queries, K)
+        assert np.all(scores <= 1.0 + atol)
+        assert np.allclose(scores, expected, atol=atol), dtype
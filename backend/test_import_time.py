@@ -0,0 +1,49 @@
+"""
+Import-time benchmark: importing the API must not pull in the heavy
+optional backends (torch, faiss, sentence_transformers, transformers,
+easyocr, reportlab, jinja2) or block on network checks, and the whole
+import must stay within a time budget (IMPORT_BUDGET_SECONDS).
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+# Loaded on first use or during warmup, never by `import app.main`
+HEAVY_MODULES = ('torch', 'faiss', 'sentence_transformers', 'transformers', 'easyocr', 'reportlab', 'jinja2')
+
+# Whole-import budget for `import app.main`
+TOTAL_BUDGET_SECONDS = float(os.getenv('IMPORT_BUDGET_SECONDS', '5.0'))
+
+
+def measure_import(module: str = 'app.main') -> dict:
+    """Cumulative import seconds per module, from `python -X importtime` in a fresh interpreter"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=300,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    costs = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if cumulative.strip().isdigit():
+            costs[name.strip()] = int(cumulative) / 1e6
+    return costs
+
+
+def test_heavy_backends_are_lazy():
+    costs = measure_import()
+    loaded = sorted(name for name in costs if name.split('.')[0] in HEAVY_MODULES)
+    assert not loaded, f"import app.main loaded heavy modules: {loaded[:10]}"
+
+
+def test_import_time_within_budget():
+    costs = measure_import()
+    total = costs.get('app.main', 0.0)
+    slowest = sorted(costs.items(), key=lambda item: item[1], reverse=True)[:10]
+    assert total <= TOTAL_BUDGET_SECONDS, f"import app.main took {total:.2f}s; slowest: {slowest}"
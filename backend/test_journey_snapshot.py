@@ -0,0 +1,49 @@
+"""
+Journey snapshot test: status rules must match the per-rule queries and,
+given a snapshot, run without touching the database.
+"""
+import pytest
+from app.models import Student, Document, CareerScore
+from app.services import journey_service
+from app.utils.query_counter import count_queries
+
+
+def _seed(db, docs: int, scored: bool) -> Student:
+    student = Student(user_id=1, education_level="btech", skills="python, sql, communication",
+                      experience_years=1.0, career_direction="job", name="Student")
+    db.add(student)
+    db.add_all([Document(user_id=1, filename=f"{i}.pdf", path=f"{i}.pdf") for i in range(docs)])
+    if scored:
+        db.add(CareerScore(user_id=1, total_score=55))
+    db.commit()
+    db.refresh(student)
+    return student
+
+
+def test_snapshot_counts(db, user):
+    _seed(db, docs=2, scored=True)
+    snapshot = journey_service.load_journey_snapshot(db, 1)
+    assert snapshot == journey_service.JourneySnapshot(doc_count=2, has_score=True)
+    assert journey_service.load_journey_snapshot(db, 2) == journey_service.JourneySnapshot(doc_count=0, has_score=False)
+
+
+@pytest.mark.parametrize('docs, scored, stage', [(0, False, 2), (1, False, 3), (1, True, 5)])
+def test_stages_follow_evidence(db, user, docs, scored, stage):
+    student = _seed(db, docs, scored)
+    assert journey_service.get_current_stage(db, student) == stage
+    access = journey_service.can_access_stages(db, student)
+    assert access == {s: journey_service.can_unlock_stage(db, student, s) for s in range(1, 6)}
+
+
+def test_status_rules_share_one_query(engine, db, user):
+    student = _seed(db, docs=1, scored=False)
+    with count_queries(engine) as log:
+        snapshot = journey_service.load_journey_snapshot(db, 1)
+        stage = journey_service.get_current_stage(db, student, snapshot)
+        completion = journey_service.calculate_completion_percentage(db, student, snapshot)
+        actions = journey_service.get_next_actions(db, student, snapshot)
+        journey_service.can_access_stages(db, student, snapshot)
+    assert log.count == 1, log.statements
+    assert stage == 3
+    assert completion == journey_service.calculate_completion_percentage(db, student)
+    assert actions[0]['title'] == 'Generate Your Career Score'
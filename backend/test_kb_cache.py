@@ -0,0 +1,44 @@
+"""
+KB columnar cache test: the second load of an unchanged KB file must be
+served from the memory-mapped Arrow copy without parsing the workbook,
+and must equal the first (uncached) load.
+"""
+import tempfile
+from pathlib import Path
+import pandas as pd
+from app.services import kb_service
+
+KB = pd.DataFrame([
+    {'Job Role': 'Data Scientist', 'Technical Skills': 'python, sql', 'Level': 'Mid', 'Job Index / ID': 1},
+    # Stray number in a text column, empty cell in another
+    {'Job Role': 'Accountant', 'Technical Skills': 42, 'Level': None, 'Job Index / ID': 2},
+    {'Job Role': 'Cloud Engineer', 'Technical Skills': 'aws docker', 'Level': 'Senior', 'Job Index / ID': 3},
+])
+
+
+def test_second_load_reads_columnar_cache():
+    real_cache_dir, real_read_excel = kb_service._cache_dir, kb_service.pd.read_excel
+    parses = []
+
+    def counting_read_excel(*args, **kwargs):
+        parses.append(args[0])
+        return real_read_excel(*args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        xlsx = tmp / "kb.xlsx"
+        KB.to_excel(xlsx, index=False)
+        kb_service._cache_dir = lambda: tmp
+        kb_service.pd.read_excel = counting_read_excel
+        try:
+            first = kb_service._read_kb_file(xlsx)
+            assert len(parses) == 1
+            assert list(tmp.glob("kb_*.arrow")), "columnar cache was not written"
+
+            second = kb_service._read_kb_file(xlsx)
+            assert len(parses) == 1, "cached load parsed the workbook again"
+            pd.testing.assert_frame_equal(first, second)
+            assert second.loc[1, 'Technical Skills'] == '42'
+        finally:
+            kb_service._cache_dir = real_cache_dir
+            kb_service.pd.read_excel = real_read_excel
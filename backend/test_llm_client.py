@@ -0,0 +1,131 @@
+"""
+LLM client tests against the local stub server (scripts/llm_stub_server.py).
+"""
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+
+from llm_stub_server import start_stub_server
+from app.core.config import settings
+from app.core.exceptions import ExternalServiceError
+from app.services import llm_client
+from app.services.circuit_breaker import CLOSED, OPEN, CircuitBreaker
+from app.services.llm_client import LLMBackend
+
+
+def _generate(backend: LLMBackend, timeout: float = 10.0) -> dict:
+    payload = {"model": "stub", "prompt": "hi", "stream": False}
+    return llm_client.run(backend.post_json("/api/generate", payload, time.monotonic() + timeout), timeout=timeout)
+
+
+def test_concurrency_limit_queues_requests():
+    server, state, url = start_stub_server(latency=0.3)
+    try:
+        backend = LLMBackend("stub", url, max_concurrency=2)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda _: _generate(backend), range(6)))
+        elapsed = time.perf_counter() - started
+
+        assert all(r["done"] for r in results)
+        assert state.max_in_flight <= 2
+        # 6 requests, 2 at a time, 0.3 s each
+        assert elapsed >= 0.85
+    finally:
+        server.shutdown()
+
+
+def test_deadline_fails_fast_while_queued():
+    server, _, url = start_stub_server(latency=1.0)
+    try:
+        backend = LLMBackend("stub", url, max_concurrency=1)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            slow = pool.submit(_generate, backend, 5.0)
+            time.sleep(0.1)
+            started = time.perf_counter()
+            try:
+                _generate(backend, timeout=0.2)
+                assert False, "queued request should have hit its deadline"
+            except ExternalServiceError:
+                pass
+            assert time.perf_counter() - started < 0.6
+            assert slow.result()["done"]
+    finally:
+        server.shutdown()
+
+
+def test_abandoned_call_frees_its_slot():
+    server, _, url = start_stub_server(latency=1.0)
+    queue_timeout = settings.LLM_QUEUE_TIMEOUT
+    try:
+        settings.LLM_QUEUE_TIMEOUT = 0.1
+        backend = LLMBackend("stub", url, max_concurrency=1)
+        payload = {"model": "stub", "prompt": "hi", "stream": False}
+        try:
+            llm_client.run(backend.post_json("/api/generate", payload, time.monotonic() + 10), timeout=0.1)
+            assert False, "run should have given up"
+        except ExternalServiceError as e:
+            assert "no response" in str(e)
+        time.sleep(0.1)
+        assert backend.in_flight == 0
+        settings.LLM_QUEUE_TIMEOUT = queue_timeout
+        # The cancelled call no longer holds the only slot
+        started = time.perf_counter()
+        assert _generate(backend)["done"]
+        assert time.perf_counter() - started < 1.8
+    finally:
+        settings.LLM_QUEUE_TIMEOUT = queue_timeout
+        server.shutdown()
+
+
+def test_stream_delivers_first_token_early():
+    server, state, url = start_stub_server(latency=1.0)
+    try:
+        backend = LLMBackend("stub", url, max_concurrency=1)
+        payload = {"model": "stub", "prompt": "hi", "stream": True}
+        started = time.perf_counter()
+        lines = llm_client.iterate(backend.stream_lines("/api/generate", payload, time.monotonic() + 10))
+        first = next(lines)
+        assert time.perf_counter() - started < 0.5
+        chunks = [json.loads(first)] + [json.loads(line) for line in lines]
+        assert chunks[-1]["done"]
+        assert "".join(c["response"] for c in chunks).split() == state.response.split()
+        assert backend.in_flight == 0
+    finally:
+        server.shutdown()
+
+
+def test_breaker_fails_fast_and_recovers_on_probe():
+    # Nothing listens on the discard port, so every call is refused
+    dead = LLMBackend("dead", "http://127.0.0.1:9", max_concurrency=1)
+    dead.breaker = CircuitBreaker("dead", failure_threshold=2, reset_seconds=0.3)
+    for _ in range(2):
+        try:
+            _generate(dead)
+        except ExternalServiceError:
+            pass
+    assert dead.breaker.state == OPEN
+
+    started = time.perf_counter()
+    try:
+        _generate(dead)
+        assert False, "open breaker should reject the call"
+    except ExternalServiceError as e:
+        assert "circuit open" in str(e)
+    assert time.perf_counter() - started < 0.05
+
+    server, _, url = start_stub_server(latency=0.0)
+    try:
+        backend = LLMBackend("stub", url, max_concurrency=1)
+        backend.breaker.record_failure("down", trip=True)
+        assert backend.breaker.state == OPEN
+        llm_client.run(backend.probe("/api/tags", timeout=2.0), timeout=2.0)
+        assert backend.breaker.state == CLOSED
+        assert _generate(backend)["done"]
+        assert backend.breaker.stats()["samples"] == 1
+    finally:
+        server.shutdown()
@@ -0,0 +1,31 @@
+"""
+OCR cache test: only extractions where at least one page succeeded are
+stored; failed ones (no engine, crashed worker) are retried next time.
+"""
+import tempfile
+from pathlib import Path
+from app.core.config import settings
+from app.services import ocr_cache
+from app.services.ocr_service import OCRResult, _page_info
+
+
+def test_failed_extractions_are_not_cached():
+    original_path = settings.OCR_CACHE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.OCR_CACHE_PATH = str(Path(tmp) / "ocr_cache.db")
+        ocr_cache._conn = None
+        try:
+            failed = [_page_info(1, 'ocr', None, None), _page_info(2, 'ocr', None, None)]
+            ocr_cache.put("all-pages-failed", OCRResult("", 0.0, failed))
+            ocr_cache.put("no-text", OCRResult(None, None, []))
+            assert ocr_cache.get("all-pages-failed") is None
+            assert ocr_cache.get("no-text") is None
+
+            # A blank page that OCR'd fine is a real result
+            blank = [_page_info(1, 'ocr', "", 0.0), _page_info(2, 'ocr', None, None)]
+            ocr_cache.put("blank", OCRResult("", 0.0, blank))
+            assert ocr_cache.get("blank") == OCRResult("", 0.0, blank)
+        finally:
+            ocr_cache._conn.close()
+            ocr_cache._conn = None
+            settings.OCR_CACHE_PATH = original_path
@@ -0,0 +1,34 @@
+"""
+PDF extraction test: a PDF pypdf cannot parse is still counted through
+poppler and OCR'd page by page instead of failing the whole document.
+"""
+import tempfile
+from pathlib import Path
+import pdf2image
+from app.services import ocr_service
+
+
+def test_unparseable_pdf_falls_back_to_poppler():
+    real_pdfinfo, real_tesseract = pdf2image.pdfinfo_from_path, ocr_service.pytesseract_available
+    ocr_calls = []
+
+    def ocr_pages(path, numbers):
+        ocr_calls.append(numbers)
+        return [(f"page {n}", 0.8) for n in numbers]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(tmp) / "broken.pdf"
+        pdf.write_bytes(b'%PDF-1.4\nnot a pdf pypdf can read\n')
+        pdf2image.pdfinfo_from_path = lambda path: {'Pages': 2}
+        ocr_service.pytesseract_available = True
+        try:
+            assert ocr_service.open_pdf(str(pdf)) is None
+            result = ocr_service.extract_pdf_document(str(pdf), ocr_pages)
+        finally:
+            pdf2image.pdfinfo_from_path = real_pdfinfo
+            ocr_service.pytesseract_available = real_tesseract
+
+    assert ocr_calls == [[1, 2]]
+    assert result.text == "page 1\n\npage 2" and result.confidence == 0.8
+    assert [p['method'] for p in result.pages] == ['ocr', 'ocr']
+    assert all(p['ok'] for p in result.pages)
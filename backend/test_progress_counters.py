@@ -0,0 +1,99 @@
+"""
+Progress counters test: the materialized user_counters row must match the
+source tables after inserts, updates and deletes, and reconciliation must
+repair rows changed behind the ORM's back. The concurrency test runs
+against TEST_DATABASE_URL when set (use Postgres to exercise row locks),
+otherwise against a temporary SQLite file.
+"""
+import os
+import tempfile
+import threading
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import User, Document, CareerScore, Course, UserCourse, UserCounters
+from app.services.progress_counters import ProgressCounters, get_counters, rebuild_counters
+
+
+def test_counters_follow_writes(db, user):
+    db.add_all([Course(id=1, title="Comms", category="soft_skill"), Course(id=2, title="SQL", category="domain")])
+    db.commit()
+    assert get_counters(db, 1) == ProgressCounters(0, 0, None, None, 0)
+
+    docs = [
+        Document(user_id=1, filename="a.pdf", path="a.pdf", ocr_confidence=0.9, verification_status="verified"),
+        Document(user_id=1, filename="b.pdf", path="b.pdf", ocr_confidence=0.5),
+    ]
+    db.add_all(docs)
+    db.add(UserCourse(user_id=1, course_id=1, status="in_progress"))
+    db.add(UserCourse(user_id=1, course_id=2, status="completed"))
+    db.commit()
+    counters = get_counters(db, 1)
+    assert (counters.doc_count, counters.verified_count, counters.completed_soft_skill_courses) == (2, 1, 0)
+    assert abs(counters.avg_ocr_confidence - 0.7) < 1e-9
+
+    course = db.query(UserCourse).filter(UserCourse.course_id == 1).one()
+    course.status = "completed"
+    docs[1].verification_status = "verified"
+    score = CareerScore(user_id=1, total_score=55)
+    db.add(score)
+    db.commit()
+    counters = get_counters(db, 1)
+    assert (counters.verified_count, counters.completed_soft_skill_courses) == (2, 1)
+    assert counters.latest_score_id == score.id
+
+    db.delete(docs[0])
+    db.commit()
+    assert get_counters(db, 1).doc_count == 1
+
+
+def test_rebuild_reconciles_drift(db, user):
+    db.add(Document(user_id=1, filename="a.pdf", path="a.pdf"))
+    db.commit()
+    db.execute(update(UserCounters).values(doc_count=42))
+    db.commit()
+    assert get_counters(db, 1).doc_count == 42
+
+    assert rebuild_counters(db.connection()) == 1
+    db.commit()
+    assert get_counters(db, 1).doc_count == 1
+
+
+def test_concurrent_sessions_keep_counters_exact():
+    with tempfile.TemporaryDirectory() as tmp:
+        url = os.getenv('TEST_DATABASE_URL') or f"sqlite:///{tmp}/counters.db"
+        engine = create_engine(url, connect_args={"timeout": 30} if url.startswith('sqlite') else {})
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            db.add(User(id=1, email="s@example.com", name="Student", hashed_password="x"))
+            db.commit()
+
+        writes, errors = 20, []
+        start = threading.Barrier(2)
+
+        def upload(worker: int):
+            start.wait()
+            for i in range(writes):
+                try:
+                    with Session() as db:
+                        db.add(Document(user_id=1, filename=f"{worker}-{i}.pdf", path=f"{worker}-{i}.pdf",
+                                        verification_status="verified" if i % 2 else "needs_action"))
+                        db.commit()
+                except Exception as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=upload, args=(worker,)) for worker in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors, errors[:3]
+        with Session() as db:
+            counters = get_counters(db, 1)
+            assert (counters.doc_count, counters.verified_count) == (2 * writes, writes)
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
@@ -0,0 +1,100 @@
+"""
+Golden test: the vectorized role x skill matrix must rank roles and derive
+skill gaps exactly like the original per-row recommend() loop.
+"""
+import re
+from types import SimpleNamespace
+import pandas as pd
+from app.services.role_index import RoleIndex
+from app.services.role_skill_matrix import RoleSkillMatrix
+from app.services.skill_matcher import extract_skills
+
+KB = pd.DataFrame([
+    {'job_role': 'Data Scientist', 'technical_skills': 'Python, SQL, Machine Learning, Pandas', 'domain_skills': 'statistics', 'level': 'Mid', 'average_salary': '12 LPA'},
+    {'job_role': 'Frontend Developer', 'technical_skills': 'JavaScript, React, CSS, HTML', 'domain_skills': 'ui design', 'level': 'Entry', 'average_salary': '6 LPA'},
+    {'job_role': 'Backend Developer', 'technical_skills': 'Python, Django, SQL, Docker', 'domain_skills': 'apis', 'level': 'Entry', 'average_salary': '7 LPA'},
+    {'job_role': 'Cloud Engineer', 'technical_skills': 'AWS, Docker, Kubernetes', 'domain_skills': 'devops', 'level': 'Senior', 'average_salary': '20 LPA'},
+    {'job_role': 'ML Engineer', 'technical_skills': 'Python, PyTorch, TensorFlow, Deep Learning', 'domain_skills': 'ai', 'level': 'Mid', 'average_salary': '15 LPA'},
+    {'job_role': 'Business Analyst', 'technical_skills': 'Excel, Power BI,', 'domain_skills': 'requirements gathering', 'level': 'Entry', 'average_salary': '5 LPA'},
+    {'job_role': 'Full Stack Developer', 'technical_skills': 'JavaScript, Node.js, React, MongoDB, Git', 'domain_skills': 'web', 'level': 'Mid', 'average_salary': '10 LPA'},
+    {'job_role': 'Data Analyst', 'technical_skills': 'SQL, Python, Data Analysis', 'domain_skills': 'reporting', 'level': 'Entry', 'average_salary': '6 LPA'},
+    {'job_role': 'Scrum Master', 'technical_skills': 'Agile, Scrum, Jira', 'domain_skills': 'communication leadership', 'level': 'Mid', 'average_salary': '14 LPA'},
+])
+
+PROFILES = [
+    SimpleNamespace(skills='Python, SQL, pandas', interests='machine learning', bio='built a data science project'),
+    SimpleNamespace(skills='javascript react css html', interests='web', bio='frontend projects on github'),
+    SimpleNamespace(skills='aws docker', interests='devops', bio=''),
+    SimpleNamespace(skills='excel power bi', interests='requirements gathering', bio='analyst'),
+    SimpleNamespace(skills='agile scrum jira', interests='leadership', bio='communication'),
+    SimpleNamespace(skills=None, interests=None, bio=None),
+    SimpleNamespace(skills='gardening', interests='cooking', bio='nothing relevant'),
+]
+
+
+def _legacy_extract(text: str):
+    """Original _extract_skills_from_text regexes"""
+    if not text:
+        return []
+    patterns = [
+        r'\b(python|java|javascript|react|angular|vue|node\.?js|sql|mysql|postgresql|mongodb|docker|kubernetes|aws|azure|gcp|git|github|html|css|bootstrap|tailwind)\b',
+        r'\b(machine learning|ml|artificial intelligence|ai|data science|data analysis|deep learning|tensorflow|pytorch|pandas|numpy|scikit-learn)\b',
+        r'\b(project management|agile|scrum|kanban|jira|confluence|slack|teams|communication|leadership|problem solving)\b'
+    ]
+    found = []
+    for pattern in patterns:
+        found.extend(re.findall(pattern, text.lower(), re.IGNORECASE))
+    return list(set(found))
+
+
+def _legacy_recommend(profile, kb: pd.DataFrame):
+    """Original recommend() loop, returning (top role names, all skill gaps before the common-skill padding)"""
+    profile_text = f"{profile.skills or ''} {profile.interests or ''} {profile.bio or ''}".lower()
+    profile_skills = _legacy_extract(profile_text)
+    role_matches = []
+    for _, row in kb.iterrows():
+        role_dict = row.to_dict()
+        role_text = f"{role_dict.get('technical_skills', '')} {role_dict.get('domain_skills', '')} {role_dict.get('job_role', '')}".lower()
+        role_skills = _legacy_extract(role_text)
+        if role_skills:
+            matched_skills = sum(1 for skill in role_skills if any(ps in skill or skill in ps for ps in profile_skills))
+            match_score = matched_skills / len(role_skills) if role_skills else 0
+        else:
+            profile_words = set(profile_text.split())
+            role_words = set(role_text.split())
+            match_score = len(profile_words & role_words) / max(len(role_words), 1)
+        if match_score > 0.1:
+            role_matches.append({'role': role_dict.get('job_role', 'Unknown Role'),
+                                 'skills_required': role_dict.get('technical_skills', ''),
+                                 'match_score': match_score})
+    role_matches.sort(key=lambda x: x['match_score'], reverse=True)
+    top_roles = role_matches[:5]
+    gaps = set()
+    for role in top_roles:
+        if role['skills_required']:
+            for skill in [s.strip().lower() for s in role['skills_required'].split(',')]:
+                if not any(ps in skill or skill in ps for ps in profile_skills):
+                    gaps.add(skill.title())
+    return [r['role'] for r in top_roles], gaps
+
+
+def _matrix_recommend(profile, matrix: RoleSkillMatrix, index: RoleIndex):
+    profile_text = f"{profile.skills or ''} {profile.interests or ''} {profile.bio or ''}".lower()
+    profile_skills = extract_skills(profile_text)
+    scores = matrix.match_scores(profile_skills, index.scores(profile_text))
+    top = matrix.top_roles(scores, k=5, threshold=0.1)
+    gaps = {s.title() for s in matrix.missing_skills(top, profile_skills)}
+    return [matrix.roles[i]['role'] for i in top], gaps
+
+
+def test_recommend_matches_legacy_ranking():
+    matrix, index = RoleSkillMatrix(KB), RoleIndex(KB)
+    for profile in PROFILES:
+        assert _matrix_recommend(profile, matrix, index) == _legacy_recommend(profile, KB), profile
+
+
+def test_top_roles_keeps_kb_order_on_ties():
+    matrix = RoleSkillMatrix(KB)
+    scores = matrix.match_scores([], [0.5] * len(KB))
+    scores[:] = 0.5
+    assert matrix.top_roles(scores, k=3) == [0, 1, 2]
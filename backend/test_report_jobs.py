@@ -0,0 +1,149 @@
+"""
+Report job lifecycle tests: stages run in order and record their progress,
+failing stages are retried, cancellation stops a job, and resuming only
+takes over jobs no live worker holds. The real stages are replaced by
+fast stand-ins; jobs run against a temporary SQLite file.
+"""
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.database import Base
+from app.models import User, Student, Report
+from app.services import report_job_service as jobs
+
+
+def _noop(db, job, ctx):
+    ctx.setdefault('ran', []).append(job.stage)
+
+
+def _setup(stages):
+    """Fresh database and stand-in stages; returns a session factory"""
+    tmp = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{Path(tmp) / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    jobs.SessionLocal = Session
+    jobs.STAGES = stages
+    settings.REPORT_JOB_RETRY_DELAY = 0
+    settings.REPORT_JOB_MAX_ATTEMPTS = 3
+    with Session() as db:
+        db.add(User(id=1, email="s@example.com", name="Student", hashed_password="x"))
+        db.add(Student(user_id=1, skills="python"))
+        db.commit()
+    return Session
+
+
+def _add_job(Session, **fields) -> int:
+    with Session() as db:
+        job = Report(**{'user_id': 1, 'format': 'html', 'status': 'queued', 'stages': jobs._initial_stages(), **fields})
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def _get(Session, job_id: int) -> Report:
+    with Session() as db:
+        job = db.get(Report, job_id)
+        db.expunge(job)
+        return job
+
+
+def test_stages_run_in_order():
+    Session = _setup([('one', _noop), ('two', _noop), ('three', _noop)])
+    job_id = _add_job(Session)
+    jobs.run_job(job_id)
+
+    job = _get(Session, job_id)
+    assert job.status == 'completed' and job.error is None
+    assert [s['name'] for s in job.stages] == ['one', 'two', 'three']
+    assert all(s['status'] == 'completed' and s['attempts'] == 1 for s in job.stages)
+    assert job.owner == jobs.WORKER_ID and job.lease_expires_at is None
+    assert jobs.job_status(job)['progress'] == 1.0
+
+
+def test_failing_stage_is_retried():
+    calls = []
+
+    def flaky(db, job, ctx):
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("temporary")
+
+    def broken(db, job, ctx):
+        raise RuntimeError("always")
+
+    Session = _setup([('one', _noop), ('flaky', flaky)])
+    job_id = _add_job(Session)
+    jobs.run_job(job_id)
+    job = _get(Session, job_id)
+    assert job.status == 'completed'
+    assert job.stages[1]['attempts'] == 3 and job.stages[1]['error'] is None
+
+    Session = _setup([('one', _noop), ('broken', broken), ('never', _noop)])
+    job_id = _add_job(Session)
+    jobs.run_job(job_id)
+    job = _get(Session, job_id)
+    assert job.status == 'failed' and job.error.startswith('broken:')
+    assert [s['status'] for s in job.stages] == ['completed', 'failed', 'pending']
+
+
+def test_cancel_queued_and_running():
+    def cancel_from_outside(db, job, ctx):
+        with jobs.SessionLocal() as other:
+            jobs.cancel_report_job(other, other.get(Report, job.id))
+
+    Session = _setup([('one', _noop), ('cancel', cancel_from_outside), ('never', _noop)])
+    queued = _add_job(Session)
+    with Session() as db:
+        assert jobs.cancel_report_job(db, db.get(Report, queued)).status == 'cancelled'
+    jobs.run_job(queued)
+    assert _get(Session, queued).status == 'cancelled'
+
+    running = _add_job(Session)
+    jobs.run_job(running)
+    job = _get(Session, running)
+    assert job.status == 'cancelled'
+    assert [s['status'] for s in job.stages] == ['completed', 'completed', 'cancelled']
+
+
+def test_resume_only_takes_over_expired_leases():
+    Session = _setup([('one', _noop)])
+    now = jobs._now()
+    live = _add_job(Session, status='running', owner='other-worker', lease_expires_at=now + timedelta(minutes=5))
+    dead = _add_job(Session, status='running', owner='dead-worker', lease_expires_at=now - timedelta(minutes=5))
+    unclaimed = _add_job(Session)
+
+    # A live lease cannot be claimed, by resume or by a direct run
+    jobs.run_job(live)
+    assert _get(Session, live).owner == 'other-worker'
+
+    try:
+        assert jobs.resume_report_jobs() == 2
+        deadline = time.monotonic() + 10
+        while jobs._queued and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        jobs.shutdown(wait=True)
+
+    assert _get(Session, live).status == 'running'
+    for job_id in (dead, unclaimed):
+        job = _get(Session, job_id)
+        assert job.status == 'completed' and job.owner == jobs.WORKER_ID
+
+
+def test_job_stops_when_lease_is_lost():
+    def taken_over(db, job, ctx):
+        with jobs.SessionLocal() as other:
+            other.get(Report, job.id).owner = 'other-worker'
+            other.commit()
+
+    Session = _setup([('one', taken_over), ('two', _noop)])
+    job_id = _add_job(Session)
+    jobs.run_job(job_id)
+    job = _get(Session, job_id)
+    assert job.status == 'running' and job.owner == 'other-worker'
+    assert job.stages[1]['attempts'] == 0
@@ -0,0 +1,62 @@
+"""
+Parity test: the precompiled role index must pick the same target role as
+the original kb.iterrows() word-overlap scan.
+"""
+from types import SimpleNamespace
+import pandas as pd
+from app.services.role_index import RoleIndex
+
+KB = pd.DataFrame([
+    {'job_role': 'Data Scientist', 'technical_skills': 'python, sql, machine learning', 'domain_skills': 'statistics', 'level': 'Mid'},
+    {'job_role': 'Frontend Developer', 'technical_skills': 'javascript react css html', 'domain_skills': 'ui design', 'level': 'Entry'},
+    {'job_role': 'Backend Developer', 'technical_skills': 'python django sql docker', 'domain_skills': 'apis', 'level': 'Entry'},
+    {'job_role': 'Cloud Engineer', 'technical_skills': 'aws docker kubernetes', 'domain_skills': 'devops', 'level': 'Senior'},
+    # Same token set as the row above: ties must resolve to the earlier row
+    {'job_role': 'Cloud Engineer', 'technical_skills': 'kubernetes aws docker', 'domain_skills': 'devops', 'level': 'Mid'},
+    {'job_role': 'Business Analyst', 'technical_skills': '', 'domain_skills': '', 'level': 'Entry'},
+    {'job_role': 'Accountant', 'technical_skills': 42, 'domain_skills': 'tally gst', 'level': 'Entry'},
+])
+
+PROFILES = [
+    SimpleNamespace(skills='Python, SQL', interests='machine learning', bio=None),
+    SimpleNamespace(skills='react css html', interests='ui', bio='I like design'),
+    SimpleNamespace(skills='aws docker kubernetes', interests='devops', bio=''),
+    SimpleNamespace(skills='python docker', interests=None, bio='built apis with django'),
+    SimpleNamespace(skills='gardening', interests='cooking', bio='nothing relevant'),
+    SimpleNamespace(skills=None, interests=None, bio=None),
+    SimpleNamespace(skills='42 tally', interests='analyst', bio='business'),
+]
+
+
+def _scan_target_role(profile, kb: pd.DataFrame) -> dict:
+    """Original get_target_role_for_profile implementation"""
+    profile_text = f"{profile.skills or ''} {profile.interests or ''} {profile.bio or ''}".lower()
+    best_match = None
+    best_score = 0
+    for _, row in kb.iterrows():
+        role_text = f"{row.get('technical_skills', '')} {row.get('domain_skills', '')} {row.get('job_role', '')}".lower()
+        profile_words = set(profile_text.split())
+        role_words = set(role_text.split())
+        overlap = len(profile_words & role_words)
+        score = overlap / max(len(role_words), 1)
+        if score > best_score:
+            best_score = score
+            best_match = row.to_dict()
+    return best_match or {}
+
+
+def _indexed_target_role(profile, index: RoleIndex) -> dict:
+    profile_text = f"{profile.skills or ''} {profile.interests or ''} {profile.bio or ''}".lower()
+    best = index.best_match(profile_text)
+    return index.role(best) if best is not None else {}
+
+
+def test_role_index_matches_scan():
+    index = RoleIndex(KB)
+    for profile in PROFILES:
+        assert _indexed_target_role(profile, index) == _scan_target_role(profile, KB), profile
+
+
+def test_role_index_empty_kb():
+    index = RoleIndex(pd.DataFrame(columns=['job_role', 'technical_skills', 'domain_skills']))
+    assert _indexed_target_role(PROFILES[0], index) == {}
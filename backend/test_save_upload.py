@@ -0,0 +1,67 @@
+"""
+save_upload test: uploads are streamed to disk in chunks and hashed on the
+way, the wrong extension or leading bytes are refused, an oversized file
+is aborted with its temp file removed, and a file only replaces the one
+under its final name once it has been received completely.
+"""
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+from starlette.datastructures import Headers, UploadFile
+from app.core.config import settings
+from app.core.exceptions import FileTooLargeError, ValidationError
+from app.models import Document
+from app.services.document_service import save_upload
+
+PDF = b'%PDF-1.4\n' + bytes(range(256)) * 40
+
+
+def _upload(db, filename: str, content: bytes):
+    upload = UploadFile(io.BytesIO(content), filename=filename, headers=Headers({'content-type': 'application/pdf'}))
+    return asyncio.run(save_upload(db, 1, upload))
+
+
+@pytest.fixture
+def upload_dir(monkeypatch, tmp_path, user):
+    """Upload directory, with a chunk size small enough to stream in several steps"""
+    monkeypatch.setattr(settings, 'UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(settings, 'UPLOAD_CHUNK_SIZE', 1024)
+    return str(tmp_path)
+
+
+def test_upload_is_streamed_and_hashed(db, upload_dir):
+    doc, digest = _upload(db, "../cv.pdf", PDF)
+    assert digest == hashlib.sha256(PDF).hexdigest()
+    assert doc.filename == "cv.pdf" and doc.path == os.path.join(upload_dir, "1_cv.pdf")
+    assert doc.mime_type == 'application/pdf'
+    with open(doc.path, 'rb') as f:
+        assert f.read() == PDF
+    assert os.listdir(upload_dir) == ["1_cv.pdf"], "temp file left behind"
+
+
+def test_bad_files_are_rejected(db, upload_dir):
+    for filename, content in [("cv.exe", PDF), ("cv.png", PDF), ("cv.pdf", b'')]:
+        try:
+            _upload(db, filename, content)
+            raise AssertionError(f"{filename} was accepted")
+        except ValidationError:
+            pass
+    assert os.listdir(upload_dir) == []
+    assert db.query(Document).count() == 0
+
+
+def test_oversized_upload_keeps_previous_file(db, upload_dir, monkeypatch):
+    _upload(db, "cv.pdf", PDF)
+    monkeypatch.setattr(settings, 'MAX_FILE_SIZE', len(PDF) - 1)
+    try:
+        _upload(db, "cv.pdf", PDF + b'more')
+        raise AssertionError("oversized file was accepted")
+    except FileTooLargeError:
+        pass
+    assert os.listdir(upload_dir) == ["1_cv.pdf"], "temp file left behind"
+    with open(os.path.join(upload_dir, "1_cv.pdf"), 'rb') as f:
+        assert f.read() == PDF, "a failed upload replaced the stored file"
+    assert db.query(Document).count() == 1
+
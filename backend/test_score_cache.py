@@ -0,0 +1,82 @@
+"""
+Score cache test: a repeated score is served from memory without touching
+the database, writes to Student, Document and UserCourse rows invalidate
+it, and writes this process never saw are caught by re-validation.
+"""
+import pytest
+from sqlalchemy import insert
+from app.core.config import settings
+from app.models import Student, Document, Course, UserCourse
+from app.services import score_cache
+from app.services.progress_counters import rebuild_counters
+from app.utils.query_counter import count_queries
+
+
+@pytest.fixture(autouse=True)
+def _seed(db, user):
+    db.add(Student(user_id=1, education_level="btech", skills="python, sql", interests="data science", name="Student"))
+    db.add(Course(id=1, title="Comms", category="soft_skill"))
+    db.add(Document(user_id=1, filename="a.pdf", path="a.pdf", ocr_confidence=0.9, verification_status="verified"))
+    db.commit()
+    score_cache.clear()
+
+
+def _score(db):
+    profile = db.query(Student).filter(Student.user_id == 1).first()
+    return score_cache.get_or_compute_score(db, profile, persist=False)
+
+
+def test_hit_is_served_from_memory(engine, db):
+    result, cached = _score(db)
+    assert not cached
+
+    profile = db.query(Student).filter(Student.user_id == 1).first()
+    with count_queries(engine) as log:
+        again, cached = score_cache.get_or_compute_score(db, profile, persist=False)
+    assert cached and again == result
+    assert log.count == 0, log.statements
+
+
+def test_writes_invalidate(db):
+    assert not _score(db)[1]
+    assert _score(db)[1]
+
+    profile = db.query(Student).filter(Student.user_id == 1).first()
+    profile.skills = "python, sql, machine learning"
+    db.commit()
+    assert not _score(db)[1], "Student write"
+    assert _score(db)[1]
+
+    db.add(Document(user_id=1, filename="b.pdf", path="b.pdf", ocr_confidence=0.4))
+    db.commit()
+    assert not _score(db)[1], "Document write"
+    assert _score(db)[1]
+
+    course = UserCourse(user_id=1, course_id=1, status="in_progress")
+    db.add(course)
+    db.commit()
+    assert not _score(db)[1], "UserCourse insert"
+    course.status = "completed"
+    db.commit()
+    assert not _score(db)[1], "UserCourse update"
+    assert _score(db)[1]
+
+
+def test_other_workers_writes_are_revalidated(db):
+    revalidate = settings.SCORE_CACHE_REVALIDATE_SECONDS
+    try:
+        settings.SCORE_CACHE_REVALIDATE_SECONDS = 3600
+        assert not _score(db)[1]
+
+        # Written behind this process's ORM, as another worker would
+        db.execute(insert(Document).values(user_id=1, filename="b.pdf", path="b.pdf", verification_status="verified"))
+        rebuild_counters(db.connection(), [1])
+        db.commit()
+        assert _score(db)[1], "within the re-validation window the entry is trusted"
+
+        settings.SCORE_CACHE_REVALIDATE_SECONDS = 0
+        assert not _score(db)[1], "re-validation must notice the new document"
+        assert _score(db)[1], "unchanged aggregates re-validate as a hit"
+    finally:
+        settings.SCORE_CACHE_REVALIDATE_SECONDS = revalidate
+
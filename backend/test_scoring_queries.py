@@ -0,0 +1,41 @@
+"""
+Query-count test: computing a score must hit the database exactly once
+(the scoring-inputs aggregate) and must not load OCR text.
+"""
+from app.models import Student, Document, Course, UserCourse
+from app.services.scoring_service import compute_score, load_scoring_inputs
+from app.utils.query_counter import count_queries
+
+
+def _seed(db):
+    db.add(Student(user_id=1, education_level="btech", skills="python, sql, communication",
+                   interests="data science", bio="built projects", name="Student"))
+    db.add_all([
+        Document(user_id=1, filename="a.pdf", path="a.pdf", ocr_text="x" * 10000, ocr_confidence=0.9, verification_status="verified"),
+        Document(user_id=1, filename="b.pdf", path="b.pdf", ocr_text="y" * 10000, ocr_confidence=0.5),
+        Document(user_id=1, filename="c.pdf", path="c.pdf"),
+    ])
+    db.add_all([Course(id=1, title="Comms", category="soft_skill"), Course(id=2, title="SQL", category="domain")])
+    db.add_all([
+        UserCourse(user_id=1, course_id=1, status="completed"),
+        UserCourse(user_id=1, course_id=2, status="completed"),
+    ])
+    db.commit()
+
+
+def test_scoring_inputs_aggregates(db, user):
+    _seed(db)
+    inputs = load_scoring_inputs(db, 1)
+    assert inputs.completed_soft_skill_courses == 1
+    assert inputs.doc_count == 3
+    assert abs(inputs.avg_ocr_confidence - 0.7) < 1e-9
+    assert inputs.verified_count == 1
+
+
+def test_compute_score_runs_one_query(engine, db, user):
+    _seed(db)
+    profile = db.query(Student).filter(Student.user_id == 1).first()
+    with count_queries(engine) as log:
+        compute_score(db, profile)
+    assert log.count == 1, log.statements
+    assert "ocr_text" not in log.statements[0]
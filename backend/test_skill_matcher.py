@@ -0,0 +1,55 @@
+"""
+Skill matcher test: KB skills are matched as whole words, multi-word skills
+and skills with punctuation (node.js, c++, .net) are found, and on typical
+OCR text the trie drops the false positives the old substring scan of
+/documents/extract-skills produced.
+"""
+import pandas as pd
+from app.services.skill_matcher import _build_kb_matcher, extract_skills
+
+KB = pd.DataFrame({'Technical Skills': [
+    'Python, SQL; Machine Learning',
+    'Java, JavaScript, Node.js',
+    'C++; .NET, Power BI',
+    'R, Go, AI',
+]})
+
+OCR_TEXT = """
+CERTIFICATE OF COMPLETION
+This is to certify that the candidate maintained excellent grades while
+building a Node.js API and Power BI dashboards. Programming in C++ and
+.NET; scripting in JavaScript. Good communication and organisational skills.
+"""
+
+
+def _old_substring_scan(vocab, text):
+    """What /documents/extract-skills did before the trie"""
+    text = text.lower()
+    return {sv for sv in vocab if sv and sv in text}
+
+
+def test_multi_word_and_punctuated_skills():
+    matcher = _build_kb_matcher(KB)
+    assert matcher.find("Worked on machine learning with python") == {'machine learning', 'python'}
+    assert matcher.find("machine-learning and machine  learning") == set(), "inner separators must match exactly"
+    assert matcher.find("Power BI reports") == {'power bi'}
+    assert matcher.find("node.js, C++ and .NET") == {'node.js', 'c++', '.net'}
+    assert matcher.find("nodejs, c, dotnet") == set()
+    assert matcher.find("JAVASCRIPT") == {'javascript'}, "java is not a whole word of javascript"
+
+
+def test_trie_drops_substring_false_positives():
+    matcher = _build_kb_matcher(KB)
+    vocab = matcher.canonical_ids
+
+    old = _old_substring_scan(vocab, OCR_TEXT)
+    new = matcher.find(OCR_TEXT)
+    assert new == {'node.js', 'power bi', 'c++', '.net', 'javascript'}
+    assert new <= old
+    # 'r' in certify, 'go' in good, 'ai' in maintained, 'java' in javascript
+    assert old - new == {'r', 'go', 'ai', 'java'}
+
+
+def test_builtin_dictionary_aliases():
+    assert sorted(extract_skills("Node.js and NodeJS, SQL, data science")) == ['data science', 'node.js', 'sql']
+    assert extract_skills("mysql") == ['mysql']
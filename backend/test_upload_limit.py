@@ -0,0 +1,69 @@
+"""
+Upload size limit test: multipart bodies over MAX_FILE_SIZE sent to the
+document upload route are refused with 413 before the route parses the
+form, whether the client announces the size (Content-Length) or streams
+it chunked. KB imports are not capped.
+"""
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.utils.body_limit import UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
+
+BOUNDARY = 'limit-test'
+
+
+def _app(seen):
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, paths=["/upload"])
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        seen.append(file.filename)
+        return {"size": len(await file.read())}
+
+    return app
+
+
+def _multipart(size: int) -> bytes:
+    return (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="a.pdf"\r\n'
+            f'Content-Type: application/pdf\r\n\r\n').encode() + b'x' * size + f'\r\n--{BOUNDARY}--\r\n'.encode()
+
+
+def _chunks(body: bytes, step: int = 4096):
+    for i in range(0, len(body), step):
+        yield body[i:i + step]
+
+
+def test_oversized_uploads_are_refused_before_parsing():
+    original = settings.MAX_FILE_SIZE
+    settings.MAX_FILE_SIZE = 16 * 1024
+    seen = []
+    headers = {'content-type': f'multipart/form-data; boundary={BOUNDARY}'}
+    try:
+        client = TestClient(_app(seen))
+        ok = client.post("/upload", content=_multipart(1000), headers=headers)
+        assert ok.status_code == 200 and ok.json() == {"size": 1000}
+
+        too_big = _multipart(settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD + 1)
+        announced = client.post("/upload", content=too_big, headers=headers)
+        assert announced.status_code == 413
+        assert announced.json()['error_code'] == 'FILE_TOO_LARGE'
+
+        streamed = client.post("/upload", content=_chunks(too_big), headers=headers)
+        assert streamed.status_code == 413
+        assert streamed.json()['error_code'] == 'FILE_TOO_LARGE'
+        assert seen == ['a.pdf'], "the route ran for an oversized body"
+    finally:
+        settings.MAX_FILE_SIZE = original
+
+
+def test_kb_import_is_not_capped():
+    from app.main import app
+    client = TestClient(app, base_url="http://localhost")
+    headers = {'content-type': f'multipart/form-data; boundary={BOUNDARY}'}
+    too_big = _multipart(settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD + 1)
+
+    assert client.post("/api/v1/documents/upload", content=too_big, headers=headers).status_code == 413
+    # Rejected by the KB route itself (a.pdf is not an Excel file), so the body got through
+    kb = client.post("/api/v1/kb/upload", content=too_big, headers=headers)
+    assert kb.status_code == 400 and 'Excel' in kb.json()['message']
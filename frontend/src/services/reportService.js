@@ -5,11 +5,31 @@ export async function listReports(){
   return res.data
 }
 
-export async function generateReport(){
-  const res = await api.post('/reports/generate')
+export async function getReportStatus(id){
+  const res = await api.get(`/reports/${id}`)
+  return res.data
+}
+
+export async function cancelReport(id){
+  const res = await api.post(`/reports/${id}/cancel`)
   return res.data
 }
 
+// Generation runs as a background job; resolves once it finishes
+export async function generateReport(onProgress, intervalMs = 1500){
+  const res = await api.post('/reports/generate')
+  let job = res.data
+  while (job.status === 'queued' || job.status === 'running') {
+    if (onProgress) onProgress(job)
+    await new Promise(resolve => setTimeout(resolve, intervalMs))
+    job = await getReportStatus(job.id)
+  }
+  if (job.status !== 'completed') {
+    throw new Error(job.error || `Report ${job.status}`)
+  }
+  return job
+}
+
 export async function downloadReport(id){
   const res = await api.get(`/reports/${id}/download`, { responseType: 'blob' })
   return res.data
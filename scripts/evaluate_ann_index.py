@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Recall@k / latency harness for the approximate KB index
+
+Builds the ANN index over the current KB embedding store and compares it
+against an exact flat scan of the saved float32 embeddings, sweeping the
+query-time knobs (IVF nprobe, HNSW efSearch) to pick EMBEDDING_IVF_NPROBE /
+EMBEDDING_HNSW_EF_SEARCH. Queries are KB vectors plus optional noise.
+
+Usage:
+    python scripts/evaluate_ann_index.py                       # every available mode
+    python scripts/evaluate_ann_index.py --mode ivf --nprobe 4 8 16 32
+    python scripts/evaluate_ann_index.py --mode hnsw --ef-search 32 64 128 --k 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the backend to Python path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+
+from app.core.config import settings
+from app.services import ann_index
+from app.services.embedding_store import EmbeddingStore
+from app.services.embeddings_service import _emb_dir
+from app.utils.lazy_import import is_installed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the ANN KB index against the exact scan")
+    parser.add_argument("--mode", choices=["ivf", "hnsw"], nargs="+", help="Index modes to evaluate")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--queries", type=int, default=200, help="KB vectors sampled as queries")
+    parser.add_argument("--noise", type=float, default=0.0, help="Gaussian noise added to queries (relative to vector norm)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64], help="IVF nprobe values")
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256], help="HNSW efSearch values")
+    args = parser.parse_args()
+
+    emb_dir = _emb_dir()
+    if not EmbeddingStore.exists(emb_dir) or not (emb_dir / "embeddings.npy").exists():
+        print("⚠️ No embedding store found; build the KB index first")
+        return
+    store = EmbeddingStore.load(emb_dir)
+    exact = EmbeddingStore.from_vectors(np.load(emb_dir / "embeddings.npy", mmap_mode='r'), 'float32')
+
+    rng = np.random.default_rng(0)
+    queries = exact.vectors()[rng.choice(len(exact), min(args.queries, len(exact)), replace=False)]
+    if args.noise:
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries + args.noise * norms / np.sqrt(queries.shape[1]) * rng.normal(size=queries.shape).astype(np.float32)
+
+    print(f"📊 {len(store)} vectors x {store.dim} ({store.dtype} store), {len(queries)} queries, k={args.k}")
+    flat = ann_index.recall_at_k(store, exact, queries, args.k)
+    print(f"   flat ({store.dtype})   recall@{args.k} {flat['recall']:.4f}  mean {flat['mean_ms']:.2f} ms  p95 {flat['p95_ms']:.2f} ms")
+
+    modes = args.mode or (["ivf", "hnsw"] if is_installed("faiss") else ["ivf"])
+    for mode in modes:
+        mode = ann_index.choose_mode(len(store), mode)
+        params = ann_index.build_params(mode, store)
+        started = time.perf_counter()
+        index = ann_index.build(store, params)
+        print(f"🔍 {params['backend']} {mode} built in {time.perf_counter() - started:.1f}s {params}")
+
+        knob, values = ("EMBEDDING_HNSW_EF_SEARCH", args.ef_search) if mode == "hnsw" else ("EMBEDDING_IVF_NPROBE", args.nprobe)
+        for value in values:
+            setattr(settings, knob, value)
+            result = ann_index.recall_at_k(index, exact, queries, args.k)
+            print(f"   {knob}={value:<5} recall@{args.k} {result['recall']:.4f}  "
+                  f"mean {result['mean_ms']:.2f} ms  p95 {result['p95_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
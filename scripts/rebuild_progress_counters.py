@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Reconcile the materialized per-user progress counters with the source tables
+
+Writes through the ORM keep user_counters current; run this after bulk
+imports, manual SQL or a restore, or periodically as a safety net.
+
+Usage:
+    python scripts/rebuild_progress_counters.py                     # every user
+    python scripts/rebuild_progress_counters.py --user-ids 3 4 5    # selected users
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the backend to Python path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+
+from app.database import SessionLocal
+from app.services.progress_counters import rebuild_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild per-user progress counters")
+    parser.add_argument("--user-ids", type=int, nargs="+", help="Only rebuild these user ids")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        rows = rebuild_counters(db.connection(), args.user_ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    print(f"✅ Rebuilt progress counters for {rows} users in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Rescore a cohort of students in one batch (e.g. a whole campus intake after a KB update)
+
+Usage:
+    python scripts/score_cohort.py                     # every student
+    python scripts/score_cohort.py --user-ids 3 4 5    # selected users
+    python scripts/score_cohort.py --workers 4 --chunk-size 1000
+    python scripts/score_cohort.py --dry-run           # compute only, write nothing
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the backend to Python path
+project_root = Path(__file__).parent.parent
+backend_path = project_root / "backend"
+sys.path.insert(0, str(backend_path))
+
+from app.database import SessionLocal
+from app.services.batch_scoring_service import score_cohort
+
+
+def _progress(started: float):
+    def report(done: int, total: int):
+        pct = (done / total * 100) if total else 100.0
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        print(f"\r📊 Scored {done}/{total} students ({pct:.1f}%, {rate:.0f}/s)", end="", flush=True)
+        if done == total:
+            print()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch career readiness scoring")
+    parser.add_argument("--user-ids", type=int, nargs="+", help="Only score these user ids")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for profile text features")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Students loaded and inserted per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Compute scores without inserting CareerScore rows")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        results = score_cohort(
+            db,
+            user_ids=args.user_ids,
+            workers=max(1, args.workers),
+            chunk_size=max(1, args.chunk_size),
+            persist=not args.dry_run,
+            progress=_progress(started),
+        )
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    if not results:
+        print("⚠️ No student profiles found")
+        return
+    values = sorted(results.values())
+    print(f"✅ Scored {len(results)} students in {elapsed:.1f}s "
+          f"(min {values[0]}, median {values[len(values) // 2]}, max {values[-1]})"
+          f"{' - dry run, nothing written' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()